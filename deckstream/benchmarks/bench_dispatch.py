@@ -0,0 +1,61 @@
+"""
+Microbenchmark: cost of dispatching one button press.
+
+Compares the old per-press path (string-keyed lookup on the raw serial line,
+then re-parsing the action's config string) against the compiled dispatch
+table. Actions are looked up and prepared but not run, so nothing is typed
+or launched.
+
+Usage:
+    python benchmarks/bench_dispatch.py [--presses N]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+LINES = [f"BUTTON_{i}_{kind}" for i in range(1, 10) for kind in ("PRESS", "HOLD")]
+
+def build_config():
+    """A profile with every button bound, mixing the action types that need parsing."""
+    here = os.path.abspath(__file__)
+    profile = {}
+    for i, line in enumerate(LINES):
+        if i % 3 == 0: profile[line] = {"type": "keystroke", "value": "Ctrl+Shift+Esc"}
+        elif i % 3 == 1: profile[line] = {"type": "open_with", "value": f"{here}|{os.path.dirname(here)}"}
+        else: profile[line] = {"type": "typetext", "value": "hello"}
+    streamdeck.CONFIG = {"settings": {"active_profile": "Bench"}, "profiles": {"Bench": profile, "Other": dict(profile)}, "automation": {}}
+    streamdeck.compile_config()
+
+def legacy_dispatch(line):
+    """Mirrors the per-press work done before the dispatch table existed."""
+    button_id = line.split('_')[1]
+    action = streamdeck.CONFIG["profiles"][streamdeck.CONFIG["settings"]["active_profile"]].get(line)
+    action_type = action.get("type", "none"); value = action.get("value", "")
+    if action_type == "open_with":
+        app_path, arg_path = value.split('|', 1)
+        return button_id, os.path.exists(app_path) and os.path.exists(arg_path)
+    if action_type == "keystroke":
+        return button_id, [k.strip() for k in value.lower().split('+')]
+    return button_id, value
+
+def compiled_dispatch(line):
+    button_id, kind = streamdeck.SERIAL_EVENTS[line]
+    return button_id, streamdeck.ACTIVE_PROFILE.bindings[button_id][kind]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--presses", type=int, default=200_000)
+    args = parser.parse_args()
+    build_config()
+    rounds = max(1, args.presses // len(LINES))
+    for name, fn in (("legacy", legacy_dispatch), ("compiled", compiled_dispatch)):
+        best = min(timeit.repeat(lambda: [fn(line) for line in LINES], number=rounds, repeat=5))
+        per_press_ns = best / (rounds * len(LINES)) * 1e9
+        print(f"{name:>9}: {per_press_ns:8.1f} ns/press")
+
+if __name__ == "__main__":
+    main()
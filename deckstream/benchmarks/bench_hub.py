@@ -0,0 +1,173 @@
+"""
+Benchmark: many decks on one serial hub.
+
+Simulates dozens of decks, each on its own pseudo-terminal (or loop:// port),
+and sends every deck a burst of frames at the same moment, round after round.
+Reports sustained events/sec, how long each round takes to be fully
+dispatched, and how many threads the process needed. Three ways to read the
+decks are compared:
+
+* hub:     the real SerialHub (one event loop, ports watched with add_reader)
+* loop:    SerialReader.pump_async on loop:// ports, which the event loop
+           cannot watch, so reads go through the hub's I/O thread pool
+* threads: one thread per deck running the old blocking read loop, as before the hub
+
+In hub mode one deck is also removed and re-added between rounds, to check
+that the other decks stay connected.
+
+Usage:
+    python benchmarks/bench_hub.py [--devices N] [--burst B] [--rounds R] [--mode hub|loop|threads|all]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import serial
+import streamdeck
+
+class Sink:
+    """Counts dispatched events per deck, standing in for handle_button_event."""
+    def __init__(self):
+        self.count = 0
+        self.per_deck = {}
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+
+    def __call__(self, button_id, kind, trace=None, deck=None):
+        name = deck.name if deck else streamdeck.PRIMARY_DECK
+        with self.lock:
+            self.count += 1; self.per_deck[name] = self.per_deck.get(name, 0) + 1
+            self.changed.notify_all()
+
+    def wait_for(self, total, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            while self.count < total:
+                left = deadline - time.monotonic()
+                if left <= 0: return False
+                self.changed.wait(left)
+        return True
+
+class ThreadedReader(streamdeck.SerialReader):
+    """The blocking reader loop from before the hub, one thread per deck."""
+    def run(self):
+        while self.should_run():
+            port = streamdeck.find_serial_port(self.port, self.usb_ids)
+            try:
+                with serial.serial_for_url(port, self.bauds[0], timeout=streamdeck.SERIAL_READ_TIMEOUT) as ser:
+                    ser.reset_input_buffer(); self.connected_port = port; self.connects += 1
+                    while self.should_run():
+                        data = ser.read(ser.in_waiting or 1)
+                        if data: self.feed(ser, data)
+            except (serial.SerialException, OSError): pass
+            self.connected_port = None
+            if self.should_run(): time.sleep(streamdeck.RECONNECT_MIN_DELAY)
+
+def burst(size, seq):
+    return b"".join(streamdeck.encode_frame(1 + (seq + i) % 9, streamdeck.PRESS, seq + i, seq + i) for i in range(size))
+
+def open_ptys(count):
+    import pty, tty
+    ptys = []
+    for _ in range(count):
+        master, slave = pty.openpty(); tty.setraw(slave)
+        ptys.append((master, slave, os.ttyname(slave)))
+    return ptys
+
+def run_rounds(sink, writers, burst_size, rounds, between=None):
+    """Writes one burst to every deck per round; returns (round durations in ms, total seconds)."""
+    durations = []; expected = 0; start = time.perf_counter()
+    for round_no in range(rounds):
+        if between: between(round_no)
+        expected += len(writers) * burst_size
+        round_start = time.perf_counter()
+        for write in writers: write(burst(burst_size, round_no * burst_size))
+        if not sink.wait_for(expected):
+            print(f"  round {round_no}: only {sink.count}/{expected} events arrived")
+            break
+        durations.append((time.perf_counter() - round_start) * 1000)
+    return durations, time.perf_counter() - start
+
+def report(mode, sink, durations, elapsed, threads):
+    if not durations: print(f"{mode:<8} no complete rounds"); return
+    print(f"{mode:<8} {sink.count / elapsed:9.0f} events/s   round p50 {statistics.median(durations):6.2f} ms   "
+          f"max {max(durations):6.2f} ms   threads {threads}")
+
+def bench_hub(devices, burst_size, rounds):
+    ptys = open_ptys(devices)
+    streamdeck.CONFIG = {"settings": {"baudrate": streamdeck.BAUDRATE, "usb_ids": [],
+                                      "devices": [{"name": f"deck{i}", "port": port} for i, (_, _, port) in enumerate(ptys[1:], 1)]},
+                         "profiles": {"Default": {}}}
+    streamdeck.ARDUINO_PORT = ptys[0][2]
+    sink = Sink(); streamdeck.handle_button_event = sink
+    hub = streamdeck.SERIAL_HUB = streamdeck.SerialHub()
+    hub.sync(streamdeck.deck_specs())
+    deadline = time.monotonic() + 5
+    while len(hub.connected_ports()) < devices and time.monotonic() < deadline: time.sleep(0.01)
+    writers = [lambda data, fd=master: os.write(fd, data) for master, _, _ in ptys]
+    specs = streamdeck.deck_specs()
+    def churn(round_no):
+        # Hot-remove and re-add the last deck halfway through; the others must not notice.
+        if round_no != rounds // 2: return
+        hub.remove(specs[-1]["name"]); hub.add(specs[-1])
+        while specs[-1]["name"] not in {name for name, stats in hub.stats().items() if stats["port"]}: time.sleep(0.005)
+    durations, elapsed = run_rounds(sink, writers, burst_size, rounds, churn)
+    threads = threading.active_count()
+    reconnected = sorted(name for name, stats in hub.stats().items() if stats["connects"] != 1)
+    hub.close(); streamdeck.SERIAL_HUB = None
+    for master, slave, _ in ptys: os.close(master); os.close(slave)
+    report("hub", sink, durations, elapsed, threads)
+    print(f"         decks reconnected besides the re-added one: {[n for n in reconnected if n != specs[-1]['name']] or 'none'}")
+
+def bench_loop(devices, burst_size, rounds):
+    ports = [serial.serial_for_url("loop://", timeout=streamdeck.SERIAL_READ_TIMEOUT) for _ in range(devices)]
+    sink = Sink(); running = [True]
+    readers = [streamdeck.SerialReader("loop://", streamdeck.BAUDRATE, sink, lambda: running[0]) for _ in ports]
+    loop = asyncio.new_event_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=streamdeck.HUB_IO_WORKERS))
+    async def pump_all(): await asyncio.gather(*(reader.pump_async(ser) for reader, ser in zip(readers, ports)))
+    thread = threading.Thread(target=loop.run_until_complete, args=(pump_all(),), daemon=True); thread.start()
+    time.sleep(0.1)
+    durations, elapsed = run_rounds(sink, [ser.write for ser in ports], burst_size, rounds)
+    threads = threading.active_count()
+    running[0] = False; thread.join(2)
+    report("loop", sink, durations, elapsed, threads)
+
+def bench_threads(devices, burst_size, rounds):
+    ptys = open_ptys(devices)
+    sink = Sink(); running = [True]
+    readers = [ThreadedReader(port, streamdeck.BAUDRATE, sink, lambda: running[0], []) for _, _, port in ptys]
+    threads = [threading.Thread(target=reader.run, daemon=True) for reader in readers]
+    for thread in threads: thread.start()
+    deadline = time.monotonic() + 5
+    while not all(reader.connected_port for reader in readers) and time.monotonic() < deadline: time.sleep(0.01)
+    durations, elapsed = run_rounds(sink, [lambda data, fd=master: os.write(fd, data) for master, _, _ in ptys], burst_size, rounds)
+    count = threading.active_count()
+    running[0] = False
+    for thread in threads: thread.join(2)
+    for master, slave, _ in ptys: os.close(master); os.close(slave)
+    report("threads", sink, durations, elapsed, count)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--devices", type=int, default=32)
+    parser.add_argument("--burst", type=int, default=20, help="frames per deck per round")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--mode", choices=["hub", "loop", "threads", "all"], default="all")
+    args = parser.parse_args()
+    streamdeck.set_log_level("WARNING")
+    print(f"{args.devices} decks, {args.burst} frames each per round, {args.rounds} rounds")
+    use_pty = os.name == "posix"
+    if args.mode in ("hub", "all") and use_pty: bench_hub(args.devices, args.burst, args.rounds)
+    if args.mode in ("loop", "all"): bench_loop(args.devices, args.burst, args.rounds)
+    if args.mode in ("threads", "all") and use_pty: bench_threads(args.devices, args.burst, args.rounds)
+    if not use_pty and args.mode != "loop": print("hub/threads modes need pseudo-terminals (Linux/macOS); only loop mode ran.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark: launching processes from a mashed button.
+
+Presses an exe button N times in a row. The command is a short-lived Python
+child that sleeps for --child-seconds. The old fire-and-forget
+subprocess.Popen is compared with the LaunchManager under each instance
+policy. For each run it reports how long the pressing thread was blocked per
+press, how many processes were started, and how many were deduplicated. It
+also reports how many children were left as zombies once they had all exited.
+Finally it times resolving a bare command name on PATH, with and without the
+cache.
+
+Zombie counts use psutil and only mean something on Linux/macOS.
+
+Usage:
+    python benchmarks/bench_launcher.py [--presses N] [--child-seconds S]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+def zombies():
+    try: import psutil
+    except ImportError: return None
+    count = 0
+    for child in psutil.Process().children():
+        try:
+            if child.status() == psutil.STATUS_ZOMBIE: count += 1
+        except psutil.NoSuchProcess: pass
+    return count
+
+def child_argv(seconds):
+    return (sys.executable, "-c", f"import time; time.sleep({seconds})")
+
+def bench_legacy(presses, seconds):
+    argv = list(child_argv(seconds)); blocked = []; handles = []
+    for _ in range(presses):
+        start = time.perf_counter(); handles.append(subprocess.Popen(argv)); blocked.append(time.perf_counter() - start)
+    time.sleep(seconds + 0.5)
+    left = zombies()
+    for proc in handles: proc.wait()
+    return {"blocked_ms": statistics.median(blocked) * 1000, "started": presses, "deduplicated": 0, "zombies": left}
+
+def bench_manager(presses, seconds, policy):
+    launcher = streamdeck.LAUNCHER = streamdeck.LaunchManager()
+    action = streamdeck.compile_action({"type": "exe", "value": sys.executable, "instance": policy})
+    action.argv = child_argv(seconds)   # same command, with arguments the config format has no room for
+    blocked = []
+    for _ in range(presses):
+        start = time.perf_counter(); action.run(); blocked.append(time.perf_counter() - start)
+    deadline = time.monotonic() + seconds + 10
+    while time.monotonic() < deadline:
+        stats = launcher.stats()
+        if stats["queued"] == 0 and stats["live"] == 0: break
+        time.sleep(0.05)
+    left = zombies()
+    launcher.close()
+    stats = launcher.stats()
+    return {"blocked_ms": statistics.median(blocked) * 1000, "started": stats["launched"],
+            "deduplicated": stats["deduplicated"], "reaped": stats["reaped"], "zombies": left}
+
+def bench_resolve(rounds=1000):
+    name = os.path.basename(sys.executable)
+    start = time.perf_counter()
+    for _ in range(rounds): shutil.which(name)
+    uncached = (time.perf_counter() - start) / rounds
+    streamdeck.EXE_CACHE.clear(); streamdeck.resolve_executable(name)
+    start = time.perf_counter()
+    for _ in range(rounds): streamdeck.resolve_executable(name)
+    cached = (time.perf_counter() - start) / rounds
+    print(f"resolve '{name}' on PATH: {uncached * 1e6:8.1f} us uncached, {cached * 1e6:6.2f} us cached")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--presses", type=int, default=20)
+    parser.add_argument("--child-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+    streamdeck.CONFIG = {"settings": {}}
+    streamdeck.set_log_level("ERROR")
+    print(f"{args.presses} presses of one exe button, child runs {args.child_seconds}s")
+    rows = [("legacy Popen", bench_legacy(args.presses, args.child_seconds))]
+    for policy in streamdeck.INSTANCE_POLICIES:
+        rows.append((f"launcher/{policy}", bench_manager(args.presses, args.child_seconds, policy)))
+    for name, row in rows:
+        print(f"  {name:<18} blocked {row['blocked_ms']:7.3f} ms/press   started {row['started']:3}   "
+              f"deduplicated {row['deduplicated']:3}   zombies after exit {row['zombies']}")
+    bench_resolve()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark: macro timing accuracy.
+
+Runs a long macro of keystroke steps with a fixed gap between them. Each
+keystroke goes to a backend that records when it happened and then busies
+itself for --step-cost-ms, as a real key event would. It reports, per step,
+how far the time between two steps was from the intended gap (jitter), and how
+far the last step ended up from where it should have been (drift). Two ways of
+running the macro are compared:
+
+* legacy: the old loop, which ran each step and then slept the gap, so every
+  step's own run time was added to the schedule
+* engine: MacroAction, which runs the compiled plan against monotonic deadlines
+
+The run is also cancelled halfway through once, to show how quickly a stop
+takes effect.
+
+The engine's jitter tail is mostly the operating system waking the thread
+late, which no sleep can avoid: the "sleep" line shows how late a plain
+time.sleep(gap) wakes up on the same machine. A step that starts late makes
+the next interval shorter, because the next step keeps its deadline, so one
+late wake-up shows up as two jitter samples. Only the last MACRO_SPIN of each
+wait is spent yielding; --spin-ms raises it to trade CPU time for a shorter
+tail (a spin as long as the gap keeps one core busy for the whole macro).
+
+Usage:
+    python benchmarks/bench_macro.py [--steps N] [--gap-ms G] [--step-cost-ms C] [--spin-ms S]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+class TimedBackend(streamdeck.InjectionBackend):
+    """Records the time of every hotkey and spends `cost` seconds on it."""
+    name = "timed"
+
+    def __init__(self, cost):
+        self.cost = cost
+        self.times = []
+
+    def hotkey(self, keys):
+        now = time.monotonic(); self.times.append(now)
+        while time.monotonic() - now < self.cost: pass
+
+def macro_config(steps, gap_ms):
+    return {"type": "macro", "gap": gap_ms, "value": [{"type": "keystroke", "value": "shift"}] * steps}
+
+def run_legacy(action, gap):
+    for op in action.plan:
+        op[1].run(None)
+        time.sleep(gap)
+
+def measure(mode, steps, gap_ms, cost_ms):
+    backend = streamdeck.TEXT_BACKEND_OVERRIDE = TimedBackend(cost_ms / 1000.0)
+    action = streamdeck.compile_action(macro_config(steps, gap_ms))
+    if mode == "legacy": run_legacy(action, gap_ms / 1000.0)
+    else: action.run()
+    times = backend.times
+    gap = gap_ms / 1000.0
+    jitter = [abs((b - a) - gap) * 1e6 for a, b in zip(times, times[1:])]
+    drift = (times[-1] - times[0] - gap * (len(times) - 1)) * 1000
+    jitter.sort()
+    pick = lambda pct: jitter[min(len(jitter) - 1, int(len(jitter) * pct / 100))]
+    print(f"  {mode:<7} jitter p50 {pick(50):8.1f} us   p99 {pick(99):8.1f} us   max {jitter[-1]:8.1f} us   "
+          f"drift after {len(times)} steps {drift:9.2f} ms")
+
+def measure_sleep(steps, gap_ms):
+    late = []
+    for _ in range(steps):
+        start = time.monotonic(); time.sleep(gap_ms / 1000.0); late.append((time.monotonic() - start) * 1e6 - gap_ms * 1000)
+    late.sort()
+    print(f"  sleep   late  p50 {late[len(late) // 2]:8.1f} us   p99 {late[int(len(late) * 0.99)]:8.1f} us   max {late[-1]:8.1f} us")
+
+def measure_cancel(steps, gap_ms):
+    backend = streamdeck.TEXT_BACKEND_OVERRIDE = TimedBackend(0)
+    action = streamdeck.compile_action(macro_config(steps, gap_ms))
+    cancel = threading.Event()
+    thread = threading.Thread(target=action.run, args=(cancel,)); thread.start()
+    time.sleep(steps * gap_ms / 2000.0)
+    cancelled_at = time.monotonic(); cancel.set(); thread.join()
+    stopped = (time.monotonic() - cancelled_at) * 1000
+    print(f"  cancel: stopped {stopped:.2f} ms after the press, {len(backend.times)}/{steps} steps ran")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--gap-ms", type=int, default=5)
+    parser.add_argument("--step-cost-ms", type=float, default=0.5)
+    parser.add_argument("--spin-ms", type=float, default=streamdeck.MACRO_SPIN * 1000)
+    args = parser.parse_args()
+    streamdeck.MACRO_SPIN = args.spin_ms / 1000.0
+    streamdeck.CONFIG = {"settings": {}}
+    streamdeck.set_log_level("WARNING")
+    print(f"{args.steps}-step macro, {args.gap_ms} ms gap, {args.step_cost_ms} ms per step, {args.spin_ms} ms spin")
+    measure_sleep(args.steps, args.gap_ms)
+    for mode in ("legacy", "engine"): measure(mode, args.steps, args.gap_ms, args.step_cost_ms)
+    measure_cancel(args.steps, args.gap_ms)
+    print(f"  engine step lateness (all runs): {streamdeck.MACRO_JITTER.summary()}")
+    streamdeck.TEXT_BACKEND_OVERRIDE = None
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark: disk writes caused by a flood of switch_profile presses.
+
+Fires N switch_profile actions back to back (as if the button were mashed)
+against a throwaway config file and counts how many times the file is
+actually written, compared with the old write-on-every-switch behaviour.
+
+Usage:
+    python benchmarks/bench_persistence.py [--presses N] [--profiles P]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--presses", type=int, default=1000)
+    parser.add_argument("--profiles", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=0.001, help="seconds between presses")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        streamdeck.CONFIG_FILE = os.path.join(tmp, "config.json")
+        with open(streamdeck.CONFIG_FILE, "w") as f:
+            json.dump({"profiles": {f"Profile {i}": {} for i in range(args.profiles)}}, f)
+        streamdeck.load_config(); streamdeck.set_log_level("WARNING")
+        switch = streamdeck.compile_action({"type": "switch_profile", "value": "next"})
+
+        # Old behaviour: a synchronous, indented rewrite on every switch.
+        start = time.perf_counter()
+        for _ in range(args.presses):
+            with open(streamdeck.CONFIG_FILE, "w") as f: json.dump(streamdeck.CONFIG, f, indent=4)
+        legacy_seconds = time.perf_counter() - start
+        legacy_size = os.path.getsize(streamdeck.CONFIG_FILE)
+
+        streamdeck.start_config_writer()
+        writer = streamdeck.CONFIG_WRITER
+        start = time.perf_counter()
+        for _ in range(args.presses):
+            switch.run(); time.sleep(args.interval)
+        flood_seconds = time.perf_counter() - start
+        writer.close()
+
+        final = json.load(open(streamdeck.CONFIG_FILE))
+        assert final["settings"]["active_profile"] == streamdeck.ACTIVE_PROFILE.name
+        print(f"presses:           {args.presses} over {flood_seconds:.2f}s")
+        print(f"legacy writes:     {args.presses} ({legacy_seconds * 1000:.1f} ms of synchronous I/O, {legacy_size} bytes each)")
+        print(f"write-behind:      {writer.writes} writes for {writer.requests} save requests ({os.path.getsize(streamdeck.CONFIG_FILE)} bytes each)")
+
+if __name__ == "__main__":
+    main()
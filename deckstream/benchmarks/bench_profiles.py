@@ -0,0 +1,120 @@
+"""
+Benchmark: load time and memory of configs with thousands of profiles.
+
+Writes throwaway config files and loads each one in a fresh process, so that
+memory readings do not mix. It reports the time to read, check and compile
+the file, how much the process RSS grew, and the size of the file. Two
+scenarios are run for each profile count:
+
+* few:      every profile sets --bound bindings of its own
+* inherit:  every profile inherits from one shared base with 12 bindings and
+            overrides 2 of them
+
+Each scenario is loaded three ways:
+
+* legacy:   the old loader, which filled every profile up to 18 placeholder
+            dicts and compiled all 18 entries, on a file in the old layout
+            (for "inherit", every profile spells out all of its bindings)
+* store:    load_config() on that same old-layout file
+* sparse:   load_config() on the file as the app now saves it
+
+The compiled button labels are compared with the legacy load, to check that
+old files still load to the same bindings.
+
+Usage:
+    python benchmarks/bench_profiles.py [--profiles 1000,5000] [--bound N]
+"""
+import argparse
+import gc
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+KEYS = [f"BUTTON_{i}_{kind}" for i in range(1, 10) for kind in ("PRESS", "HOLD")]
+PLACEHOLDER = {"type": "none", "value": ""}
+
+def binding(profile, slot):
+    """A mix of actions shared by many profiles and ones unique to a profile."""
+    if slot % 3 == 0: return {"type": "keystroke", "value": f"ctrl+{'abcdefghij'[slot % 10]}"}
+    if slot % 3 == 1: return {"type": "typetext", "value": f"Signature for profile {profile}"}
+    return {"type": "link", "value": f"https://example.com/{slot}"}
+
+def scenario(name, count, bound):
+    """Returns (old-layout config, sparse config)."""
+    settings = {"active_profile": "P0", "log_level": "WARNING"}
+    if name == "few":
+        sparse = {f"P{p}": {KEYS[s]: binding(p, s) for s in range(bound)} for p in range(count)}
+        legacy = {name: {**{key: PLACEHOLDER for key in KEYS}, **profile} for name, profile in sparse.items()}
+    else:
+        base = {KEYS[s]: binding("base", s) for s in range(12)}
+        own = lambda p: {KEYS[0]: binding(p, 0), KEYS[15]: binding(p, 1)}
+        sparse = {"Base": base, **{f"P{p}": dict(own(p), inherits="Base") for p in range(count)}}
+        legacy = {"Base": {**{key: PLACEHOLDER for key in KEYS}, **base}}
+        legacy.update({f"P{p}": {**{key: PLACEHOLDER for key in KEYS}, **base, **own(p)} for p in range(count)})
+    return {"settings": dict(settings), "profiles": legacy}, {"settings": dict(settings), "profiles": sparse}
+
+def legacy_load(path):
+    """The loader as it was: placeholders for every key, every key compiled."""
+    with open(path) as f: config = json.load(f)
+    streamdeck.CONFIG = config
+    for profile in config["profiles"].values():
+        for key in KEYS: profile.setdefault(key, {"type": "none", "value": ""})
+    names = list(config["profiles"])
+    table = {}
+    for idx, name in enumerate(names):
+        profile = config["profiles"][name]
+        bindings = [(streamdeck.NO_ACTION, streamdeck.NO_ACTION)]
+        for i in range(1, 10):
+            bindings.append(tuple(streamdeck.compile_action(profile.get(f"BUTTON_{i}_{kind}")) for kind in ("PRESS", "HOLD")))
+        table[name] = streamdeck.CompiledProfile(name, tuple(bindings), names[(idx + 1) % len(names)])
+    return table
+
+def child(mode, path):
+    import psutil
+    streamdeck.set_log_level("WARNING")
+    process = psutil.Process()
+    gc.collect(); before = process.memory_info().rss
+    start = time.perf_counter()
+    if mode == "legacy": table = legacy_load(path)
+    else: streamdeck.CONFIG_FILE = path; streamdeck.load_config(); table = streamdeck.PROFILE_TABLE
+    elapsed = time.perf_counter() - start
+    gc.collect(); grown = process.memory_info().rss - before
+    labels = hashlib.sha1(json.dumps([[name, [[a.label for a in row] for row in profile.bindings]]
+                                      for name, profile in table.items()]).encode()).hexdigest()
+    print(json.dumps({"load_ms": elapsed * 1000, "rss_mb": grown / 2**20, "labels": labels}))
+
+def run_child(mode, path):
+    out = subprocess.run([sys.executable, __file__, "--child", mode, path], capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profiles", default="1000,5000", help="comma separated profile counts")
+    parser.add_argument("--bound", type=int, default=3, help="bindings set per profile in the 'few' scenario")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child: child(*args.child); return
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in (int(count) for count in args.profiles.split(",")):
+            for name in ("few", "inherit"):
+                legacy, sparse = scenario(name, count, args.bound)
+                paths = {"legacy": os.path.join(tmp, "legacy.json"), "sparse": os.path.join(tmp, "sparse.json")}
+                with open(paths["legacy"], "w") as f: json.dump(legacy, f)
+                with open(paths["sparse"], "w") as f: json.dump(sparse, f)
+                print(f"{count} profiles, {name}:")
+                reference = None
+                for mode, path in (("legacy", paths["legacy"]), ("store", paths["legacy"]), ("sparse", paths["sparse"])):
+                    row = run_child(mode, path)
+                    reference = reference or row["labels"]
+                    print(f"  {mode:<7} load {row['load_ms']:8.1f} ms   RSS +{row['rss_mb']:6.1f} MB   "
+                          f"file {os.path.getsize(path) / 2**20:5.2f} MB   {'same bindings' if row['labels'] == reference else 'DIFFERENT bindings'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: picking up outside edits to config.json.
+
+Uses a throwaway config with --profiles profiles. Three things are measured:
+
+* detection: another program replaces the file, as provisioning tools do
+  with a temp file and rename. The time until the watcher has applied the
+  change is measured with inotify (Linux only) and with mtime/size polling.
+* apply:     the cost of applying a one-button edit, the old way (read the
+  whole file again and recompile every profile) and with apply_config(),
+  which recompiles only the edited profile and the ones that inherit from it.
+  The time a button press would have to wait is the same in both cases,
+  since presses only ever see the finished table.
+* own saves: the app saves the config --saves times, and the watcher must
+  not reload any of them.
+
+Usage:
+    python benchmarks/bench_reload.py [--profiles N] [--rounds R] [--saves S]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+def make_config(profiles):
+    config = {"settings": {"active_profile": "P0", "log_level": "WARNING"},
+              "profiles": {"Base": {f"BUTTON_{i}_PRESS": {"type": "keystroke", "value": f"ctrl+{i}"} for i in range(1, 10)}}}
+    for p in range(profiles):
+        config["profiles"][f"P{p}"] = {"inherits": "Base", "BUTTON_1_HOLD": {"type": "typetext", "value": f"profile {p}"}}
+    return config
+
+def write_externally(path, config):
+    tmp = path + ".provision"
+    with open(tmp, "w") as f: json.dump(config, f)
+    os.replace(tmp, path)
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline: return False
+        time.sleep(0.001)
+    return True
+
+def bench_detection(path, config, use_inotify, rounds):
+    watcher = streamdeck.CONFIG_WATCHER = streamdeck.ConfigWatcher(path, use_inotify=use_inotify)
+    if use_inotify and watcher.mode != "inotify": watcher.close(); return
+    delays = []
+    for round_no in range(rounds):
+        config["profiles"]["P0"]["BUTTON_1_HOLD"]["value"] = f"{watcher.mode} edit {round_no}"
+        before = watcher.reloads
+        start = time.perf_counter(); write_externally(path, config)
+        if not wait_for(lambda: watcher.reloads > before): print(f"  {watcher.mode}: change {round_no} was missed"); break
+        delays.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.05)
+    watcher.close(); streamdeck.CONFIG_WATCHER = None
+    label = streamdeck.PROFILE_TABLE["P0"].bindings[1][1].label
+    print(f"  detection ({watcher.mode:<7}) p50 {statistics.median(delays):7.1f} ms   max {max(delays):7.1f} ms   "
+          f"({len(delays)} edits, P0 hold now '{label}')")
+
+def bench_apply(path, config, rounds):
+    full, incremental = [], []
+    for round_no in range(rounds):
+        config["profiles"]["P1"]["BUTTON_1_HOLD"]["value"] = f"apply {round_no}"
+        write_externally(path, config)
+        start = time.perf_counter(); streamdeck.load_config(); full.append(time.perf_counter() - start)
+        config["profiles"]["P1"]["BUTTON_1_HOLD"]["value"] = f"apply {round_no}b"
+        write_externally(path, config)
+        start = time.perf_counter()
+        with open(path) as f: streamdeck.apply_config(json.load(f))
+        incremental.append(time.perf_counter() - start)
+    print(f"  apply one-button edit: full reload {statistics.median(full) * 1000:7.1f} ms   "
+          f"apply_config {statistics.median(incremental) * 1000:7.1f} ms")
+
+def bench_own_saves(path, saves):
+    watcher = streamdeck.CONFIG_WATCHER = streamdeck.ConfigWatcher(path)
+    writer = streamdeck.CONFIG_WRITER = streamdeck.ConfigWriter(path, debounce=0)
+    for i in range(saves):
+        streamdeck.set_active_profile(f"P{i % 10}"); streamdeck.save_config(); writer.flush()
+        time.sleep(0.01)
+    time.sleep(streamdeck.CONFIG_SETTLE + streamdeck.CONFIG_POLL_INTERVAL)
+    writer.close(); watcher.close()
+    streamdeck.CONFIG_WATCHER = streamdeck.CONFIG_WRITER = None
+    stats = watcher.stats()
+    print(f"  own saves: {writer.writes} writes, {stats['reloads']} reloads, {stats['ignored_own_writes']} recognised as our own")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--saves", type=int, default=50)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = streamdeck.CONFIG_FILE = os.path.join(tmp, "config.json")
+        config = make_config(args.profiles)
+        write_externally(path, config)
+        streamdeck.load_config()
+        print(f"{args.profiles} profiles:")
+        bench_detection(path, config, True, args.rounds)
+        bench_detection(path, config, False, args.rounds)
+        bench_apply(path, config, args.rounds)
+        bench_own_saves(path, args.saves)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: frame render time while cycling profiles, with and without the text cache.
+
+Runs the real DeckRenderer on SDL's dummy video driver, so no window or
+display is needed. Every frame switches to the next of --profiles profiles,
+each with its own button labels, and draws. That is the worst case for the
+renderer, because every tile and the header have to be rebuilt. Frame times
+are reported for:
+
+* legacy:    the old tile code, which filled, drew and rasterized every part
+             of every tile, the number and "Edit" included, on every rebuild
+* no cache:  tiles start from a prebuilt plate, but labels are rasterized
+             with Font.render on every rebuild
+* cache:     labels also come from the shared TextCache (text_cache_kb default)
+* small:     the cache capped at --small-kb, too small for all the labels,
+             to show what eviction costs
+
+Usage:
+    python benchmarks/bench_render.py [--profiles N] [--frames F] [--small-kb K]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+def make_config(profiles):
+    config = {"settings": {"active_profile": "Profile 0", "log_level": "WARNING"}, "profiles": {}}
+    for p in range(profiles):
+        config["profiles"][f"Profile {p}"] = {
+            **{f"BUTTON_{i}_PRESS": {"type": "keystroke", "value": f"ctrl+alt+{p}{i}"} for i in range(1, 10)},
+            **{f"BUTTON_{i}_HOLD": {"type": "typetext", "value": f"snippet {p}.{i}"} for i in range(1, 10)}}
+    return config
+
+class LegacyRenderer(streamdeck.DeckRenderer):
+    """DeckRenderer with the tile code as it was before the text cache."""
+    def _render_tile(self, btn_num, flashing, profile):
+        pygame = streamdeck.pygame; small, title, text = streamdeck.SMALL_FONT, streamdeck.TITLE_FONT, streamdeck.COLOR_TEXT
+        tile = pygame.Surface(self.TILE_SIZE)
+        tile.fill(streamdeck.COLOR_BACKGROUND)
+        pygame.draw.rect(tile, streamdeck.COLOR_BUTTON_FLASH if flashing else streamdeck.COLOR_BUTTON, (0, 0, 110, 110), border_radius=10)
+        tile.blit(title.render(str(btn_num), True, text), (10, 5))
+        press_action, hold_action = profile.bindings[btn_num]
+        tile.blit(small.render(f"Press: {press_action.label}", True, text), (10, 45))
+        tile.blit(small.render(f"Hold: {hold_action.label}", True, text), (10, 75))
+        edit_rect = pygame.Rect(0, 115, 110, 25)
+        pygame.draw.rect(tile, streamdeck.COLOR_EDIT_BUTTON, edit_rect, border_radius=5)
+        edit_surf = small.render("Edit", True, text)
+        tile.blit(edit_surf, (edit_rect.centerx - edit_surf.get_width() // 2, edit_rect.centery - edit_surf.get_height() // 2))
+        return tile
+
+def run(label, cache, names, frames, renderer_class=streamdeck.DeckRenderer):
+    streamdeck.TEXT_CACHE = cache
+    renderer = streamdeck.RENDERER = renderer_class(streamdeck.SCREEN)
+    renderer.draw()
+    times = []
+    for frame in range(frames):
+        streamdeck.set_active_profile(names[frame % len(names)])
+        start = time.perf_counter(); renderer.draw(); times.append((time.perf_counter() - start) * 1000)
+        streamdeck.pygame.event.clear()
+    times.sort()
+    line = f"  {label:<16} frame p50 {statistics.median(times):6.3f} ms   p99 {times[int(len(times) * 0.99)]:6.3f} ms"
+    if cache: line += "   " + "   ".join(f"{key} {value}" for key, value in cache.stats().items())
+    print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=2, help="profiles to cycle through")
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--small-kb", type=int, default=16)
+    args = parser.parse_args()
+    streamdeck.CONFIG = make_config(args.profiles)
+    streamdeck.set_log_level("WARNING")
+    streamdeck.compile_config()
+    streamdeck.init_pygame()
+    names = list(streamdeck.CONFIG["profiles"])
+    print(f"cycling {len(names)} profiles, {args.frames} frames ({os.environ['SDL_VIDEODRIVER']} video driver)")
+    run("legacy", None, names, args.frames, LegacyRenderer)
+    run("no cache", None, names, args.frames)
+    run("cache", streamdeck.TextCache(streamdeck.TEXT_CACHE_KB * 1024), names, args.frames)
+    run(f"cache {args.small_kb} KB", streamdeck.TextCache(args.small_kb * 1024), names, args.frames)
+    streamdeck.pygame.quit()
+
+if __name__ == "__main__":
+    main()
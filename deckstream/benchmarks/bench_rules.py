@@ -0,0 +1,102 @@
+"""
+Benchmark: automation rule matching.
+
+Builds rule sets of increasing size and times how long one lookup of the
+foreground window takes. Most rules are exact process names, as the old
+"automation" dict held. One in ten is a title rule for one of those
+programs ("the Chrome tab called ..."), and a few are glob and regex rules
+on the process name or the title. Four lookups are timed for each size:
+
+* exact:    a program with an exact-name rule (dict lookup)
+* title:    a program with title rules (one regex over that program's titles)
+* pattern:  a program only the glob/regex rules can match (one combined regex)
+* cached:   any of the above, repeated, so it comes from the result cache
+
+Uncached lookups are not flat: the "pattern" cost grows with the number of
+glob/regex rules that are not tied to one program, and so do "exact" and
+"title" whenever such a rule has a higher priority than the exact match,
+because it has to be ruled out first (here the title regexes have priority 2).
+The watcher only asks again when the window or its title changes, and
+repeated windows hit the cache. Every answer is checked and wrong ones are
+reported.
+
+A naive matcher, which tries every rule in priority order with fnmatch and
+re.search, is timed for comparison.
+
+Usage:
+    python benchmarks/bench_rules.py [--sizes 10,100,1000,10000] [--lookups N]
+"""
+import argparse
+import fnmatch
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+def build_config(size):
+    exact = {f"app{i}.exe": f"P{i % 50}" for i in range(size * 8 // 10)}
+    rules = [{"exe": f"app{i}.exe", "title": f"*document {i}*", "match": "glob", "priority": 1, "profile": "Docs"}
+             for i in range(size // 10)]
+    for i in range(size - len(exact) - len(rules)):
+        if i % 2: rules.append({"exe": f"tool{i}-*", "match": "glob", "profile": f"P{i % 50}"})
+        else: rules.append({"title": f"project {i} - (editor|viewer)$", "match": "regex", "priority": 2, "profile": "Edit"})
+    return {"settings": {}, "profiles": {}, "automation": exact, "automation_rules": rules}
+
+def naive_match(rules, exe, title):
+    """Tries every rule in priority order, as a straightforward implementation would."""
+    exe = exe.lower()
+    for priority, order, profile, kind, rule_exe, rule_title in rules:
+        ok = True
+        for pattern, value in ((rule_exe, exe), (rule_title, title)):
+            if pattern is None: continue
+            if kind == "exact": ok = pattern.lower() == value.lower()
+            elif kind == "glob": ok = fnmatch.fnmatch(value.lower(), pattern.lower())
+            else: ok = re.search(pattern, value, re.IGNORECASE) is not None
+            if not ok: break
+        if ok: return profile
+    return None
+
+def timed(lookup, queries, lookups):
+    start = time.perf_counter()
+    for i in range(lookups): lookup(*queries[i % len(queries)])
+    return (time.perf_counter() - start) / lookups * 1e6
+
+def bench(size, lookups):
+    config = build_config(size)
+    generic = len(config["automation_rules"]) - size // 10   # tool{i}-* rules exist for odd i below this
+    start = time.perf_counter(); matcher = streamdeck.AutomationMatcher(streamdeck.automation_rules(config)); build = (time.perf_counter() - start) * 1000
+    queries = {
+        "exact": [(f"app{i}.exe", "Untitled") for i in range(size // 10, size * 8 // 10, 7) or [0]],
+        "title": [(f"app{i}.exe", f"Report - document {i} - Writer") for i in range(size // 10 or 1)],
+        "pattern": [(f"tool{i}-x64", "Main") for i in range(1, size // 5, 2) or [1]],
+    }
+    expected = {"exact": lambda exe: f"P{int(exe[3:-4]) % 50}", "title": lambda exe: "Docs", "pattern": lambda exe: f"P{int(exe[4:-4]) % 50}" if int(exe[4:-4]) < generic else None}
+    row = [f"{size:>6} rules   build {build:8.2f} ms"]
+    for name, batch in queries.items():
+        # Every query gets a distinct title, so none of them can come from the cache.
+        batch = [(exe, f"{title} {n}") for n, (exe, title) in enumerate(batch * (lookups // len(batch) + 1))][:lookups]
+        cost = timed(matcher.match, batch, len(batch))
+        wrong = sum(matcher.match(exe, title) != expected[name](exe) for exe, title in batch)
+        if wrong: row.append(f"{name} {wrong} WRONG")
+        row.append(f"{name} {cost:7.2f} us")
+    warm = queries["exact"][:8] + queries["title"][:8] + queries["pattern"][:8]
+    for query in warm: matcher.match(*query)
+    row.append(f"cached {timed(matcher.match, warm, lookups):5.2f} us")
+    rules = sorted(streamdeck.automation_rules(config), key=lambda rule: (-rule[0], rule[1]))
+    naive_lookups = max(1, min(lookups, 200_000 // size))
+    row.append(f"naive {timed(lambda exe, title: naive_match(rules, exe, title), queries['pattern'], naive_lookups):10.1f} us")
+    print("   ".join(row))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="comma separated rule counts")
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+    streamdeck.set_log_level("WARNING")
+    for size in (int(size) for size in args.sizes.split(",")): bench(size, args.lookups)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Benchmark: serial reader latency and throughput.
+
+Feeds binary event frames through a fake serial port into SerialReader and
+measures the time from writing a frame to its event being handed to the
+dispatcher (paced latency), and how many events per second the reader can
+sustain when frames arrive back to back. The old readline()-based loop is
+measured on text lines for comparison.
+
+Uses pyserial's loop:// by default; --pty uses a pseudo-terminal instead,
+which also exercises opening the port (Linux/macOS only).
+
+Usage:
+    python benchmarks/bench_serial.py [--events N] [--pty]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import serial
+import streamdeck
+
+class Sink:
+    """Collects the arrival time of every dispatched event."""
+    def __init__(self, expected):
+        self.expected = expected
+        self.arrivals = []
+        self.done = threading.Event()
+
+    def __call__(self, button, kind, trace=None):
+        self.arrivals.append(time.perf_counter_ns())
+        if len(self.arrivals) >= self.expected: self.done.set()
+
+def open_port(use_pty):
+    """Returns (write_function, port_for_reader_or_None, serial_for_loop_or_None)."""
+    if use_pty:
+        import pty, tty
+        master, slave = pty.openpty(); tty.setraw(slave)
+        return (lambda data: os.write(master, data)), os.ttyname(slave), None
+    ser = serial.serial_for_url("loop://", timeout=streamdeck.SERIAL_READ_TIMEOUT)
+    return ser.write, None, ser
+
+def run_reader(sink, use_pty):
+    """Starts a SerialReader on its own event loop thread. Returns (write, reader, stop)."""
+    write, port, ser = open_port(use_pty)
+    reader = streamdeck.SerialReader(port or "loop://", streamdeck.BAUDRATE, sink, lambda: True)
+    loop = asyncio.new_event_loop()
+    task = loop.create_task(reader.pump_async(ser) if ser else reader.run_async())
+    thread = threading.Thread(target=loop.run_until_complete, args=(asyncio.wait([task]),), daemon=True)
+    thread.start()
+    if port: time.sleep(0.2)   # let the reader open the pty
+    def stop(): loop.call_soon_threadsafe(task.cancel); thread.join(1)
+    return write, reader, stop
+
+def bench_latency(events, use_pty):
+    sink = Sink(events)
+    write, reader, stop = run_reader(sink, use_pty)
+    sent = []
+    for seq in range(events):
+        frame = streamdeck.encode_frame(seq % 9 + 1, streamdeck.PRESS, seq, seq)
+        sent.append(time.perf_counter_ns()); write(frame)
+        time.sleep(0.001)
+    sink.done.wait(5); stop()
+    latencies = sorted((a - s) / 1000 for s, a in zip(sent, sink.arrivals))
+    return {"events": len(latencies), "p50_us": round(statistics.median(latencies), 1),
+            "p99_us": round(latencies[int(len(latencies) * 0.99) - 1], 1), "max_us": round(latencies[-1], 1)}
+
+def bench_throughput(events, use_pty):
+    sink = Sink(events)
+    payload = b"".join(streamdeck.encode_frame(seq % 9 + 1, streamdeck.PRESS, seq, seq) for seq in range(events))
+    write, reader, stop = run_reader(sink, use_pty)
+    start = time.perf_counter()
+    for offset in range(0, len(payload), 4096): write(payload[offset:offset + 4096])
+    sink.done.wait(30); elapsed = time.perf_counter() - start
+    stop()
+    return {"events": len(sink.arrivals), "events_per_sec": round(len(sink.arrivals) / elapsed), "reads": reader.reads}
+
+def bench_legacy_readline(events):
+    """The pre-SerialReader loop: readline() on text lines with a 1s timeout."""
+    ser = serial.serial_for_url("loop://", timeout=1)
+    payload = b"".join(f"BUTTON_{seq % 9 + 1}_PRESS\r\n".encode() for seq in range(events))
+    start = time.perf_counter(); handled = 0
+    # loop:// has a bounded buffer, so the writer has to run alongside the reader.
+    threading.Thread(target=ser.write, args=(payload,), daemon=True).start()
+    while handled < events:
+        line = ser.readline().decode("utf-8", errors="ignore").strip()
+        if streamdeck.SERIAL_EVENTS.get(line): handled += 1
+    return {"events": handled, "events_per_sec": round(handled / (time.perf_counter() - start))}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--pty", action="store_true", help="use a pseudo-terminal instead of loop://")
+    args = parser.parse_args()
+    streamdeck.set_log_level("OFF")   # keep log output out of the measurement
+    print("paced latency:      ", bench_latency(min(args.events, 1000), args.pty))
+    print("sustained:          ", bench_throughput(args.events * 10, args.pty))
+    print("legacy readline():  ", bench_legacy_readline(args.events * 10))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: startup cost of the host application.
+
+Measures two things:
+
+* Import time of `streamdeck` (from `python -X importtime`), next to the time
+  it takes to import the heavy libraries it used to load eagerly (pygame,
+  tkinter, pyautogui, pyserial, psutil, pywin32), and the slowest modules
+  that are still imported up front.
+* Time to first handled press: spawns `streamdeck.py --headless` against a
+  pseudo-terminal and a throwaway config that binds button 1 to a zero delay,
+  then writes press frames until the delay action reports that it ran
+  (Linux/macOS only).
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--top K]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import streamdeck
+
+EAGER_IMPORTS = ["pygame", "tkinter", "tkinter.ttk", "tkinter.filedialog", "tkinter.simpledialog", "tkinter.messagebox",
+                 "webbrowser", "pyautogui", "serial", "serial.tools.list_ports", "psutil", "win32gui", "win32process"]
+
+def importtime(code):
+    """Runs `code` in a fresh interpreter and returns [(module, self_us, cumulative_us)] in import order."""
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line: continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def eager_code():
+    lines = [f"try: import {name}\nexcept Exception: pass" for name in EAGER_IMPORTS]
+    return "\n".join(lines)
+
+def bench_imports(runs, top):
+    lazy, eager = [], []
+    for _ in range(runs):
+        rows = importtime("import streamdeck")
+        lazy.append(sum(row[1] for row in rows) / 1000)
+        eager.append(sum(row[1] for row in importtime(eager_code())) / 1000)
+    print(f"import streamdeck:          {statistics.median(lazy):8.1f} ms (median of {runs})")
+    print(f"eager UI/serial/OS imports: {statistics.median(eager):8.1f} ms (what the old top-level imports added)")
+    available = [name for name in EAGER_IMPORTS if streamdeck.module_available(name.split(".")[0])]
+    print(f"  available here: {', '.join(available) or 'none'}")
+    print("slowest modules still imported by streamdeck (self time):")
+    for name, self_us, _ in sorted(rows, key=lambda row: -row[1])[:top]:
+        print(f"  {name:<32} {self_us / 1000:7.2f} ms")
+
+def write_config(path, port):
+    profile = {"BUTTON_1_PRESS": {"type": "delay", "value": "0"}}
+    config = {"settings": {"arduino_port": port, "active_profile": "Default", "automation_enabled": False},
+              "profiles": {"Default": profile}, "automation": {}}
+    with open(path, "w") as f: json.dump(config, f)
+
+def first_press(timeout=30.0):
+    """Returns seconds from spawning the headless daemon to the first handled press, or None on timeout."""
+    import pty, tty
+    master, slave = pty.openpty(); tty.setraw(slave)
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "config.json")
+        write_config(config_path, os.ttyname(slave))
+        env = dict(os.environ, PYTHONUNBUFFERED="1")
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "streamdeck.py"), "--headless", "--config", config_path],
+                                cwd=tmp, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        handled = threading.Event()
+        def watch_output():
+            for line in proc.stdout:
+                if "Action: Delaying" in line: handled.set()
+        threading.Thread(target=watch_output, daemon=True).start()
+        seq = 0
+        while not handled.is_set() and time.perf_counter() - start < timeout and proc.poll() is None:
+            os.write(master, streamdeck.encode_frame(1, streamdeck.PRESS, seq, seq))
+            seq += 1
+            handled.wait(0.002)
+        elapsed = time.perf_counter() - start if handled.is_set() else None
+        proc.terminate()
+        try: proc.wait(timeout=5)
+        except subprocess.TimeoutExpired: proc.kill(); proc.wait()
+    os.close(master); os.close(slave)
+    return elapsed
+
+def bench_first_press(runs):
+    if os.name != "posix":
+        print("time to first handled press: skipped (needs a pseudo-terminal)")
+        return
+    times = [first_press() for _ in range(runs)]
+    done = [t * 1000 for t in times if t is not None]
+    if not done:
+        print("time to first handled press: timed out")
+        return
+    print(f"time to first handled press (headless): median {statistics.median(done):.0f} ms, "
+          f"min {min(done):.0f} ms, max {max(done):.0f} ms ({len(done)}/{runs} runs)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="number of slow modules to list")
+    args = parser.parse_args()
+    bench_imports(args.runs, args.top)
+    bench_first_press(args.runs)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: text injection throughput and correctness.
+
+Runs typetext and keystroke actions through each text backend against a fake
+keyboard and clipboard, and reports characters (or hotkeys) per second. The
+fake keyboard honours pyautogui's timing: `interval` sleeps between
+characters, and every call that does not pass `_pause=False` sleeps
+pyautogui.PAUSE (0.1s) afterwards, just like the real library, and each key
+event costs --key-us microseconds of busy time (the OS call). It also plays
+the part of the focused app: Ctrl+V inserts the clipboard. After each run the
+typed text and the restored clipboard are checked.
+
+The old path, pyautogui.write(text, interval=0.01), is shown as "legacy".
+Paced modes are timed on at most --paced-chars characters, since their rate
+does not depend on the length.
+
+Finally the RecordingBackend is used to check which backend "auto" picks for
+each length, with no keyboard at all.
+
+Usage:
+    python benchmarks/bench_typing.py [--sizes 64,512,2048] [--hotkeys N] [--key-us US]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+PAUSE = 0.1   # pyautogui.PAUSE default
+KEY_COST = 100e-6
+
+def key_event():
+    end = time.perf_counter() + KEY_COST
+    while time.perf_counter() < end: pass
+
+class FakeKeyboard:
+    """Stands in for pyautogui; collects what the focused app would receive."""
+    def __init__(self, clipboard):
+        self.clipboard = clipboard
+        self.typed = []
+        self.hotkeys = 0
+
+    def write(self, text, interval=0.0, _pause=True, **kwargs):
+        for char in text:
+            self.typed.append(char); key_event()
+            if interval: time.sleep(interval)
+        if _pause: time.sleep(PAUSE)
+
+    def hotkey(self, *keys, _pause=True, **kwargs):
+        self.hotkeys += 1
+        for _ in keys: key_event()
+        if keys == streamdeck.PASTE_KEYS: self.typed.append(self.clipboard.text)
+        if _pause: time.sleep(PAUSE)
+
+class FakeClipboard:
+    def __init__(self, text=""): self.text = text
+    def copy(self, text): self.text = text
+    def paste(self): return self.text
+
+def install(previous_clipboard="user's clipboard"):
+    clipboard = FakeClipboard(previous_clipboard)
+    keyboard = FakeKeyboard(clipboard)
+    streamdeck.pyautogui = keyboard; streamdeck.pyperclip = clipboard
+    return keyboard, clipboard
+
+def sample_text(size):
+    line = "The quick brown fox jumps over the lazy dog 0123456789.\n"
+    return (line * (size // len(line) + 1))[:size]
+
+def run_text(mode, text):
+    """Types `text` in `mode`; returns (chars/sec, correct)."""
+    keyboard, clipboard = install()
+    start = time.perf_counter()
+    if mode == "legacy": keyboard.write(text, interval=0.01)
+    else: streamdeck.compile_action({"type": "typetext", "value": text, "backend": mode}).run()
+    elapsed = time.perf_counter() - start
+    correct = "".join(keyboard.typed) == text and clipboard.text == "user's clipboard"
+    return len(text) / elapsed, correct
+
+def run_hotkeys(mode, count):
+    keyboard, _ = install()
+    action = streamdeck.compile_action({"type": "keystroke", "value": "ctrl+shift+esc"})
+    start = time.perf_counter()
+    for _ in range(count):
+        if mode == "legacy": keyboard.hotkey("ctrl", "shift", "esc")
+        else: action.run()
+    return count / (time.perf_counter() - start), keyboard.hotkeys == count
+
+def check_auto(sizes):
+    recorder = streamdeck.TEXT_BACKEND_OVERRIDE = streamdeck.RecordingBackend()
+    try:
+        for size in sizes:
+            action = streamdeck.compile_action({"type": "typetext", "value": sample_text(size)})
+            action.run()
+            print(f"  auto, {size:>5} chars -> {action.backend}")
+        ok = recorder.text() == "".join(sample_text(size) for size in sizes)
+        print(f"  recorded text matches: {ok}")
+    finally:
+        streamdeck.TEXT_BACKEND_OVERRIDE = None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="64,512,2048", help="comma separated text lengths")
+    parser.add_argument("--paced-chars", type=int, default=256, help="longest text timed in the paced modes")
+    parser.add_argument("--hotkeys", type=int, default=20)
+    parser.add_argument("--key-us", type=float, default=100, help="simulated cost of one key event in microseconds")
+    args = parser.parse_args()
+    global KEY_COST
+    KEY_COST = args.key_us / 1e6
+    sizes = [int(size) for size in args.sizes.split(",")]
+    streamdeck.CONFIG = {"settings": {}}
+    streamdeck.set_log_level("WARNING")
+    print("typetext (chars/sec):")
+    for size in sizes:
+        for mode in ("legacy", "pyautogui", "bulk", "paste"):
+            length = min(size, args.paced_chars) if mode in ("legacy", "pyautogui") else size
+            rate, correct = run_text(mode, sample_text(length))
+            print(f"  {size:>5} chars  {mode:<10} {rate:12.0f}   {'ok' if correct else 'MISMATCH'}"
+                  f"   est. {size / rate * 1000:8.1f} ms")
+    print("keystroke (hotkeys/sec):")
+    for mode in ("legacy", "bulk"):
+        rate, correct = run_hotkeys(mode, args.hotkeys)
+        print(f"  {mode:<10} {rate:10.0f}   {'ok' if correct else 'MISMATCH'}")
+    print("backend selection:")
+    check_auto(sizes)
+
+if __name__ == "__main__":
+    main()
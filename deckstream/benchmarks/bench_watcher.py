@@ -0,0 +1,75 @@
+"""
+Benchmark: automatic profile switch latency and watcher cost.
+
+Drives profile_watcher with the ScriptedWindowProvider, alt-tabbing between
+a few mapped applications at random intervals, and measures the time from
+each focus change to the profile switch landing. Three watcher setups are
+compared:
+
+    legacy    fixed 2s polling and no push; the old watcher also looked up
+              the process name on every poll, so its lookups equal its polls
+    adaptive  fast polling after activity, slow when idle
+    push      provider pushes focus changes (Win32 WinEvent hook / X11 PropertyNotify)
+
+Watcher-thread CPU, polls and process-name lookups are extrapolated to one hour.
+
+Usage:
+    python benchmarks/bench_watcher.py [--switches N]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+APPS = [(1001, "code.exe", "Coding"), (1002, "chrome.exe", "Browsing"), (1003, "obs64.exe", "Streaming")]
+
+def setup_config():
+    streamdeck.CONFIG = {"settings": {"automation_enabled": True, "active_profile": "Default"},
+                         "profiles": {"Default": {}, **{profile: {} for _, _, profile in APPS}},
+                         "automation": {exe: profile for _, exe, profile in APPS}}
+    streamdeck.compile_config()
+
+def run_mode(name, switches, rng):
+    saved = (streamdeck.WATCHER_FAST_INTERVAL, streamdeck.WATCHER_SLOW_INTERVAL, streamdeck.WATCHER_FAST_PERIOD)
+    if name == "legacy": streamdeck.WATCHER_FAST_INTERVAL = streamdeck.WATCHER_SLOW_INTERVAL = 2.0
+    provider = streamdeck.ScriptedWindowProvider(supports_push=(name == "push"))
+    streamdeck.WINDOW_PROVIDER = provider
+    setup_config(); provider.focus(999, "explorer.exe")
+    streamdeck.RUN_THREADS = True; streamdeck.WATCHER_WAKE.clear(); streamdeck.WATCHER_FAST_UNTIL = 0.0
+    watcher = threading.Thread(target=streamdeck.profile_watcher, daemon=True); watcher.start()
+    time.sleep(0.2)
+    latencies = []; wall_start = time.monotonic()
+    for i in range(switches):
+        pid, exe, profile = APPS[i % len(APPS)]
+        time.sleep(rng.uniform(0.5, 3.0))   # user works in the current app for a while
+        changed = time.perf_counter(); provider.focus(pid, exe)
+        while streamdeck.ACTIVE_PROFILE.name != profile: time.sleep(0.001)
+        latencies.append((time.perf_counter() - changed) * 1000)
+    wall = time.monotonic() - wall_start
+    streamdeck.RUN_THREADS = False; streamdeck.WATCHER_WAKE.set(); watcher.join(3)
+    stats = streamdeck.WATCHER_STATS
+    lookups = stats["polls"] if name == "legacy" else provider.name_lookups
+    streamdeck.WATCHER_FAST_INTERVAL, streamdeck.WATCHER_SLOW_INTERVAL, streamdeck.WATCHER_FAST_PERIOD = saved
+    per_hour = 3600 / wall
+    return {"mode": name, "p50_ms": round(statistics.median(latencies), 1), "max_ms": round(max(latencies), 1),
+            "polls_per_hour": round(stats["polls"] * per_hour),
+            "name_lookups_per_hour": round(lookups * per_hour),
+            "watcher_cpu_seconds_per_hour": round(stats["cpu_seconds"] * per_hour, 2)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--switches", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    streamdeck.set_log_level("WARNING")
+    for mode in ("legacy", "adaptive", "push"):
+        print(run_mode(mode, args.switches, random.Random(args.seed)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Record/replay harness and headless benchmark suite for the whole pipeline.
+
+Replays a serial recording (made with `python streamdeck.py --record FILE`)
+or a synthetic event stream into the real SerialReader -> handle_button_event
+-> ActionExecutor path, while the main thread renders the UI under SDL's
+dummy video driver. pyautogui, the clipboard, subprocess and webbrowser are
+swapped for recording fakes, so nothing is typed or launched and no display,
+device or Windows desktop is needed.
+
+Results (events/sec, latency percentiles per stage and action type, frame
+times, memory growth) are written as JSON so runs can be compared between
+versions with --compare.
+
+Usage:
+    python benchmarks/harness.py synth rec.jsonl [--events N] [--rate HZ]
+    python benchmarks/harness.py replay rec.jsonl [--speed X] [--pty] [--config FILE]
+                                 [--output results.json] [--compare old.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import serial
+import streamdeck
+
+RESULTS_SCHEMA = 1
+
+# --- Recording Fakes ---
+class CallLog:
+    """Shared, thread-safe log of every call made to the fakes."""
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def record(self, name, *args):
+        with self._lock: self.calls.append((time.perf_counter_ns(), name, args))
+
+    def counts(self):
+        counts = {}
+        for _, name, _ in self.calls: counts[name] = counts.get(name, 0) + 1
+        return counts
+
+class FakePyAutoGUI:
+    def __init__(self, log): self.log = log
+    def hotkey(self, *keys, **kwargs): self.log.record("hotkey", keys)
+    def write(self, text, interval=0.0, **kwargs): self.log.record("write", text)
+    def press(self, key, **kwargs): self.log.record("press", key)
+
+class FakeClipboard:
+    def __init__(self, log): self.log = log; self.text = ""
+    def copy(self, text): self.log.record("copy", len(text)); self.text = text
+    def paste(self): return self.text
+
+class FakeProcess:
+    _next_pid = 100000
+
+    def __init__(self, args):
+        FakeProcess._next_pid += 1
+        self.pid = FakeProcess._next_pid
+        self.args = args
+        self.returncode = 0
+
+    def poll(self): return self.returncode
+    def wait(self, timeout=None): return self.returncode
+
+class FakeSubprocess:
+    def __init__(self, log): self.log = log
+    def Popen(self, args, *a, **kwargs): self.log.record("popen", args); return FakeProcess(args)
+
+class FakeWebbrowser:
+    def __init__(self, log): self.log = log
+    def open(self, url, *a, **kwargs): self.log.record("open", url); return True
+
+def install_fakes():
+    """Replaces streamdeck's automation backends with recording fakes and returns their shared CallLog."""
+    log = CallLog()
+    streamdeck.pyautogui = FakePyAutoGUI(log)
+    streamdeck.pyperclip = FakeClipboard(log)
+    streamdeck.subprocess = FakeSubprocess(log)
+    streamdeck.webbrowser = FakeWebbrowser(log)
+    return log
+
+# --- Recordings ---
+def load_recording(path):
+    with open(path) as f: return [(float(r["t"]), bytes.fromhex(r["hex"])) for r in map(json.loads, f) if r]
+
+def synthesize(path, events, rate, seed=1):
+    """Writes a recording of `events` binary frames on random buttons at `rate` events/sec."""
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        for seq in range(events):
+            kind = streamdeck.HOLD if rng.random() < 0.1 else streamdeck.PRESS
+            frame = streamdeck.encode_frame(rng.randint(1, 9), kind, seq, int(seq * 1000 / rate))
+            f.write(json.dumps({"t": round(seq / rate, 6), "hex": frame.hex()}) + "\n")
+
+def default_config():
+    """A two-profile config that exercises every action type without real side effects."""
+    profile = {
+        "BUTTON_1_PRESS": {"type": "keystroke", "value": "ctrl+c"},
+        "BUTTON_2_PRESS": {"type": "keystroke", "value": "ctrl+shift+esc"},
+        "BUTTON_3_PRESS": {"type": "typetext", "value": "Hello from the harness!"},
+        "BUTTON_4_PRESS": {"type": "link", "value": "https://example.com"},
+        "BUTTON_5_PRESS": {"type": "exe", "value": "calc.exe"},
+        "BUTTON_6_PRESS": {"type": "macro", "value": [{"type": "keystroke", "value": "ctrl+a"}, {"type": "delay", "value": "5"}, {"type": "typetext", "value": "done"}]},
+        "BUTTON_7_PRESS": {"type": "typetext", "value": "x" * 200},
+        "BUTTON_8_PRESS": {"type": "keystroke", "value": "alt+tab"},
+        "BUTTON_9_HOLD": {"type": "switch_profile", "value": "next"},
+    }
+    return {"settings": {"log_level": "WARNING"}, "profiles": {"Bench A": profile, "Bench B": dict(profile)}, "automation": {}}
+
+# --- Replay ---
+def percentiles(values):
+    if not values: return {"count": 0}
+    values = sorted(values)
+    pick = lambda pct: values[min(len(values) - 1, int(len(values) * pct / 100))]
+    return {"count": len(values), "p50_ms": round(pick(50), 3), "p90_ms": round(pick(90), 3), "p99_ms": round(pick(99), 3), "max_ms": round(values[-1], 3)}
+
+def open_feed(use_pty):
+    """Returns (write, start_reader, stop_reader) for either loop:// or a pty that the real SerialHub opens with its SerialReader."""
+    if use_pty:
+        import pty, tty
+        master, slave = pty.openpty(); tty.setraw(slave)
+        streamdeck.ARDUINO_PORT = os.ttyname(slave)
+        def start():
+            streamdeck.RUN_THREADS = True
+            streamdeck.start_serial_hub()
+            deadline = time.monotonic() + 5
+            while not (streamdeck.SERIAL_READER and streamdeck.SERIAL_READER.connected_port) and time.monotonic() < deadline: time.sleep(0.01)
+            return streamdeck.SERIAL_HUB.thread
+        def stop(): streamdeck.SERIAL_HUB.close(); streamdeck.SERIAL_HUB = None
+        return (lambda data: os.write(master, data)), start, stop
+    ser = serial.serial_for_url("loop://", timeout=streamdeck.SERIAL_READ_TIMEOUT)
+    loop = asyncio.new_event_loop(); task = []
+    def start():
+        streamdeck.SERIAL_READER = streamdeck.SerialReader("loop://", streamdeck.BAUDRATE, streamdeck.handle_button_event, lambda: True)
+        task.append(loop.create_task(streamdeck.SERIAL_READER.pump_async(ser)))
+        thread = threading.Thread(target=loop.run_until_complete, args=(asyncio.wait(task),), daemon=True); thread.start()
+        return thread
+    def stop(): loop.call_soon_threadsafe(task[0].cancel)
+    return ser.write, start, stop
+
+def replay(records, speed=1.0, use_pty=False, draw=True):
+    """Feeds `records` through the pipeline and returns a results dict."""
+    write, start_reader, stop_reader = open_feed(use_pty)
+    tracemalloc.start()
+    mem_before = tracemalloc.get_traced_memory()[0]
+    dicts_before = {"FLASH_ANIMATIONS": len(streamdeck.FLASH_ANIMATIONS), "LAST_ACTION_TIME": len(streamdeck.LAST_ACTION_TIME)}
+    reader_thread = start_reader()
+
+    def feed():
+        begin = time.perf_counter()
+        for t, data in records:
+            delay = begin + t / speed - time.perf_counter()
+            if delay > 0: time.sleep(delay)
+            write(data)
+    writer = threading.Thread(target=feed, daemon=True)
+    frame_ms = []
+    started = time.perf_counter(); writer.start()
+    while writer.is_alive():
+        if draw:
+            drawn = streamdeck.RENDERER.frames_drawn; t0 = time.perf_counter()
+            streamdeck.draw_ui()
+            if streamdeck.RENDERER.frames_drawn != drawn: frame_ms.append((time.perf_counter() - t0) * 1000)
+            streamdeck.pygame.event.wait(min(streamdeck.RENDERER.next_timeout(), 50)); streamdeck.pygame.event.get()
+        else: writer.join(0.05)
+    fed = time.perf_counter() - started
+    total_bytes = sum(len(data) for _, data in records)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        stats = streamdeck.EXECUTOR.stats()
+        if streamdeck.SERIAL_READER.bytes_read >= total_bytes and stats["depth"] == 0 and stats["running"] == 0: break
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    stop_reader(); reader_thread.join(1)
+    mem_after, mem_peak = tracemalloc.get_traced_memory(); tracemalloc.stop()
+
+    reader, executor, latency = streamdeck.SERIAL_READER.stats(), streamdeck.EXECUTOR.stats(), streamdeck.STATS.snapshot()
+    return {
+        "events": {"chunks_sent": len(records), "decoded": reader["events"], "dispatched": executor["submitted"],
+                   "executed": executor["executed"], "dropped": executor["dropped"], "lost": reader["lost"], "bad_frames": reader["bad_frames"]},
+        "events_per_sec": round(reader["events"] / fed, 1) if fed else 0.0,
+        "elapsed_seconds": round(elapsed, 3),
+        "latency": {"stages": latency["stages"], "by_action": latency["by_action"]},
+        "frames": percentiles(frame_ms) if draw else None,
+        "renderer": streamdeck.RENDERER.stats() if draw else None,
+        "launcher": streamdeck.LAUNCHER.stats(),
+        "memory": {"traced_growth_bytes": mem_after - mem_before, "traced_peak_bytes": mem_peak,
+                   "dict_sizes_before": dicts_before,
+                   "dict_sizes_after": {"FLASH_ANIMATIONS": len(streamdeck.FLASH_ANIMATIONS), "LAST_ACTION_TIME": len(streamdeck.LAST_ACTION_TIME)}},
+    }
+
+def git_version():
+    try: return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError: return None
+
+def flatten(data, prefix=""):
+    flat = {}
+    for key, value in (data or {}).items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict): flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool): flat[name] = value
+    return flat
+
+def compare(old, new):
+    """Prints every numeric metric that changed between two result files."""
+    old_flat, new_flat = flatten(old.get("results")), flatten(new.get("results"))
+    print(f"{'metric':<48} {'old':>14} {'new':>14} {'change':>8}")
+    for name in sorted(set(old_flat) & set(new_flat)):
+        a, b = old_flat[name], new_flat[name]
+        if a == b: continue
+        change = f"{(b - a) / a * 100:+.1f}%" if a else "n/a"
+        print(f"{name:<48} {a:>14} {b:>14} {change:>8}")
+
+def run_replay(args):
+    records = load_recording(args.recording)
+    with tempfile.TemporaryDirectory() as tmp:
+        streamdeck.CONFIG_FILE = os.path.join(tmp, "config.json")
+        if args.config: shutil.copy(args.config, streamdeck.CONFIG_FILE)
+        else:
+            with open(streamdeck.CONFIG_FILE, "w") as f: json.dump(default_config(), f)
+        streamdeck.setup_logging("WARNING")
+        streamdeck.load_config()
+        if args.cooldown is not None: streamdeck.ACTION_COOLDOWN = args.cooldown
+        calls = install_fakes()
+        streamdeck.start_config_writer(); streamdeck.start_executor(); streamdeck.start_launcher()
+        if not args.no_ui: streamdeck.init_pygame()
+        try:
+            results = replay(records, args.speed, args.pty, draw=not args.no_ui)
+        finally:
+            streamdeck.EXECUTOR.shutdown(); streamdeck.LAUNCHER.close(); streamdeck.CONFIG_WRITER.close(); streamdeck.LOG_LISTENER.stop()
+        results["fake_calls"] = calls.counts()
+    report = {"schema": RESULTS_SCHEMA, "version": git_version(), "timestamp": time.time(),
+              "recording": os.path.basename(args.recording), "speed": args.speed, "results": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f: f.write(text + "\n")
+    else: print(text)
+    if args.compare:
+        with open(args.compare) as f: compare(json.load(f), report)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    synth = commands.add_parser("synth", help="write a synthetic recording")
+    synth.add_argument("recording")
+    synth.add_argument("--events", type=int, default=2000)
+    synth.add_argument("--rate", type=float, default=50.0, help="events per second")
+    synth.add_argument("--seed", type=int, default=1)
+    rep = commands.add_parser("replay", help="replay a recording through the pipeline")
+    rep.add_argument("recording")
+    rep.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier (e.g. 10 for 10x)")
+    rep.add_argument("--pty", action="store_true", help="feed a pseudo-terminal through the real SerialHub/SerialReader (Linux/macOS)")
+    rep.add_argument("--config", help="config.json to use (copied, never modified)")
+    rep.add_argument("--cooldown", type=float, help="override ACTION_COOLDOWN, e.g. 0 to dispatch every event")
+    rep.add_argument("--no-ui", action="store_true", help="skip rendering")
+    rep.add_argument("--output", help="write results JSON here instead of stdout")
+    rep.add_argument("--compare", metavar="OLD_RESULTS", help="print metric changes against an earlier results file")
+    args = parser.parse_args()
+    if args.command == "synth": synthesize(args.recording, args.events, args.rate, args.seed)
+    else: run_replay(args)
+
+if __name__ == "__main__":
+    main()
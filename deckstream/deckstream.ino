@@ -1,9 +1,16 @@
 /*
-  ESP32-WROOM-32D Script for Python Communication (v3 - Remapped)
+  ESP32-WROOM-32D Script for Python Communication (v4 - Binary Protocol)
 
   This script detects button presses and holds, then sends a clean,
   machine-readable command over USB serial to the listening Python script.
 
+  *** PROTOCOL ***
+  - Events are sent as fixed 11-byte binary frames (see sendEvent below) with
+    a sequence number, the device's millis() timestamp and a CRC-8 checksum.
+    Nothing is allocated per event.
+  - Set USE_BINARY_PROTOCOL to 0 to send the old "BUTTON_3_HOLD" text lines.
+    The Python script detects either format automatically.
+
   *** LOGIC FIX ***
   - The button mapping has been updated to match user's preferred layout.
   - The state machine prevents a "PRESS" event from firing after a "HOLD".
@@ -23,6 +30,15 @@
 // --- Configuration ---
 const int NUM_BUTTONS = 9;
 const unsigned long holdTime = 1000;   // 1 second to trigger a hold
+const unsigned long BAUD_RATE = 115200; // Must match "baudrate" in the Python config
+#define USE_BINARY_PROTOCOL 1
+
+// --- Binary Frame Layout ---
+const uint8_t FRAME_SYNC = 0xA5;
+const uint8_t FRAME_VERSION = 1;
+const int FRAME_SIZE = 11;
+#define EVENT_PRESS 0
+#define EVENT_HOLD 1
 
 // --- Button Pin Definitions (Remapped) ---
 const int buttonPins[NUM_BUTTONS] = {
@@ -41,6 +57,9 @@ const int buttonPins[NUM_BUTTONS] = {
 byte buttonFSM[NUM_BUTTONS];
 unsigned long buttonPressTime[NUM_BUTTONS];
 
+uint16_t eventSeq = 0;
+uint8_t frame[FRAME_SIZE];
+
 // Define the states for our Finite State Machine (FSM)
 #define STATE_IDLE 0        // Button is up and inactive
 #define STATE_PRESSED 1     // Button is down, awaiting release or hold
@@ -48,7 +67,7 @@ unsigned long buttonPressTime[NUM_BUTTONS];
 
 void setup() {
   // Set the baud rate to match the Python script
-  Serial.begin(9600);
+  Serial.begin(BAUD_RATE);
 
   for (int i = 0; i < NUM_BUTTONS; i++) {
     pinMode(buttonPins[i], INPUT_PULLUP);
@@ -64,6 +83,42 @@ void loop() {
   }
 }
 
+// CRC-8 with polynomial 0x07, matching crc8() in the Python script
+uint8_t crc8(const uint8_t *data, int len) {
+  uint8_t crc = 0;
+  for (int i = 0; i < len; i++) {
+    crc ^= data[i];
+    for (int bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x80) ? (uint8_t)((crc << 1) ^ 0x07) : (uint8_t)(crc << 1);
+    }
+  }
+  return crc;
+}
+
+// Sends one button event. Button numbers are 1-based to match the UI.
+void sendEvent(int button, uint8_t kind) {
+#if USE_BINARY_PROTOCOL
+  unsigned long now = millis();
+  frame[0] = FRAME_SYNC;
+  frame[1] = FRAME_VERSION;
+  frame[2] = (uint8_t)button;
+  frame[3] = kind;
+  frame[4] = (uint8_t)(eventSeq & 0xFF);
+  frame[5] = (uint8_t)(eventSeq >> 8);
+  frame[6] = (uint8_t)(now & 0xFF);
+  frame[7] = (uint8_t)((now >> 8) & 0xFF);
+  frame[8] = (uint8_t)((now >> 16) & 0xFF);
+  frame[9] = (uint8_t)((now >> 24) & 0xFF);
+  frame[10] = crc8(frame + 1, FRAME_SIZE - 2);
+  Serial.write(frame, FRAME_SIZE);
+  eventSeq++;
+#else
+  Serial.print("BUTTON_");
+  Serial.print(button);
+  Serial.println(kind == EVENT_HOLD ? "_HOLD" : "_PRESS");
+#endif
+}
+
 // The robust state machine logic
 void updateButtonState(int i) {
   byte currentState = digitalRead(buttonPins[i]);
@@ -81,15 +136,13 @@ void updateButtonState(int i) {
       // If the button is released from the PRESSED state...
       if (currentState == HIGH) {
         // ...it was released before the hold timer expired. This is a "PRESS" event.
-        String command = "BUTTON_" + String(i + 1) + "_PRESS";
-        Serial.println(command);
+        sendEvent(i + 1, EVENT_PRESS);
         buttonFSM[i] = STATE_IDLE; // Reset to idle
       } 
       // If the hold timer expires while still in the PRESSED state...
       else if (millis() - buttonPressTime[i] > holdTime) {
         // ...this is a "HOLD" event.
-        String command = "BUTTON_" + String(i + 1) + "_HOLD";
-        Serial.println(command);
+        sendEvent(i + 1, EVENT_HOLD);
         buttonFSM[i] = STATE_HELD; // Move to the HELD state
       }
       break;
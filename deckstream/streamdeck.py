@@ -1,40 +1,118 @@
-import pygame
 import sys
 import json
 import os
-import webbrowser
+import shutil
 import subprocess
-import tkinter as tk
-from tkinter import ttk, filedialog, simpledialog, messagebox
-import serial
 import threading
 import time
-import pyautogui
+import logging
+import logging.handlers
+import queue
+import re
+import select
+import shlex
+import struct
+import hashlib
+import signal
+import argparse
+import asyncio
+import functools
+import importlib
+import importlib.util
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+LOG = logging.getLogger("consoledeck")
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access.
+
+    Keeps startup fast: the UI toolkits, pyautogui and the serial/automation
+    backends are only loaded once something actually uses them, so headless
+    mode never pays for pygame or tkinter.
+    """
+
+    def __init__(self, name):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def __getattr__(self, attr):
+        module = self.__dict__["_module"]
+        if module is None: module = self.__dict__["_module"] = importlib.import_module(self.__dict__["_name"])
+        return getattr(module, attr)
+
+def module_available(name):
+    try: return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError): return False
+
+pygame = LazyModule("pygame")
+tk = LazyModule("tkinter")
+ttk = LazyModule("tkinter.ttk")
+filedialog = LazyModule("tkinter.filedialog")
+simpledialog = LazyModule("tkinter.simpledialog")
+messagebox = LazyModule("tkinter.messagebox")
+webbrowser = LazyModule("webbrowser")
+pyautogui = LazyModule("pyautogui")
+pyperclip = LazyModule("pyperclip")
+serial = LazyModule("serial")
+list_ports = LazyModule("serial.tools.list_ports")
 
 # --- New Imports for Profile Automation ---
-try:
-    import win32gui
-    import win32process
-    import psutil
-    AUTOMATION_ENABLED = True
-except ImportError:
-    AUTOMATION_ENABLED = False
-    print("Warning: 'pywin32' and 'psutil' libraries not found. Automatic profile switching is disabled.", flush=True)
-    print("Install them with: pip install pywin32 psutil", flush=True)
+psutil = LazyModule("psutil")
+win32gui = LazyModule("win32gui")
+win32process = LazyModule("win32process")
+HAVE_WIN32 = module_available("win32gui") and module_available("win32process")
+AUTOMATION_ENABLED = module_available("psutil") and (HAVE_WIN32 or sys.platform.startswith("linux"))
+if not AUTOMATION_ENABLED:
+    LOG.warning("'pywin32' and 'psutil' libraries not found. Automatic profile switching is disabled.")
+    LOG.warning("Install them with: pip install pywin32 psutil")
 
 # --- Globals ---
 CONFIG = {}
-ACTIVE_PROFILE_NAME = "Default"
+PROFILE_TABLE = {}
+ACTIVE_PROFILE = None
 ARDUINO_PORT = "COM4"
-BAUDRATE = 9600
+BAUDRATE = 115200
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG_FILE = os.path.join(SCRIPT_DIR, "config.json")
+CONFIG_WRITER = None
+SAVE_DEBOUNCE = 0.5
+CONFIG_WATCHER = None
+STATS_FILE = os.path.join(SCRIPT_DIR, "stats.json")
+STATS_EXPORTER = None
+LOG_LISTENER = None
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "OFF"]
 FONT, SMALL_FONT, TITLE_FONT, SCREEN = None, None, None, None
 FLASH_ANIMATIONS = {}
-SERIAL_THREAD, WATCHER_THREAD = None, None
+WATCHER_THREAD = None
+WINDOW_PROVIDER = None
+WATCHER_WAKE = threading.Event()
+WATCHER_FAST_UNTIL = 0.0
+WATCHER_STATS = {}
+WATCHER_FAST_INTERVAL = 0.1    # seconds between polls right after focus changes or button activity
+WATCHER_SLOW_INTERVAL = 2.0    # seconds between polls when idle
+WATCHER_PUSH_INTERVAL = 10.0   # safety-net poll when the provider pushes focus changes
+WATCHER_FAST_PERIOD = 5.0      # how long to stay fast after activity
+PROCESS_CACHE_SIZE = 64
+SERIAL_READER = None
+SERIAL_HUB = None
+PRIMARY_DECK = "main"
+HUB_IO_WORKERS = 64   # threads for blocking opens, port scans and reads of ports the event loop cannot watch
+SERIAL_RECORDER = None
 RUN_THREADS = True
 LAST_ACTION_TIME = {}
 ACTION_COOLDOWN = 0.5
+EXECUTOR = None
+EXECUTOR_WORKERS = 4
+EXECUTOR_QUEUE_SIZE = 32
+QUEUE_POLICIES = ["drop", "coalesce", "replace"]
+RENDERER = None
+UI_REFRESH_EVENT = None
+TEXT_CACHE = None
+TEXT_CACHE_KB = 4096   # default memory cap for rendered text
+STOP_EVENT = threading.Event()
+IDLE_WAIT_MS = 1000
+FLASH_DURATION_MS = 200
 
 # --- UI Colors ---
 COLOR_BACKGROUND = (30, 30, 30)
@@ -46,8 +124,9 @@ COLOR_EDIT_BUTTON = (60, 60, 60)
 
 def init_pygame():
     """Initializes Pygame, fonts, and the main display window."""
-    global FONT, SMALL_FONT, TITLE_FONT, SCREEN
+    global FONT, SMALL_FONT, TITLE_FONT, SCREEN, RENDERER, UI_REFRESH_EVENT
     pygame.init()
+    UI_REFRESH_EVENT = pygame.event.custom_type()
     try:
         FONT = pygame.font.SysFont("Segoe UI", 20)
         SMALL_FONT = pygame.font.SysFont("Segoe UI", 14)
@@ -56,111 +135,1301 @@ def init_pygame():
         FONT = pygame.font.SysFont(None, 24)
         SMALL_FONT = pygame.font.SysFont(None, 18)
         TITLE_FONT = pygame.font.SysFont(None, 26)
+    start_text_cache()
     SCREEN = pygame.display.set_mode((460, 560))
     pygame.display.set_caption("ConsoleDeck v10 (Open With)")
+    pygame.event.set_blocked(pygame.MOUSEMOTION)
+    RENDERER = DeckRenderer(SCREEN)
+
+def setup_logging(level="INFO"):
+    """Routes log records through a queue to a background thread, so logging never blocks the caller."""
+    global LOG_LISTENER
+    if LOG_LISTENER: LOG_LISTENER.stop()
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s", "%H:%M:%S"))
+    LOG.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    LOG.propagate = False
+    set_log_level(level)
+    LOG_LISTENER = logging.handlers.QueueListener(log_queue, handler)
+    LOG_LISTENER.start()
+
+def set_log_level(level):
+    """Sets the log level by name; "OFF" silences all output."""
+    level = str(level).upper()
+    if level not in LOG_LEVELS: level = "INFO"
+    LOG.setLevel(logging.CRITICAL + 1 if level == "OFF" else getattr(logging, level))
 
 def load_config():
     """Loads or creates the configuration file with the profile structure."""
-    global CONFIG, ARDUINO_PORT, ACTIVE_PROFILE_NAME
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, "r") as f:
-            try:
-                CONFIG = json.load(f)
-            except json.JSONDecodeError:
-                CONFIG = {}
-    else:
-        CONFIG = {}
-
-    if "settings" not in CONFIG or not isinstance(CONFIG["settings"], dict):
-        CONFIG["settings"] = {"arduino_port": "COM4", "active_profile": "Default", "automation_enabled": True}
-    if "profiles" not in CONFIG or not isinstance(CONFIG["profiles"], dict):
-        CONFIG["profiles"] = {"Default": {}}
-    if "automation" not in CONFIG or not isinstance(CONFIG["automation"], dict):
-        CONFIG["automation"] = {}
-    if not CONFIG["profiles"]:
-        CONFIG["profiles"]["Default"] = {}
-    
-    CONFIG["settings"].setdefault("automation_enabled", True)
-    
-    profile_keys = list(CONFIG["profiles"].keys())
-    active_profile = CONFIG["settings"].get("active_profile", profile_keys[0])
+    global CONFIG, ARDUINO_PORT
+    CONFIG = read_config_file(CONFIG_FILE)
+    if CONFIG is None:
+        CONFIG = read_config_file(backup_path(CONFIG_FILE))
+        if CONFIG is not None: LOG.warning("'%s' is missing or corrupt, restored the last good backup.", CONFIG_FILE)
+        else: CONFIG = {}
+    normalize_config(CONFIG)
+    set_log_level(CONFIG["settings"]["log_level"])
+    ARDUINO_PORT = CONFIG["settings"].get("arduino_port", "COM4")
+    compile_config()
+    LOG.debug("Config loaded. Active profile: '%s', Port: %s", ACTIVE_PROFILE.name, ARDUINO_PORT)
+
+def normalize_config(config):
+    """Fills in missing sections and settings and converts profiles to their in-memory form. Returns `config`."""
+    if "settings" not in config or not isinstance(config["settings"], dict):
+        config["settings"] = {"arduino_port": "COM4", "active_profile": "Default", "automation_enabled": True}
+    if "profiles" not in config or not isinstance(config["profiles"], dict):
+        config["profiles"] = {"Default": {}}
+    if "automation" not in config or not isinstance(config["automation"], dict):
+        config["automation"] = {}
+    if not isinstance(config.get("automation_rules"), list):
+        config["automation_rules"] = []
+    if not config["profiles"]:
+        config["profiles"]["Default"] = {}
+    pool = {}
+    config["profiles"] = {name: load_profile(data, pool) for name, data in config["profiles"].items()}
+
+    config["settings"].setdefault("automation_enabled", True)
+    config["settings"].setdefault("queue_policy", "drop")
+    config["settings"].setdefault("baudrate", BAUDRATE)
+    config["settings"].setdefault("usb_ids", list(USB_DEVICE_IDS))
+    config["settings"].setdefault("log_level", "INFO")
+    config["settings"].setdefault("stats_interval", 0)
+    config["settings"].setdefault("devices", [])
+    config["settings"].setdefault("text_backend", "auto")
+    config["settings"].setdefault("paste_threshold", PASTE_THRESHOLD)
+    config["settings"].setdefault("macro_gap_ms", MACRO_GAP_MS)
+    config["settings"].setdefault("text_cache_kb", TEXT_CACHE_KB)
+
+    profile_keys = list(config["profiles"].keys())
+    active_profile = config["settings"].get("active_profile", profile_keys[0])
     if active_profile not in profile_keys:
         active_profile = profile_keys[0]
-    
-    ACTIVE_PROFILE_NAME = active_profile
-    CONFIG["settings"]["active_profile"] = active_profile
-    
-    for profile_name in CONFIG["profiles"]:
-        for i in range(1, 10):
-            for action in ["PRESS", "HOLD"]:
-                key = f"BUTTON_{i}_{action}"
-                CONFIG["profiles"][profile_name].setdefault(key, {"type": "none", "value": ""})
+    config["settings"]["active_profile"] = active_profile
+    return config
 
-    ARDUINO_PORT = CONFIG["settings"].get("arduino_port", "COM4")
-    print(f"[DEBUG] Config loaded. Active profile: '{ACTIVE_PROFILE_NAME}', Port: {ARDUINO_PORT}", flush=True)
+def read_config_file(path):
+    """Returns the parsed JSON object in `path`, or None if it is missing or unreadable."""
+    try:
+        with open(path, "r") as f: data = json.load(f)
+    except (OSError, ValueError): return None
+    return data if isinstance(data, dict) else None
+
+def backup_path(path):
+    return path + ".bak"
+
+def write_file_atomic(path, data, backup=True):
+    """Writes `data` via a temp file, fsync and rename, keeping the previous file as a backup.
+
+    The previous file only replaces the backup if it is a valid config, so the backup is always
+    the last good one, even after recovering from a damaged file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(data); f.flush(); os.fsync(f.fileno())
+    if backup and read_config_file(path) is not None: os.replace(path, backup_path(path))
+    os.replace(tmp_path, path)
+    if hasattr(os, "O_DIRECTORY"):
+        try:
+            dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+            try: os.fsync(dir_fd)
+            finally: os.close(dir_fd)
+        except OSError: pass
+
+class ConfigWriter:
+    """Write-behind persistence for CONFIG.
+
+    save_config() only marks the config dirty; a background thread writes it out
+    once per debounce window, so bursts of changes (e.g. mashing switch_profile)
+    turn into a handful of disk writes. close() flushes synchronously.
+    """
+
+    def __init__(self, path, debounce=SAVE_DEBOUNCE):
+        self.path = path
+        self.debounce = debounce
+        self.requests = 0
+        self.writes = 0
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._deadline = 0.0
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="ConfigWriter", daemon=True)
+        self._thread.start()
+
+    def mark_dirty(self):
+        with self._cond:
+            self.requests += 1
+            if not self._dirty:
+                self._dirty = True; self._deadline = time.monotonic() + self.debounce
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._dirty and not self._stopping: self._cond.wait()
+                if self._stopping: return
+                while not self._stopping and (remaining := self._deadline - time.monotonic()) > 0: self._cond.wait(remaining)
+                if self._stopping: return
+            self.flush()
+
+    def flush(self):
+        """Writes the config now if it has unsaved changes."""
+        with self._write_lock:
+            with self._cond:
+                if not self._dirty: return
+                self._dirty = False
+            try:
+                data = dump_config(CONFIG)
+            except RuntimeError:
+                # Another thread resized a dict mid-serialization; try again next window.
+                self.mark_dirty(); return
+            if CONFIG_WATCHER: CONFIG_WATCHER.note_write(data)
+            try:
+                write_file_atomic(self.path, data); self.writes += 1
+                LOG.debug("Config saved.")
+            except OSError as e:
+                LOG.error("Could not save config: %s", e)
+
+    def close(self):
+        """Stops the background thread and flushes any pending changes."""
+        with self._cond:
+            self._stopping = True; self._cond.notify_all()
+        self._thread.join(timeout=2)
+        self.flush()
+
+def dump_config(config):
+    """Serializes `config` to JSON, writing each profile's Binding records back as action dicts."""
+    profiles = {name: {key: entry.to_dict() if isinstance(entry, Binding) else entry for key, entry in data.items()}
+                for name, data in config.get("profiles", {}).items()}
+    return json.dumps(dict(config, profiles=profiles), separators=(",", ":"))
+
+def start_config_writer():
+    """Starts write-behind persistence for the current CONFIG_FILE."""
+    global CONFIG_WRITER
+    if CONFIG_WRITER: CONFIG_WRITER.close()
+    CONFIG_WRITER = ConfigWriter(CONFIG_FILE)
 
 def save_config():
-    """Saves the current configuration."""
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(CONFIG, f, indent=4)
-    print("[DEBUG] Config saved.", flush=True)
-
-def execute_action(action):
-    """Executes a single action or a sequence of actions (macro)."""
-    global ACTIVE_PROFILE_NAME
-    action_type = action.get("type", "none"); value = action.get("value", "")
-    if action_type == "open_with":
+    """Schedules the current configuration to be saved. Writes immediately if no writer is running."""
+    if CONFIG_WRITER: CONFIG_WRITER.mark_dirty(); return
+    data = dump_config(CONFIG)
+    if CONFIG_WATCHER: CONFIG_WATCHER.note_write(data)
+    write_file_atomic(CONFIG_FILE, data)
+    LOG.debug("Config saved.")
+
+# --- Config Hot Reload ---
+# Other programs (editors, provisioning scripts) may change config.json while
+# the app runs. The watcher notices, parses the file on its own thread, and
+# applies only what differs from the live config. The app's own saves are
+# recognised by content and skipped.
+CONFIG_POLL_INTERVAL = 1.0   # seconds between stat() checks when inotify is not available
+CONFIG_SETTLE = 0.2          # wait this long after a change so multi-step writes finish first
+CONFIG_OWN_WRITES = 8        # how many of our own recent writes to recognise
+SERIAL_SETTINGS = ("arduino_port", "baudrate", "usb_ids", "devices")
+COMPILE_SETTINGS = ("text_backend", "paste_threshold", "macro_gap_ms")   # baked into compiled actions
+
+def file_signature(path):
+    """Returns (mtime, size, inode) of `path`, or None if it is missing."""
+    try: info = os.stat(path)
+    except OSError: return None
+    return (info.st_mtime_ns, info.st_size, info.st_ino)
+
+class InotifyWatch:
+    """Waits for files in one directory to be written or renamed into place, using Linux inotify through ctypes."""
+    IN_CLOSE_WRITE, IN_MOVED_TO, IN_CREATE = 0x8, 0x80, 0x100
+    IN_NONBLOCK, IN_CLOEXEC = 0o4000, 0o2000000
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, directory):
+        import ctypes, ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0: raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE) < 0:
+            errno = ctypes.get_errno(); os.close(self.fd)
+            raise OSError(errno, f"cannot watch {directory}")
+        self._wake_r, self._wake_w = os.pipe()
+
+    def wait(self, name, timeout=None):
+        """Returns True once `name` (bytes) changes, False on timeout or interrupt()."""
+        ready, _, _ = select.select([self.fd, self._wake_r], [], [], timeout)
+        if self._wake_r in ready: os.read(self._wake_r, 64); return False
+        if not ready: return False
+        try: data = os.read(self.fd, 65536)
+        except BlockingIOError: return False
+        offset = 0; changed = False
+        while offset + self.EVENT.size <= len(data):
+            _, _, _, length = self.EVENT.unpack_from(data, offset)
+            start = offset + self.EVENT.size
+            if data[start:start + length].rstrip(b"\0") == name: changed = True
+            offset = start + length
+        return changed
+
+    def interrupt(self):
+        os.write(self._wake_w, b"x")
+
+    def close(self):
+        for fd in (self.fd, self._wake_r, self._wake_w): os.close(fd)
+
+class ConfigWatcher:
+    """Reloads the config file when something other than the app changes it.
+
+    Changes are noticed with inotify on Linux and by polling the file's mtime,
+    size and inode elsewhere. The file is read and diffed on this thread, so
+    presses never wait for it. Writes made by save_config() are passed to
+    note_write() first and ignored when they land.
+    """
+
+    def __init__(self, path, interval=CONFIG_POLL_INTERVAL, use_inotify=True):
+        self.path = path
+        self.interval = interval
+        self.mode = None
+        self.reloads = 0
+        self.ignored = 0
+        self.errors = 0
+        self._own = deque(maxlen=CONFIG_OWN_WRITES)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._watch = None
+        self._signature = file_signature(path)
         try:
-            app_path, arg_path = value.split('|', 1)
-            if os.path.exists(app_path) and os.path.exists(arg_path):
-                print(f"Action: Opening '{arg_path}' with '{os.path.basename(app_path)}'", flush=True)
-                subprocess.Popen([app_path, arg_path])
-            else: print(f"Error: Path not found for open_with. App: {app_path}, Arg: {arg_path}", flush=True)
-        except (ValueError, IndexError): print(f"Error: Malformed value for open_with: {value}", flush=True)
-        return
-    if action_type == "switch_profile":
-        profile_names = list(CONFIG["profiles"].keys())
-        if not profile_names: return
+            with open(path, "rb") as f: self._own.append(hashlib.sha1(f.read()).digest())
+        except OSError: pass
+        if use_inotify and sys.platform.startswith("linux"):
+            try: self._watch = InotifyWatch(os.path.dirname(os.path.abspath(path)))
+            except (OSError, AttributeError) as e: LOG.debug("inotify not available (%s); polling the config file.", e)
+        self.mode = "inotify" if self._watch else "poll"
+        self._thread = threading.Thread(target=self._run, name="ConfigWatcher", daemon=True)
+        self._thread.start()
+
+    def note_write(self, data):
+        """Records that the app is about to write `data` to the file, so the change it causes is skipped."""
+        with self._lock: self._own.append(hashlib.sha1(data.encode()).digest())
+
+    def _run(self):
+        name = os.fsencode(os.path.basename(self.path))
+        while not self._stopping:
+            if self._watch:
+                if not self._watch.wait(name): continue
+                while self._watch.wait(name, CONFIG_SETTLE): pass   # let a burst of writes finish
+            else:
+                self._wake.wait(self.interval)
+            if self._stopping: return
+            signature = file_signature(self.path)
+            if signature is None or signature == self._signature: continue
+            if not self._watch:
+                self._wake.wait(CONFIG_SETTLE)
+                if file_signature(self.path) != signature: continue   # still being written; look again next time
+            self._signature = signature
+            self.check()
+
+    def check(self):
+        """Reloads the file if its contents are neither the app's own write nor already applied."""
         try:
-            current_index = profile_names.index(ACTIVE_PROFILE_NAME)
-            next_index = (current_index + 1) % len(profile_names)
-            ACTIVE_PROFILE_NAME = profile_names[next_index]
-            CONFIG["settings"]["active_profile"] = ACTIVE_PROFILE_NAME
-            save_config(); print(f"Action: Switched to profile '{ACTIVE_PROFILE_NAME}'", flush=True)
-        except (ValueError, IndexError): print("Error: Could not switch profile.", flush=True)
-        return
-    if action_type == "macro":
-        print(f"Action: Executing macro with {len(value)} steps...", flush=True)
-        for step in value: execute_action(step); time.sleep(0.05)
-        return
+            with open(self.path, "rb") as f: raw = f.read()
+        except OSError: return
+        digest = hashlib.sha1(raw).digest()
+        with self._lock:
+            if digest in self._own: self.ignored += 1; return
+        try:
+            config = json.loads(raw)
+            if not isinstance(config, dict): raise ValueError("not a JSON object")
+        except ValueError as e:
+            self.errors += 1; LOG.warning("Not reloading '%s', it is not valid: %s", self.path, e); return
+        with self._lock: self._own.append(digest)
+        try: apply_config(config); self.reloads += 1
+        except Exception as e: self.errors += 1; LOG.error("Could not apply the changes to '%s': %s", self.path, e)
+
+    def stats(self):
+        return {"mode": self.mode, "reloads": self.reloads, "ignored_own_writes": self.ignored, "errors": self.errors}
+
+    def close(self):
+        self._stopping = True; self._wake.set()
+        if self._watch: self._watch.interrupt()
+        self._thread.join(timeout=2)
+        if self._watch: self._watch.close()
+
+def start_config_watcher():
+    """Starts watching the current CONFIG_FILE for outside changes."""
+    global CONFIG_WATCHER
+    if CONFIG_WATCHER: CONFIG_WATCHER.close()
+    CONFIG_WATCHER = ConfigWatcher(CONFIG_FILE)
+
+def apply_config(config):
+    """Swaps in a config read from disk, redoing only the parts that changed. Returns their names.
+
+    Only profiles whose bindings changed, the profiles inheriting from them, and
+    profiles whose chain of bases changed are recompiled, automation rules are rebuilt only if they changed, and decks
+    are reconnected only if their port settings changed. The active profile
+    stays as it is unless it was removed.
+    """
+    global CONFIG, ARDUINO_PORT
+    old, new = CONFIG, normalize_config(config)
+    old_settings, settings = old.get("settings", {}), new["settings"]
+    changed = {key for key in set(old_settings) | set(settings) if old_settings.get(key) != settings.get(key)} - {"active_profile"}
+    old_profiles, profiles = old.get("profiles", {}), new["profiles"]
+    if ACTIVE_PROFILE and ACTIVE_PROFILE.name in profiles: settings["active_profile"] = ACTIVE_PROFILE.name
+    edited = {name for name in profiles if old_profiles.get(name) != profiles[name]}
+    applied = []
+    CONFIG = new
+    if "log_level" in changed: set_log_level(settings["log_level"]); applied.append("log level")
+    if changed & set(COMPILE_SETTINGS): compile_profiles(); applied.append("all profiles")
+    elif edited or list(profiles) != list(old_profiles):
+        # A profile is stale if anything on its chain was edited, or if the chain itself changed (a base was removed, added or renamed).
+        affected = {name for name in profiles if edited.intersection(profile_chain(profiles, name, warn=False))
+                    or name not in old_profiles or profile_chain(old_profiles, name, warn=False) != profile_chain(profiles, name, warn=False)}
+        compile_profiles(reuse=set(profiles) - affected); applied.append(f"{len(affected)} profile(s)")
+    else: compile_profiles(reuse=set(profiles))   # rebuilt around the old bindings, so it points at the new CONFIG
+    if new["automation"] != old.get("automation") or new["automation_rules"] != old.get("automation_rules"):
+        compile_automation(); applied.append("automation rules")
+    if "queue_policy" in changed and EXECUTOR:
+        EXECUTOR.policy = settings["queue_policy"] if settings["queue_policy"] in QUEUE_POLICIES else "drop"; applied.append("queue policy")
+    if "stats_interval" in changed and STATS_EXPORTER:
+        STATS_EXPORTER.interval = settings["stats_interval"]; STATS_EXPORTER.request_dump(); applied.append("stats interval")
+    if "text_cache_kb" in changed and TEXT_CACHE:
+        TEXT_CACHE.resize(text_cache_bytes()); applied.append("text cache size")
+    if changed & set(SERIAL_SETTINGS):
+        ARDUINO_PORT = settings.get("arduino_port", "COM4")
+        if SERIAL_HUB: start_serial_hub()
+        applied.append("decks")
+    request_redraw()
+    LOG.info("Reloaded '%s': %s.", CONFIG_FILE, ", ".join(applied) or "nothing changed")
+    return applied
+
+# --- Text Injection Backends ---
+# Backends turn typetext and keystroke actions into input events. Each action
+# picks one by name when it is compiled: its own "backend" key if it has one,
+# otherwise the `text_backend` setting, where "auto" pastes long text through
+# the clipboard and sends short text in unpaced chunks.
+TYPE_INTERVAL = 0.01          # seconds between characters for the "pyautogui" backend
+TYPE_CHUNK_SIZE = 64          # characters per write() for the "bulk" backend; cancel is checked between chunks
+PASTE_THRESHOLD = 200         # "auto" pastes text at least this long
+PASTE_RESTORE_DELAY = 0.15    # seconds to let the target app read the clipboard before restoring it
+PASTE_KEYS = ("command", "v") if sys.platform == "darwin" else ("ctrl", "v")
+
+class InjectionBackend:
+    """Sends text and hotkeys to the focused window. Subclasses override type_text() and, if needed, hotkey()."""
+    name = None
+
+    def type_text(self, text, cancel=None):
+        raise NotImplementedError
+
+    def hotkey(self, keys):
+        pyautogui.hotkey(*keys, _pause=False)
+
+class PyAutoGUIBackend(InjectionBackend):
+    """Types one character at a time with a short pause, for apps that drop fast input."""
+    name = "pyautogui"
+
+    def type_text(self, text, cancel=None):
+        for start in range(0, len(text), TYPE_CHUNK_SIZE):
+            if cancel and cancel.is_set(): return
+            pyautogui.write(text[start:start + TYPE_CHUNK_SIZE], interval=TYPE_INTERVAL, _pause=False)
+
+    def hotkey(self, keys):
+        pyautogui.hotkey(*keys)
+
+class BulkBackend(InjectionBackend):
+    """Types in chunks with no per-character pause."""
+    name = "bulk"
+
+    def type_text(self, text, cancel=None):
+        for start in range(0, len(text), TYPE_CHUNK_SIZE):
+            if cancel and cancel.is_set(): return
+            pyautogui.write(text[start:start + TYPE_CHUNK_SIZE], interval=0, _pause=False)
+
+class ClipboardBackend(InjectionBackend):
+    """Pastes the whole text at once and puts the previous clipboard contents back afterwards.
+
+    Falls back to the bulk backend if the clipboard cannot be used (for example
+    no clipboard tool on Linux).
+    """
+    name = "paste"
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self._lock = threading.Lock()   # two pastes at once would restore each other's text
+        self._warned = False
+
+    def type_text(self, text, cancel=None):
+        with self._lock:
+            try: previous = pyperclip.paste()
+            except Exception as e:
+                if not self._warned: LOG.warning("Clipboard unavailable (%s), typing text instead of pasting.", e); self._warned = True
+                return self.fallback.type_text(text, cancel)
+            try:
+                pyperclip.copy(text); pyautogui.hotkey(*PASTE_KEYS, _pause=False)
+                if cancel: cancel.wait(PASTE_RESTORE_DELAY)
+                else: time.sleep(PASTE_RESTORE_DELAY)
+            finally:
+                pyperclip.copy(previous or "")
+
+class RecordingBackend(InjectionBackend):
+    """Records what would have been sent instead of sending it. For benchmarks and headless checks."""
+    name = "recording"
+
+    def __init__(self):
+        self.calls = []
+        self.chars = 0
+        self._lock = threading.Lock()
+
+    def type_text(self, text, cancel=None):
+        with self._lock: self.calls.append(("type", text)); self.chars += len(text)
+
+    def hotkey(self, keys):
+        with self._lock: self.calls.append(("hotkey", tuple(keys)))
+
+    def text(self):
+        with self._lock: return "".join(value for kind, value in self.calls if kind == "type")
+
+_BULK = BulkBackend()
+TEXT_BACKENDS = {backend.name: backend for backend in (PyAutoGUIBackend(), _BULK, ClipboardBackend(_BULK))}
+TEXT_BACKEND_OVERRIDE = None   # set to a backend (e.g. RecordingBackend()) to route every action through it
+
+def text_backend(name):
+    """Returns the backend to use for `name`, honouring TEXT_BACKEND_OVERRIDE."""
+    return TEXT_BACKEND_OVERRIDE or TEXT_BACKENDS.get(name) or _BULK
+
+def choose_text_backend(requested, text_length=0):
+    """Resolves a backend name for an action: its own choice, else the setting, with "auto" decided by length."""
+    settings = CONFIG.get("settings", {})
+    name = requested or settings.get("text_backend", "auto")
+    if name == "auto": return "paste" if text_length >= settings.get("paste_threshold", PASTE_THRESHOLD) else "bulk"
+    if name not in TEXT_BACKENDS:
+        LOG.warning("Unknown text backend '%s', using 'bulk'.", name); return "bulk"
+    return name
+
+# --- Compiled Dispatch Table ---
+# The config is compiled once (at load and after every edit) into immutable
+# per-profile tables of ready-to-run action objects, so a button press is two
+# index lookups with no string parsing. The active profile is swapped in with a
+# single reference assignment, which is atomic across the serial, watcher and UI threads.
+PRESS, HOLD = 0, 1
+EVENT_KINDS = {"PRESS": PRESS, "HOLD": HOLD}
+SERIAL_EVENTS = {f"BUTTON_{i}_{kind}": (i, code) for i in range(1, 10) for kind, code in EVENT_KINDS.items()}
+
+class CompiledAction:
+    """Base class for pre-parsed actions. `label` is the text shown on the button."""
+    __slots__ = ("type", "label")
+
+    def __init__(self, action_type, label):
+        self.type = action_type
+        self.label = label
+
+    def run(self, cancel=None):
+        pass
+
+class InvalidAction(CompiledAction):
+    """An action whose config could not be compiled; reports the problem when pressed."""
+    __slots__ = ("error",)
+
+    def __init__(self, action_type, label, error):
+        super().__init__(action_type, label)
+        self.error = error
+
+    def run(self, cancel=None):
+        LOG.error("%s", self.error)
+
+class LinkAction(CompiledAction):
+    __slots__ = ("url",)
+
+    def __init__(self, label, url):
+        super().__init__("link", label)
+        self.url = url
+
+    def run(self, cancel=None):
+        try: webbrowser.open(self.url); LOG.info("Action: Opening link: %s", self.url)
+        except Exception as e: LOG.error("Could not open link '%s': %s", self.url, e)
+
+class ExeAction(CompiledAction):
+    """Hands the pre-resolved command to the launch manager; the process is started on its thread."""
+    __slots__ = ("argv", "instance")
+
+    def __init__(self, label, argv, instance="multiple", action_type="exe"):
+        super().__init__(action_type, label)
+        self.argv = argv
+        self.instance = instance
+
+    def run(self, cancel=None):
+        LOG.info("Action: Running executable: %s", self.argv[0]); LAUNCHER.launch(self.argv, self.instance)
+
+class OpenWithAction(ExeAction):
+    __slots__ = ()
+
+    def __init__(self, label, argv, instance="multiple"):
+        super().__init__(label, argv, instance, "open_with")
+
+    def run(self, cancel=None):
+        app_path, arg_path = self.argv
+        LOG.info("Action: Opening '%s' with '%s'", arg_path, os.path.basename(app_path)); LAUNCHER.launch(self.argv, self.instance)
+
+class KeystrokeAction(CompiledAction):
+    __slots__ = ("keys", "backend")
+
+    def __init__(self, label, keys, backend="bulk"):
+        super().__init__("keystroke", label)
+        self.keys = keys
+        self.backend = backend
+
+    def run(self, cancel=None):
+        try: LOG.info("Action: Pressing hotkey: %s", self.keys); text_backend(self.backend).hotkey(self.keys)
+        except Exception as e: LOG.error("Could not press hotkey '%s': %s", '+'.join(self.keys), e)
+
+class TypeTextAction(CompiledAction):
+    __slots__ = ("text", "backend")
+
+    def __init__(self, label, text, backend="bulk"):
+        super().__init__("typetext", label)
+        self.text = text
+        self.backend = backend
+
+    def run(self, cancel=None):
+        try: LOG.info("Action: Typing %d characters via %s", len(self.text), self.backend); text_backend(self.backend).type_text(self.text, cancel)
+        except Exception as e: LOG.error("Could not type text: %s", e)
+
+class DelayAction(CompiledAction):
+    __slots__ = ("seconds",)
+
+    def __init__(self, label, seconds):
+        super().__init__("delay", label)
+        self.seconds = seconds
+
+    def run(self, cancel=None):
+        LOG.info("Action: Delaying for %s seconds...", self.seconds)
+        if cancel: cancel.wait(self.seconds)
+        else: time.sleep(self.seconds)
+
+class SwitchProfileAction(CompiledAction):
+    """Cycles to the next profile using the link precomputed on the active profile."""
+    __slots__ = ()
+
+    def __init__(self, label):
+        super().__init__("switch_profile", label)
+
+    def run(self, cancel=None):
+        if set_active_profile(ACTIVE_PROFILE.next_name):
+            save_config(); LOG.info("Action: Switched to profile '%s'", ACTIVE_PROFILE.name)
+        else: LOG.error("Could not switch profile.")
+
+# --- Macro Engine ---
+# A macro's step list is compiled once into a flat plan of RUN, WAIT and LOOP
+# instructions. Nested macros are inlined, and "repeat"/"end" steps become a
+# LOOP jump. At run time every step has a deadline on the monotonic clock. A
+# deadline is the previous one plus the gap and any delays, not "now" plus them,
+# so the time steps take does not add up as drift.
+RUN, WAIT, LOOP = 0, 1, 2
+MACRO_GAP_MS = 50          # default pause between two steps
+MACRO_MAX_STEPS = 10000    # largest compiled plan
+MACRO_MAX_DEPTH = 8        # deepest nesting of macros inside macros
+MACRO_MAX_LAG = 0.25       # if a step starts later than this, the schedule restarts from now instead of rushing to catch up
+MACRO_SPIN = 0.002         # the last part of each wait is spent yielding rather than sleeping, for sub-millisecond accuracy
+
+def compile_macro(steps, plan=None, depth=0, floor=0):
+    """Appends the instructions for `steps` to `plan` and returns it. Raises ValueError if the macro is too big or deep,
+    or if a repeat block has nothing but delays in it. Delays are only merged with a WAIT at index `floor` or later,
+    so a delay inside a repeat block is never folded into one before it."""
+    if depth > MACRO_MAX_DEPTH: raise ValueError(f"macros are nested more than {MACRO_MAX_DEPTH} deep")
+    plan = [] if plan is None else plan
+    blocks = []   # (first instruction, count) of each open repeat
+    def close(start, count):
+        if count == 1: return
+        if not any(op[0] == RUN for op in plan[start:]): raise ValueError("a repeat block needs at least one step that is not a delay")
+        plan.append((LOOP, start, count))
+    for step in steps:
+        if len(plan) >= MACRO_MAX_STEPS: raise ValueError(f"more than {MACRO_MAX_STEPS} steps")
+        if not isinstance(step, dict): continue
+        step_type = step.get("type", "none"); value = step.get("value", "")
+        if step_type == "delay":
+            try: seconds = int(value) / 1000.0
+            except (ValueError, TypeError): plan.append((RUN, InvalidAction(step_type, "delay", f"Invalid delay value '{value}'."))); continue
+            if len(plan) > (blocks[-1][0] if blocks else floor) and plan[-1][0] == WAIT: plan[-1] = (WAIT, plan[-1][1] + seconds)
+            else: plan.append((WAIT, seconds))
+        elif step_type == "repeat":
+            count = int(value or 0)
+            if count < 0: raise ValueError(f"invalid repeat count {count}")
+            blocks.append((len(plan), count))
+        elif step_type == "end":
+            if not blocks: raise ValueError("'end' without a matching 'repeat'")
+            close(*blocks.pop())
+        elif step_type == "macro":
+            compile_macro(value if isinstance(value, list) else [], plan, depth + 1, blocks[-1][0] if blocks else floor)
+        else:
+            plan.append((RUN, compile_action(step)))
+    while blocks: close(*blocks.pop())   # a repeat without an end covers the rest of the macro
+    if len(plan) > MACRO_MAX_STEPS: raise ValueError(f"more than {MACRO_MAX_STEPS} steps")
+    return plan
+
+def wait_until(deadline, cancel):
+    """Waits until the monotonic `deadline`. Returns False if `cancel` was set first."""
+    while True:
+        left = deadline - time.monotonic()
+        if left <= 0: return not cancel.is_set()
+        if left > MACRO_SPIN:
+            if cancel.wait(left - MACRO_SPIN): return False
+        elif cancel.is_set(): return False
+        else: time.sleep(0)
+
+class MacroAction(CompiledAction):
+    """Runs a compiled plan against monotonic deadlines. "repeat" with count 0 loops until the button is pressed again."""
+    __slots__ = ("plan", "gap", "steps")
+
+    def __init__(self, label, plan, gap=MACRO_GAP_MS / 1000.0):
+        super().__init__("macro", label)
+        self.plan = plan
+        self.gap = gap
+        self.steps = sum(1 for op in plan if op[0] == RUN)
+
+    def run(self, cancel=None):
+        LOG.info("Action: Executing macro with %d steps...", self.steps)
+        cancel = cancel or threading.Event()
+        plan, gap = self.plan, self.gap
+        loops = {}   # LOOP instruction index -> iterations done
+        pc = 0; first = True; deadline = time.monotonic()
+        while pc < len(plan):
+            op = plan[pc]
+            if op[0] == WAIT: deadline += op[1]; pc += 1; continue
+            if op[0] == LOOP:
+                if cancel.is_set(): LOG.info("Action: Macro cancelled."); return
+                done = loops.get(pc, 0) + 1
+                if op[2] == 0 or done < op[2]: loops[pc] = done; pc = op[1]
+                else: loops.pop(pc, None); pc += 1
+                continue
+            if first: first = False
+            else: deadline += gap
+            if not wait_until(deadline, cancel): LOG.info("Action: Macro cancelled."); return
+            now = time.monotonic()
+            with MACRO_JITTER_LOCK: MACRO_JITTER.record(int((now - deadline) * 1e6))
+            if now - deadline > MACRO_MAX_LAG: deadline = now
+            op[1].run(cancel); pc += 1
+        if not wait_until(deadline, cancel): LOG.info("Action: Macro cancelled.")
+
+NO_ACTION = CompiledAction("none", "none: ")
+
+def compile_action(action):
+    """Parses one action dict from the config into a ready-to-run action object."""
+    if not isinstance(action, (dict, Binding)): return NO_ACTION
+    action_type = action.get("type", "none"); value = action.get("value", "")
+    label = get_button_text(action)
+    if action_type == "link": return LinkAction(label, value)
+    if action_type == "exe": return ExeAction(label, split_command(str(value).strip()), instance_policy(action))
+    if action_type == "typetext":
+        text = str(value)
+        return TypeTextAction(label, text, choose_text_backend(action.get("backend"), len(text)))
+    if action_type == "switch_profile": return SwitchProfileAction(label)
+    if action_type == "keystroke":
+        return KeystrokeAction(label, tuple(k.strip() for k in str(value).lower().split('+')), choose_text_backend(action.get("backend")))
+    if action_type == "open_with":
+        try: app_path, arg_path = value.split('|', 1)
+        except (ValueError, AttributeError): return InvalidAction(action_type, label, f"Malformed value for open_with: {value}")
+        if not (os.path.exists(app_path) and os.path.exists(arg_path)):
+            return InvalidAction(action_type, label, f"Path not found for open_with. App: {app_path}, Arg: {arg_path}")
+        return OpenWithAction(label, (resolve_executable(app_path), arg_path), instance_policy(action))
     if action_type == "delay":
+        try: return DelayAction(label, int(value) / 1000.0)
+        except (ValueError, TypeError): return InvalidAction(action_type, label, f"Invalid delay value '{value}'.")
+    if action_type == "macro":
+        gap = action.get("gap", CONFIG.get("settings", {}).get("macro_gap_ms", MACRO_GAP_MS))
+        try: return MacroAction(label, tuple(compile_macro(value if isinstance(value, list) else [])), int(gap) / 1000.0)
+        except (ValueError, TypeError) as e: return InvalidAction(action_type, label, f"Invalid macro: {e}")
+    if action_type == "none": return NO_ACTION
+    return InvalidAction(action_type, label, f"Unknown action type '{action_type}'.")
+
+# --- Profile Store ---
+# Profiles only store the bindings that are actually set; a missing key means
+# "no action", or whatever the base profile has if the profile names one with
+# "inherits". Inheritance is resolved once, when the dispatch tables are built.
+# Each stored binding is a Binding tuple rather than a dict, and identical
+# bindings loaded from the file share one object.
+PROFILE_BASE_KEY = "inherits"
+BUTTON_KEYS = (None,) + tuple(tuple(f"BUTTON_{i}_{kind}" for kind in EVENT_KINDS) for i in range(1, 10))
+
+class Binding(tuple):
+    """One button's action as an immutable (type, value, extra) tuple.
+
+    `extra` holds any other keys of the action ("backend", "instance", "gap", ...)
+    as (key, value) pairs. get() reads it like the dict it was loaded from.
+    """
+    __slots__ = ()
+    type = property(lambda self: self[0])
+    value = property(lambda self: self[1])
+
+    def __new__(cls, action_type="none", value="", extra=()):
+        return tuple.__new__(cls, (sys.intern(str(action_type)), value, extra))
+
+    @classmethod
+    def from_dict(cls, action):
+        return cls(action.get("type", "none"), action.get("value", ""), tuple((k, v) for k, v in action.items() if k not in ("type", "value")))
+
+    def get(self, key, default=None):
+        if key == "type": return self[0]
+        if key == "value": return self[1]
+        for name, value in self[2]:
+            if name == key: return value
+        return default
+
+    def to_dict(self):
+        return dict((("type", self[0]), ("value", self[1])) + self[2])
+
+NO_BINDING = Binding()
+
+def load_profile(data, pool=None):
+    """Converts a profile from the config file into its sparse in-memory form.
+
+    Bindings become Binding records, shared through `pool` when identical.
+    Placeholder "none" entries are dropped unless the profile inherits, where
+    they hide the base profile's binding.
+    """
+    if not isinstance(data, dict): return {}
+    pool = {} if pool is None else pool
+    inherits = data.get(PROFILE_BASE_KEY) is not None
+    profile = {}
+    for key, entry in data.items():
+        if not key.startswith("BUTTON_"): profile[key] = entry; continue
+        if isinstance(entry, Binding): binding = entry
+        elif isinstance(entry, dict):
+            if not inherits and entry.get("type", "none") == "none": continue
+            binding = Binding.from_dict(entry)
+        else: continue
+        if binding == NO_BINDING and not inherits: continue
+        try: binding = pool.setdefault(binding, binding)
+        except TypeError: pass   # macros and other list values cannot be shared
+        profile[key] = binding
+    return profile
+
+def profile_chain(profiles, name, stop=(), warn=True):
+    """Returns [name, its base, the base's base, ...], ending at a profile in `stop`, a missing base or a cycle."""
+    chain = [name]
+    while chain[-1] not in stop:
+        base = profiles[chain[-1]].get(PROFILE_BASE_KEY)
+        if base is None: break
+        if base not in profiles or base in chain:
+            if warn: LOG.warning("Profile '%s' inherits from %s profile '%s'; ignoring it.", chain[-1], "a missing" if base not in profiles else "the circular", base)
+            break
+        chain.append(base)
+    return chain
+
+def resolve_binding(name, key):
+    """Returns the Binding that `key` has in profile `name`, after inheritance."""
+    for profile_name in profile_chain(CONFIG["profiles"], name):
+        entry = CONFIG["profiles"][profile_name].get(key)
+        if entry is not None: return entry if isinstance(entry, Binding) else Binding.from_dict(entry)
+    return NO_BINDING
+
+def set_binding(name, key, action):
+    """Stores an action dict in profile `name`, leaving the key out when it matches what the profile would inherit anyway.
+
+    If the action has the type the key already had and no other keys, the old binding's other keys
+    ("instance", "backend", "gap", ...) are kept, since the UI only edits the type and value."""
+    profile = CONFIG["profiles"][name]
+    binding, current = Binding.from_dict(action), resolve_binding(name, key)
+    if binding.type == current.type and not binding[2]: binding = Binding(binding.type, binding.value, current[2])
+    profile.pop(key, None)
+    if binding != resolve_binding(name, key): profile[key] = binding
+
+def detach_profile(name):
+    """Prepares profile `name` for deletion: profiles inheriting from it take over its bindings and its base."""
+    profiles = CONFIG["profiles"]; removed = profiles[name]
+    for child in profiles.values():
+        if child.get(PROFILE_BASE_KEY) != name: continue
+        for key, entry in removed.items():
+            if key != PROFILE_BASE_KEY: child.setdefault(key, entry)
+        if removed.get(PROFILE_BASE_KEY) is not None: child[PROFILE_BASE_KEY] = removed[PROFILE_BASE_KEY]
+        else: child.pop(PROFILE_BASE_KEY, None)
+
+class CompiledProfile:
+    """An immutable dispatch table for one profile, indexed as bindings[button][PRESS or HOLD]."""
+    __slots__ = ("name", "bindings", "next_name")
+
+    def __init__(self, name, bindings, next_name):
+        self.name = name
+        self.bindings = bindings
+        self.next_name = next_name
+
+    def lookup(self, button, kind):
+        return self.bindings[button][kind]
+
+EMPTY_BINDINGS = ((NO_ACTION, NO_ACTION),) * 10   # index 0 is unused; buttons are numbered from 1
+
+def compile_profile(name, profile_data, next_name, base=None, compiled=None):
+    """Compiles a profile's bindings on top of its base's CompiledProfile.
+
+    Buttons the profile does not set reuse the base's (or the empty) entries, so
+    profiles with few bindings cost little. `compiled` caches actions by Binding
+    across profiles.
+    """
+    inherited = base.bindings if base else EMPTY_BINDINGS
+    if not any(key.startswith("BUTTON_") for key in profile_data): return CompiledProfile(name, inherited, next_name)
+    compiled = {} if compiled is None else compiled
+    def action_for(entry):
         try:
-            delay_seconds = int(value) / 1000.0; print(f"Action: Delaying for {delay_seconds} seconds...", flush=True); time.sleep(delay_seconds)
-        except (ValueError, TypeError): print(f"Error: Invalid delay value '{value}'.", flush=True)
-        return
-    if action_type == "link":
-        try: webbrowser.open(value); print(f"Action: Opening link: {value}", flush=True)
-        except Exception as e: print(f"Error opening link '{value}': {e}", flush=True)
-    elif action_type == "exe":
-        try: subprocess.Popen(value); print(f"Action: Running executable: {value}", flush=True)
-        except Exception as e: print(f"Error running executable '{value}': {e}", flush=True)
-    elif action_type == "keystroke":
-        try: keys = [k.strip() for k in value.lower().split('+')]; print(f"Action: Pressing hotkey: {keys}", flush=True); pyautogui.hotkey(*keys)
-        except Exception as e: print(f"Error pressing hotkey '{value}': {e}", flush=True)
-    elif action_type == "typetext":
-        try: print(f"Action: Typing text: {value}", flush=True); pyautogui.write(value, interval=0.01)
-        except Exception as e: print(f"Error typing text: {e}", flush=True)
+            action = compiled.get(entry)
+            if action is None: action = compiled[entry] = compile_action(entry)
+            return action
+        except TypeError: return compile_action(entry)   # unhashable: a plain dict, or a Binding holding a list
+    bindings = [inherited[0]]
+    for i in range(1, 10):
+        row = inherited[i]; keys = BUTTON_KEYS[i]
+        if keys[0] not in profile_data and keys[1] not in profile_data: bindings.append(row); continue
+        bindings.append(tuple(action_for(profile_data[key]) if key in profile_data else row[kind] for kind, key in enumerate(keys)))
+    return CompiledProfile(name, tuple(bindings), next_name)
+
+def compile_config():
+    """Rebuilds the dispatch tables from CONFIG. Call after any edit to profiles or bindings."""
+    compile_profiles()
+    compile_automation()
+    request_redraw()
+
+def compile_profiles(reuse=()):
+    """Rebuilds PROFILE_TABLE from CONFIG["profiles"]. Profiles in `reuse` keep their compiled bindings."""
+    global PROFILE_TABLE, ACTIVE_PROFILE
+    profiles = CONFIG["profiles"]
+    names = list(profiles.keys())
+    next_names = {name: names[(idx + 1) % len(names)] for idx, name in enumerate(names)}
+    table = {}; compiled = {}
+    for name in names:
+        if name in table: continue
+        chain = profile_chain(profiles, name, table)
+        for position in range(len(chain) - 1, -1, -1):   # the base first, so each profile can build on it
+            link = chain[position]
+            if link in table: continue
+            if link in reuse and link in PROFILE_TABLE:
+                table[link] = CompiledProfile(link, PROFILE_TABLE[link].bindings, next_names[link]); continue
+            base = table.get(chain[position + 1]) if position + 1 < len(chain) else None
+            table[link] = compile_profile(link, profiles[link], next_names[link], base, compiled)
+    table = {name: table[name] for name in names}
+    active = table.get(CONFIG["settings"].get("active_profile")) or table[names[0]]
+    PROFILE_TABLE = table
+    ACTIVE_PROFILE = active
+    CONFIG["settings"]["active_profile"] = active.name
+
+def set_active_profile(name):
+    """Atomically makes `name` the active profile. Returns False if it does not exist."""
+    global ACTIVE_PROFILE
+    profile = PROFILE_TABLE.get(name)
+    if profile is None: return False
+    ACTIVE_PROFILE = profile
+    CONFIG["settings"]["active_profile"] = name
+    request_redraw()
+    return True
+
+def execute_action(action, cancel=None):
+    """Executes a compiled action, or an action dict from the config. `cancel` is an optional Event that stops macros and delays early."""
+    if isinstance(action, dict): action = compile_action(action)
+    action.run(cancel)
+
+# --- Latency Instrumentation ---
+# Each press carries a trace: a list of perf_counter_ns() timestamps, one per
+# stage, filled in as it moves from the serial reader to the worker that runs it.
+T_RECEIPT, T_DECODE, T_DISPATCH, T_START, T_END = range(5)
+STAGE_INTERVALS = {"decode": (T_RECEIPT, T_DECODE), "dispatch": (T_DECODE, T_DISPATCH),
+                   "queue": (T_DISPATCH, T_START), "run": (T_START, T_END), "total": (T_RECEIPT, T_END)}
+TRACE_BUFFER_SIZE = 256
+
+def new_trace(received_ns):
+    return [received_ns, 0, 0, 0, 0]
+
+class LatencyHistogram:
+    """HDR-style histogram of microsecond values.
+
+    Values below 16us get their own bucket; above that, each power of two is
+    split into 16 linear sub-buckets, so any value is stored within ~6%.
+    """
+    SUB_BUCKETS = 16
+
+    def __init__(self):
+        self.counts = [0] * (self.SUB_BUCKETS * 24)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def _index(self, value):
+        if value < self.SUB_BUCKETS: return value
+        shift = value.bit_length() - 5
+        return self.SUB_BUCKETS * (shift + 1) + (value >> shift) - self.SUB_BUCKETS
+
+    def _upper_bound(self, index):
+        if index < self.SUB_BUCKETS: return index
+        shift, sub = divmod(index - self.SUB_BUCKETS, self.SUB_BUCKETS)
+        return ((sub + self.SUB_BUCKETS + 1) << shift) - 1
+
+    def record(self, value_us):
+        value = max(0, int(value_us)); index = self._index(value)
+        if index >= len(self.counts): self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1; self.count += 1; self.total += value
+        self.max = max(self.max, value); self.min = value if self.min is None else min(self.min, value)
+
+    def percentile(self, pct):
+        if not self.count: return 0
+        target = max(1, round(self.count * pct / 100)); seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target: return min(self._upper_bound(index), self.max)
+        return self.max
+
+    def summary(self):
+        return {"count": self.count, "min_us": self.min or 0, "p50_us": self.percentile(50), "p90_us": self.percentile(90),
+                "p99_us": self.percentile(99), "max_us": self.max, "mean_us": round(self.total / self.count, 1) if self.count else 0}
+
+class LatencyStats:
+    """Collects completed press traces into per-stage and per-action-type histograms, plus a ring buffer of recent traces."""
+
+    def __init__(self, size=TRACE_BUFFER_SIZE):
+        self._lock = threading.Lock()
+        self._recent = [None] * size
+        self._next = 0
+        self.stages = {name: LatencyHistogram() for name in STAGE_INTERVALS}
+        self.by_action = {}
+
+    def complete(self, trace, action_type):
+        """Records a trace whose action has finished."""
+        with self._lock:
+            for name, (begin, end) in STAGE_INTERVALS.items():
+                if trace[begin] and trace[end]: self.stages[name].record((trace[end] - trace[begin]) // 1000)
+            hist = self.by_action.get(action_type)
+            if hist is None: hist = self.by_action[action_type] = LatencyHistogram()
+            hist.record((trace[T_END] - trace[T_RECEIPT]) // 1000)
+            self._recent[self._next % len(self._recent)] = (action_type, tuple(trace)); self._next += 1
+
+    def snapshot(self):
+        with self._lock:
+            size = len(self._recent)
+            recent = [self._recent[i % size] for i in range(max(0, self._next - size), self._next)]
+            return {"stages": {name: hist.summary() for name, hist in self.stages.items()},
+                    "by_action": {name: hist.summary() for name, hist in self.by_action.items()},
+                    "recent": [{"type": action_type, "stages_ns": [t - trace[T_RECEIPT] if t else None for t in trace]} for action_type, trace in recent[-20:]]}
+
+STATS = LatencyStats()
+MACRO_JITTER = LatencyHistogram()   # how late each macro step started, in microseconds
+MACRO_JITTER_LOCK = threading.Lock()
+
+class StatsExporter:
+    """Writes a JSON snapshot of all runtime stats to a file every `interval` seconds, or when request_dump() is called."""
+
+    def __init__(self, path, interval=0):
+        self.path = path
+        self.interval = interval
+        self.dumps = 0
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="StatsExporter", daemon=True)
+        self._thread.start()
+
+    def request_dump(self):
+        """Safe to call from a signal handler; the write happens on the exporter thread."""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.interval if self.interval > 0 else None); self._wake.clear()
+            if not self._stopping: self.dump()
+
+    def dump(self):
+        try:
+            write_file_atomic(self.path, json.dumps(collect_stats(), indent=2), backup=False); self.dumps += 1
+            LOG.debug("Stats written to %s", self.path)
+        except (OSError, TypeError, ValueError) as e:
+            LOG.error("Could not write stats: %s", e)
+
+    def close(self):
+        """Stops the exporter, writing a final snapshot if any were written before."""
+        self._stopping = True; self._wake.set(); self._thread.join(timeout=2)
+        if self.dumps: self.dump()
+
+def collect_stats():
+    """Gathers latency, queue, serial, render and persistence stats into one dict."""
+    return {"timestamp": time.time(), "latency": STATS.snapshot(),
+            "executor": EXECUTOR.stats() if EXECUTOR else None,
+            "serial": SERIAL_READER.stats() if SERIAL_READER else None,
+            "decks": SERIAL_HUB.stats() if SERIAL_HUB else None,
+            "renderer": RENDERER.stats() if RENDERER else None,
+            "watcher": dict(WATCHER_STATS) or None,
+            "launcher": LAUNCHER.stats() if LAUNCHER else None,
+            "macro_jitter": MACRO_JITTER.summary(),
+            "config_writer": {"requests": CONFIG_WRITER.requests, "writes": CONFIG_WRITER.writes} if CONFIG_WRITER else None,
+            "config_watcher": CONFIG_WATCHER.stats() if CONFIG_WATCHER else None}
+
+def start_stats_exporter():
+    """Starts the stats exporter. Must be called from the main thread so SIGUSR1 can be hooked."""
+    global STATS_EXPORTER
+    STATS_EXPORTER = StatsExporter(STATS_FILE, CONFIG["settings"].get("stats_interval", 0))
+    if hasattr(signal, "SIGUSR1"): signal.signal(signal.SIGUSR1, lambda signum, frame: STATS_EXPORTER.request_dump())
+
+# --- Process Launcher ---
+LAUNCHER = None
+REAP_INTERVAL = 1.0          # seconds between checks for exited children while any are running
+INSTANCE_POLICIES = ["multiple", "skip", "reuse"]
+EXE_CACHE = {}
+
+def resolve_executable(path):
+    """Returns the full path of `path`, searching PATH for bare names. Cached, since it hits the filesystem."""
+    resolved = EXE_CACHE.get(path)
+    if resolved is None:
+        expanded = os.path.expandvars(os.path.expanduser(path))
+        resolved = EXE_CACHE[path] = shutil.which(expanded) or expanded
+    return resolved
+
+def split_command(command):
+    """Splits an exe action's value into an argv tuple with the program resolved, e.g. "notepad.exe C:\\notes.txt".
+
+    A value that names an existing program as a whole stays in one piece, so unquoted paths with
+    spaces keep working. Otherwise it is split like a command line; on Windows quotes group words
+    but backslashes are left alone.
+    """
+    resolved = resolve_executable(command)
+    if os.path.isfile(resolved): return (resolved,)
+    try: argv = shlex.split(command, posix=os.name != "nt")
+    except ValueError: return (resolved,)
+    if os.name == "nt": argv = [arg[1:-1] if len(arg) > 1 and arg[0] == arg[-1] == '"' else arg for arg in argv]
+    if not argv: return (resolved,)
+    return (resolve_executable(argv[0]),) + tuple(argv[1:])
+
+def instance_policy(action):
+    policy = action.get("instance", "multiple")
+    if policy not in INSTANCE_POLICIES:
+        LOG.warning("Unknown instance policy '%s', using 'multiple'.", policy); return "multiple"
+    return policy
+
+class LaunchManager:
+    """Starts the processes for exe and open_with actions and keeps track of them.
+
+    Launches are queued and started on the launcher's own thread, so an action
+    never waits for process creation. Every child stays in a registry until it
+    exits and is then reaped, so none are left behind as zombies. While an
+    earlier instance of the same command is still running or queued, the
+    action's `instance` policy decides what a new launch does:
+      - "multiple": start another one (the default).
+      - "skip":     do nothing.
+      - "reuse":    bring the running instance's window to the front, or do nothing if it has none.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._queued = {}    # argv -> number of queued launches
+        self._live = {}      # argv -> list of running Popen objects
+        self._stopping = False
+        self._provider = None
+        self._counters = {"launched": 0, "failed": 0, "reaped": 0, "deduplicated": 0, "reused": 0}
+        self._thread = threading.Thread(target=self._run, name="Launcher", daemon=True)
+        self._thread.start()
+
+    def launch(self, argv, policy="multiple"):
+        """Queues `argv` to be started. Returns False if the launch was deduplicated against a queued one."""
+        with self._cond:
+            if self._stopping: return False
+            if policy != "multiple" and self._queued.get(argv):
+                self._counters["deduplicated"] += 1; return False
+            self._queue.append((argv, policy)); self._queued[argv] = self._queued.get(argv, 0) + 1
+            self._cond.notify()
+            return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._queue and not self._stopping: self._cond.wait(REAP_INTERVAL if self._live else None)
+                if self._stopping: return
+                item = self._queue.popleft() if self._queue else None
+            self._reap()
+            if item: self._start(*item)
+
+    def _start(self, argv, policy):
+        with self._cond:
+            self._queued[argv] -= 1
+            if not self._queued[argv]: del self._queued[argv]
+            running = self._live.get(argv)
+        if running and policy != "multiple":
+            reused = policy == "reuse" and self._activate(running[-1].pid)
+            with self._cond:
+                self._counters["deduplicated"] += 1
+                if reused: self._counters["reused"] += 1
+            LOG.info("'%s' is already running, %s.", os.path.basename(argv[0]), "brought it to the front" if reused else "not starting another")
+            return
+        try: proc = subprocess.Popen(list(argv))
+        except Exception as e:
+            EXE_CACHE.pop(argv[0], None)   # it may have moved; resolve again next time
+            with self._cond: self._counters["failed"] += 1
+            LOG.error("Could not run '%s': %s", " ".join(argv), e)
+            return
+        with self._cond:
+            self._live.setdefault(argv, []).append(proc); self._counters["launched"] += 1
+
+    def _reap(self):
+        with self._cond: live = [(argv, list(procs)) for argv, procs in self._live.items()]
+        exited = [(argv, proc) for argv, procs in live for proc in procs if proc.poll() is not None]
+        if not exited: return
+        with self._cond:
+            for argv, proc in exited:
+                procs = self._live.get(argv, [])
+                if proc in procs: procs.remove(proc); self._counters["reaped"] += 1
+                if not procs: self._live.pop(argv, None)
+
+    def _activate(self, pid):
+        if self._provider is None: self._provider = create_window_provider() or False
+        if not self._provider: return False
+        try: return self._provider.activate(pid)
+        except WindowProviderError: return False
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._counters)
+            stats.update(live=sum(len(procs) for procs in self._live.values()), queued=len(self._queue))
+            return stats
+
+    def close(self, timeout=2):
+        """Stops launching. Running children are left alone; they are not killed."""
+        with self._cond: self._stopping = True; self._cond.notify_all()
+        self._thread.join(timeout=timeout)
+        self._reap()
+
+def start_launcher():
+    global LAUNCHER
+    if LAUNCHER is None: LAUNCHER = LaunchManager()
+
+# --- Action Executor ---
+class ActionJob:
+    """A queued action for one button, carrying its own cancel flag and latency trace."""
+    __slots__ = ("key", "action", "enqueued_at", "cancel", "trace")
+
+    def __init__(self, key, action, trace=None):
+        self.key = key
+        self.action = action
+        self.enqueued_at = time.monotonic()
+        self.cancel = threading.Event()
+        self.trace = trace
+
+class ActionExecutor:
+    """Runs actions on a pool of worker threads.
+
+    Jobs for the same button run one at a time in FIFO order, while different
+    buttons run in parallel. When the bounded queue is full, `policy` decides
+    what happens to a new job:
+      - "drop":     the new job is discarded.
+      - "coalesce": the button's still-pending jobs are replaced by the new one.
+      - "replace":  the button's running job is cancelled and its pending jobs discarded.
+                    If it has no pending jobs, that frees no room, so the new job is
+                    dropped and the running one is left alone.
+    """
+
+    def __init__(self, workers=EXECUTOR_WORKERS, max_queue=EXECUTOR_QUEUE_SIZE, policy="drop"):
+        self.max_queue = max_queue
+        self.policy = policy if policy in QUEUE_POLICIES else "drop"
+        self._cond = threading.Condition()
+        self._pending = {}      # key -> deque of ActionJob waiting to run
+        self._ready = deque()   # keys that may have runnable work
+        self._running = {}      # key -> ActionJob currently executing
+        self._depth = 0
+        self._stopping = False
+        self._counters = {"submitted": 0, "executed": 0, "failed": 0, "dropped": 0, "coalesced": 0, "replaced": 0, "max_depth": 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._threads = [threading.Thread(target=self._worker, name=f"ActionWorker-{i}", daemon=True) for i in range(max(1, workers))]
+        for thread in self._threads: thread.start()
+
+    def submit(self, key, action, trace=None):
+        """Queues an action for the given button. Returns False if it was dropped."""
+        with self._cond:
+            if self._stopping: return False
+            self._counters["submitted"] += 1
+            if self._depth >= self.max_queue and not self._make_room(key):
+                self._counters["dropped"] += 1
+                LOG.warning("Action queue full, dropped action for button %s.", key)
+                return False
+            pending = self._pending.setdefault(key, deque())
+            pending.append(ActionJob(key, action, trace)); self._depth += 1
+            self._counters["max_depth"] = max(self._counters["max_depth"], self._depth)
+            if key not in self._running: self._ready.append(key); self._cond.notify()
+            return True
+
+    def _make_room(self, key):
+        """Applies the queue-full policy for a new job on `key`. Must hold the lock."""
+        pending = self._pending.get(key)
+        if self.policy == "coalesce":
+            if not pending: return False
+            self._counters["coalesced"] += len(pending); self._depth -= len(pending); pending.clear()
+            return True
+        if self.policy == "replace":
+            if not pending: return False   # decide before cancelling anything
+            running = self._running.get(key)
+            if running: running.cancel.set(); self._counters["replaced"] += 1
+            self._counters["replaced"] += len(pending); self._depth -= len(pending); pending.clear()
+            return True
+        return False
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._ready and not self._stopping: self._cond.wait()
+                if self._stopping: return
+                key = self._ready.popleft()
+                pending = self._pending.get(key)
+                # A key can be queued more than once; skip it if it is busy or already drained.
+                if not pending or key in self._running: continue
+                job = pending.popleft(); self._depth -= 1
+                self._running[key] = job
+                waited = time.monotonic() - job.enqueued_at
+                self._wait_total += waited; self._wait_max = max(self._wait_max, waited)
+            trace = job.trace
+            if trace: trace[T_START] = time.perf_counter_ns()
+            try:
+                execute_action(job.action, job.cancel)
+            except Exception as e:
+                LOG.error("Action for button %s failed: %s", key, e)
+                with self._cond: self._counters["failed"] += 1
+            finally:
+                if trace: trace[T_END] = time.perf_counter_ns(); STATS.complete(trace, getattr(job.action, "type", "none"))
+                with self._cond:
+                    self._running.pop(key, None); self._counters["executed"] += 1
+                    if self._pending.get(key): self._ready.append(key); self._cond.notify()
+                    else: self._pending.pop(key, None)
+
+    def stats(self):
+        """Returns a snapshot of queue depth, wait times and job counters."""
+        with self._cond:
+            started = self._counters["executed"] + len(self._running)
+            stats = dict(self._counters)
+            stats.update(depth=self._depth, running=len(self._running), policy=self.policy,
+                         avg_wait_ms=round(self._wait_total / started * 1000, 2) if started else 0.0,
+                         max_wait_ms=round(self._wait_max * 1000, 2))
+            return stats
+
+    def cancel(self, key):
+        """Stops the job running for `key` and discards its pending ones. Returns True if a job was running."""
+        with self._cond:
+            pending = self._pending.get(key)
+            if pending: self._depth -= len(pending); pending.clear()
+            running = self._running.get(key)
+            if running is None: return False
+            running.cancel.set()
+            return True
+
+    def shutdown(self, timeout=2):
+        """Cancels running jobs, discards pending ones and stops the workers."""
+        with self._cond:
+            self._stopping = True
+            for job in self._running.values(): job.cancel.set()
+            self._pending.clear(); self._ready.clear(); self._depth = 0
+            self._cond.notify_all()
+        for thread in self._threads: thread.join(timeout=timeout)
+
+def start_executor():
+    """Creates the global action executor using the configured queue policy."""
+    global EXECUTOR
+    if EXECUTOR: EXECUTOR.shutdown()
+    EXECUTOR = ActionExecutor(policy=CONFIG["settings"].get("queue_policy", "drop"))
+    LOG.debug("Action executor started (%d workers, policy '%s').", EXECUTOR_WORKERS, EXECUTOR.policy)
 
 def configure_button(button_number):
     """Opens a Tkinter window to configure button actions for the active profile."""
-    global CONFIG, ACTIVE_PROFILE_NAME
-    active_profile_data = CONFIG["profiles"][ACTIVE_PROFILE_NAME]
-    root = tk.Tk(); root.title(f"Configure Button {button_number} ({ACTIVE_PROFILE_NAME})"); root.attributes('-topmost', True)
+    global CONFIG
+    profile_name = ACTIVE_PROFILE.name
+    root = tk.Tk(); root.title(f"Configure Button {button_number} ({profile_name})"); root.attributes('-topmost', True)
     
     def create_action_frame(parent, title, action_key):
         frame = ttk.LabelFrame(parent, text=title, padding=(10, 5)); frame.pack(fill="x", expand=True, padx=10, pady=5)
-        action_config = active_profile_data.get(action_key, {"type": "none", "value": ""})
-        choice_var = tk.StringVar(value=action_config["type"])
+        action_config = resolve_binding(profile_name, action_key)
+        choice_var = tk.StringVar(value=action_config.get("type", "none"))
         
         ui_vars = {
             "value": tk.StringVar(value=action_config.get("value", "")),
@@ -210,7 +1479,7 @@ def configure_button(button_number):
                 def copy_example(): ui_vars["macro_text"].delete("1.0", tk.END); ui_vars["macro_text"].insert("1.0", "# One action per line. Format is type:value\nkeystroke:alt+tab\ndelay:500\nkeystroke:ctrl+a")
                 ttk.Button(frame, text="Copy Example to Editor", command=copy_example).pack(pady=(5,5))
                 value = action_config.get("value", [])
-                if isinstance(value, list) and value: ui_vars["macro_text"].insert("1.0", "\n".join([f"{step['type']}:{step['value']}" for step in value]))
+                if isinstance(value, list) and value: ui_vars["macro_text"].insert("1.0", "\n".join([f"{step['type']}:{step['value']}" if step.get('value', '') != '' else step['type'] for step in value]))
 
             elif action_type == "switch_profile": ttk.Label(frame, text="This action cycles to the next profile.").pack(pady=5)
 
@@ -221,14 +1490,14 @@ def configure_button(button_number):
             action_type = choice_var.get()
             if action_type == "open_with": return f"{ui_vars['app_path'].get()}|{ui_vars['arg_path'].get()}"
             if action_type == "keystroke": parts = []; [parts.append(m) for m,v in [("ctrl",ui_vars["ctrl"]),("alt",ui_vars["alt"]),("shift",ui_vars["shift"])] if v.get()]; parts.append(ui_vars["main_key"].get().strip().lower()); return "+".join(p for p in parts if p)
-            if action_type == "macro" and ui_vars["macro_text"]: return [{"type": t.strip(), "value": v.strip()} for t,v in [l.split(":",1) for l in ui_vars["macro_text"].get("1.0", tk.END).strip().splitlines() if l.strip() and not l.strip().startswith("#") and ":" in l]]
+            if action_type == "macro" and ui_vars["macro_text"]: return [{"type": t.strip(), "value": v.strip()} for t,v in [(l.split(":",1) if ":" in l else (l, "")) for l in ui_vars["macro_text"].get("1.0", tk.END).strip().splitlines() if l.strip() and not l.strip().startswith("#")]]
             if action_type == "switch_profile": return "next"
             return ui_vars["value"].get()
         return choice_var, get_value
     
     press_choice, get_press_value = create_action_frame(root, "Press Action", f"BUTTON_{button_number}_PRESS")
     hold_choice, get_hold_value = create_action_frame(root, "Hold Action", f"BUTTON_{button_number}_HOLD")
-    def on_save(): active_profile_data[f"BUTTON_{button_number}_PRESS"] = {"type": press_choice.get(), "value": get_press_value()}; active_profile_data[f"BUTTON_{button_number}_HOLD"] = {"type": hold_choice.get(), "value": get_hold_value()}; save_config(); root.destroy()
+    def on_save(): set_binding(profile_name, f"BUTTON_{button_number}_PRESS", {"type": press_choice.get(), "value": get_press_value()}); set_binding(profile_name, f"BUTTON_{button_number}_HOLD", {"type": hold_choice.get(), "value": get_hold_value()}); compile_config(); save_config(); root.destroy()
     ttk.Button(root, text="Save and Close", command=on_save).pack(pady=20)
     root.mainloop()
 
@@ -250,7 +1519,7 @@ def get_button_text(action):
 
 def manage_profiles():
     """Opens a Tkinter window to manage all profile settings."""
-    global ACTIVE_PROFILE_NAME, CONFIG
+    global CONFIG
     root = tk.Tk()
     root.title("Profile Manager")
     root.attributes('-topmost', True)
@@ -261,104 +1530,281 @@ def manage_profiles():
         CONFIG["settings"]["automation_enabled"] = automation_var.get()
         save_config()
         status = "enabled" if automation_var.get() else "disabled"
-        print(f"Automatic profile switching {status}.", flush=True)
+        LOG.info("Automatic profile switching %s.", status)
     ttk.Checkbutton(automation_toggle_frame, text="Enable Automatic Profile Switching", variable=automation_var, command=toggle_automation).pack()
     selection_frame = ttk.LabelFrame(root, text="Active Profile", padding=10)
     selection_frame.pack(fill="x", padx=10, pady=5)
-    profile_var = tk.StringVar(value=ACTIVE_PROFILE_NAME)
+    profile_var = tk.StringVar(value=ACTIVE_PROFILE.name)
     profile_dropdown = ttk.Combobox(selection_frame, textvariable=profile_var, values=list(CONFIG["profiles"].keys()), state="readonly")
     profile_dropdown.pack()
     def on_profile_select(*args):
-        global ACTIVE_PROFILE_NAME
         selected = profile_var.get()
-        if selected in CONFIG["profiles"]:
-            ACTIVE_PROFILE_NAME = selected
-            CONFIG["settings"]["active_profile"] = selected
+        if set_active_profile(selected):
             save_config()
-            print(f"Manually switched to profile: {ACTIVE_PROFILE_NAME}", flush=True)
+            LOG.info("Manually switched to profile: %s", selected)
     profile_var.trace("w", on_profile_select)
     management_frame = ttk.LabelFrame(root, text="Manage Profiles", padding=10)
     management_frame.pack(fill="x", padx=10, pady=5)
     new_profile_var = tk.StringVar()
     ttk.Entry(management_frame, textvariable=new_profile_var, width=20).grid(row=0, column=0, padx=5)
-    def create_profile():
+    def create_profile(base=None):
         name = new_profile_var.get().strip()
         if name and name not in CONFIG["profiles"]:
-            CONFIG["profiles"][name] = {}
-            for i in range(1, 10):
-                for action in ["PRESS", "HOLD"]: CONFIG["profiles"][name][f"BUTTON_{i}_{action}"] = {"type": "none", "value": ""}
-            save_config()
+            CONFIG["profiles"][name] = {PROFILE_BASE_KEY: base} if base else {}
+            compile_config(); save_config()
             profile_dropdown['values'] = list(CONFIG["profiles"].keys()); new_profile_var.set("")
-            print(f"Created profile: {name}", flush=True)
+            LOG.info("Created profile: %s%s", name, f" (inherits '{base}')" if base else "")
     ttk.Button(management_frame, text="Create", command=create_profile).grid(row=0, column=1)
+    ttk.Button(management_frame, text="Create Inheriting Selected", command=lambda: create_profile(profile_var.get())).grid(row=0, column=2)
     def rename_profile():
         new_name = new_profile_var.get().strip(); old_name = profile_var.get()
         if new_name and old_name and new_name not in CONFIG["profiles"]:
             CONFIG["profiles"][new_name] = CONFIG["profiles"].pop(old_name)
             if CONFIG["settings"]["active_profile"] == old_name: CONFIG["settings"]["active_profile"] = new_name
+            for profile in CONFIG["profiles"].values():
+                if profile.get(PROFILE_BASE_KEY) == old_name: profile[PROFILE_BASE_KEY] = new_name
             for exe, prof in list(CONFIG["automation"].items()):
                 if prof == old_name: CONFIG["automation"][exe] = new_name
-            save_config(); profile_dropdown['values'] = list(CONFIG["profiles"].keys()); profile_var.set(new_name); new_profile_var.set("")
-            print(f"Renamed '{old_name}' to '{new_name}'", flush=True)
+            for rule in CONFIG["automation_rules"]:
+                if rule.get("profile") == old_name: rule["profile"] = new_name
+            compile_config(); save_config(); profile_dropdown['values'] = list(CONFIG["profiles"].keys()); profile_var.set(new_name); new_profile_var.set("")
+            LOG.info("Renamed '%s' to '%s'", old_name, new_name)
     ttk.Button(management_frame, text="Rename Selected", command=rename_profile).grid(row=1, column=1)
     def delete_profile():
         name_to_delete = profile_var.get()
         if name_to_delete and len(CONFIG["profiles"]) > 1:
             if messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete the profile '{name_to_delete}'?"):
-                del CONFIG["profiles"][name_to_delete]
+                detach_profile(name_to_delete); del CONFIG["profiles"][name_to_delete]
                 for exe, prof in list(CONFIG["automation"].items()):
                     if prof == name_to_delete: del CONFIG["automation"][exe]
+                CONFIG["automation_rules"] = [rule for rule in CONFIG["automation_rules"] if rule.get("profile") != name_to_delete]
                 new_active = next(iter(CONFIG["profiles"])); CONFIG["settings"]["active_profile"] = new_active
-                save_config(); profile_dropdown['values'] = list(CONFIG["profiles"].keys()); profile_var.set(new_active)
-                print(f"Deleted profile: {name_to_delete}", flush=True)
+                compile_config(); save_config(); profile_dropdown['values'] = list(CONFIG["profiles"].keys()); profile_var.set(new_active)
+                LOG.info("Deleted profile: %s", name_to_delete)
     ttk.Button(management_frame, text="Delete Selected", command=delete_profile).grid(row=2, column=1)
     if AUTOMATION_ENABLED:
         automation_frame = ttk.LabelFrame(root, text="Automatic Profile Switching", padding=10)
-        automation_frame.pack(fill="x", padx=10, pady=5); ttk.Label(automation_frame, text="Link .exe name to a profile:").pack()
+        automation_frame.pack(fill="x", padx=10, pady=5); ttk.Label(automation_frame, text="Link a program and/or window title to a profile:").pack()
         exe_var = tk.StringVar(); ttk.Label(automation_frame, text="Executable Name (e.g., chrome.exe):").pack(); ttk.Entry(automation_frame, textvariable=exe_var).pack()
+        title_var = tk.StringVar(); ttk.Label(automation_frame, text="Window Title (optional):").pack(); ttk.Entry(automation_frame, textvariable=title_var).pack()
+        match_var = tk.StringVar(value="exact"); priority_var = tk.StringVar(value="0")
+        rule_row = ttk.Frame(automation_frame); rule_row.pack()
+        ttk.Label(rule_row, text="Match:").pack(side="left"); ttk.Combobox(rule_row, textvariable=match_var, values=RULE_KINDS, state="readonly", width=7).pack(side="left")
+        ttk.Label(rule_row, text="Priority:").pack(side="left"); ttk.Entry(rule_row, textvariable=priority_var, width=5).pack(side="left")
         profile_for_exe_var = tk.StringVar(); ttk.Label(automation_frame, text="Profile to Switch To:").pack(); ttk.Combobox(automation_frame, textvariable=profile_for_exe_var, values=list(CONFIG["profiles"].keys()), state="readonly").pack()
+        def describe_rules():
+            entries = [(f"{k} -> {v}", ("automation", k)) for k, v in CONFIG["automation"].items()]
+            for index, rule in enumerate(CONFIG["automation_rules"]):
+                target = " + ".join(f"{field} {rule.get('match', 'exact')} '{rule[field]}'" for field in ("exe", "title") if rule.get(field))
+                entries.append((f"{target} [{rule.get('priority', 0)}] -> {rule.get('profile')}", ("automation_rules", index)))
+            return entries
         def add_mapping():
-            exe_name = exe_var.get().strip().lower(); prof_name = profile_for_exe_var.get()
-            if exe_name and prof_name: CONFIG["automation"][exe_name] = prof_name; save_config(); update_automation_list(); print(f"Added automation: '{exe_name}' -> '{prof_name}'", flush=True)
+            exe_name = exe_var.get().strip().lower(); title = title_var.get().strip(); kind = match_var.get(); prof_name = profile_for_exe_var.get()
+            if not (exe_name or title) or not prof_name: return
+            try:
+                priority = int(priority_var.get() or 0)
+                for part in (exe_name, title):
+                    if part: re.compile(rule_fragment(kind, part))
+            except (ValueError, re.error) as e: messagebox.showerror("Invalid Rule", str(e)); return
+            if kind == "exact" and exe_name and not title and priority == 0: CONFIG["automation"][exe_name] = prof_name
+            else: CONFIG["automation_rules"].append(dict([(key, value) for key, value in (("exe", exe_name), ("title", title)) if value], match=kind, priority=priority, profile=prof_name))
+            compile_automation(); save_config(); update_automation_list(); LOG.info("Added automation: '%s' '%s' (%s) -> '%s'", exe_name, title, kind, prof_name)
         ttk.Button(automation_frame, text="Add/Update Mapping", command=add_mapping).pack(pady=5)
-        automation_list_var = tk.StringVar(value=[f"{k} -> {v}" for k, v in CONFIG["automation"].items()])
-        listbox = tk.Listbox(automation_frame, listvariable=automation_list_var, height=4); listbox.pack()
+        automation_list_var = tk.StringVar(value=[text for text, _ in describe_rules()])
+        listbox = tk.Listbox(automation_frame, listvariable=automation_list_var, height=4, width=50); listbox.pack()
         def update_automation_list():
-             listbox.delete(0, tk.END); [listbox.insert(tk.END, f"{k} -> {v}") for k, v in CONFIG["automation"].items()]
+             listbox.delete(0, tk.END); [listbox.insert(tk.END, text) for text, _ in describe_rules()]
         def delete_mapping():
-            selected = listbox.get(tk.ACTIVE)
-            if selected: exe_name = selected.split(" -> ")[0]; del CONFIG["automation"][exe_name]; save_config(); update_automation_list()
+            selected = listbox.curselection() or (listbox.index(tk.ACTIVE),)
+            entries = describe_rules()
+            if not entries or selected[0] >= len(entries): return
+            where, key = entries[selected[0]][1]
+            del CONFIG[where][key]; compile_automation(); save_config(); update_automation_list()
         ttk.Button(automation_frame, text="Delete Selected Mapping", command=delete_mapping).pack()
     root.mainloop()
 
+class TextCache:
+    """Bounded LRU of rendered text Surfaces, keyed by (font, text, color, antialias).
+
+    Labels repeat a lot: every tile has an "Edit" and a number, and switching
+    between profiles shows the same labels again. Surfaces from the cache are
+    shared, so callers must only blit them, never draw on them. Entries are
+    evicted, oldest first, once their pixel data exceeds `max_bytes`. Rendering
+    happens on the UI thread, but a config reload may resize the cache from the
+    watcher thread, so both take the lock.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()   # key -> (Surface, size in bytes)
+        self._lock = threading.Lock()
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key); self.hits += 1
+                return entry[0]
+            self.misses += 1
+            surface = font.render(text, antialias, color)
+            size = surface.get_pitch() * surface.get_height()
+            if size <= self.max_bytes:
+                self._entries[key] = (surface, size); self.bytes += size
+                self._evict()
+            return surface
+
+    def resize(self, max_bytes):
+        with self._lock: self.max_bytes = max_bytes; self._evict()
+
+    def _evict(self):
+        """Drops the oldest entries until the cache fits. Call with the lock held."""
+        while self.bytes > self.max_bytes:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.bytes -= size; self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "kb": round(self.bytes / 1024, 1), "max_kb": self.max_bytes // 1024,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+def text_cache_bytes():
+    try: return max(0, int(CONFIG["settings"].get("text_cache_kb", TEXT_CACHE_KB))) * 1024
+    except (TypeError, ValueError): return TEXT_CACHE_KB * 1024
+
+def start_text_cache():
+    """Creates the shared text cache with the configured size. A size of 0 turns caching off."""
+    global TEXT_CACHE
+    TEXT_CACHE = TextCache(text_cache_bytes())
+
+def render_text(font, text, color, antialias=True):
+    """Renders `text` through the shared cache. The Surface may be shared: blit it, do not draw on it."""
+    if TEXT_CACHE is None: return font.render(text, antialias, color)
+    return TEXT_CACHE.render(font, text, color, antialias)
+
+class DeckRenderer:
+    """Retained-mode renderer for the main window.
+
+    Each button tile is pre-rendered to its own Surface and only rebuilt when its
+    profile entry or flash state changes. Only regions that changed since the
+    last frame are pushed to the display.
+    """
+    HEADER_RECT = (0, 0, 460, 58)
+    TILE_SIZE = (110, 140)
+
+    def __init__(self, screen):
+        self.screen = screen
+        self._tiles = {}        # (btn_num, flashing) -> (CompiledProfile it was built from, Surface)
+        self._plates = {}       # (btn_num, flashing) -> the parts of a tile that no profile changes
+        self._drawn = {}        # region key -> signature currently on screen
+        self._full_redraw = True
+        self.frames_drawn = 0
+        self.rects_updated = 0
+        self._cpu_start = time.thread_time()
+        self._wall_start = time.monotonic()
+
+    def invalidate(self):
+        """Forces the next draw to repaint the whole window (e.g. after it was uncovered)."""
+        self._full_redraw = True
+
+    def _render_plate(self, btn_num, flashing):
+        plate = pygame.Surface(self.TILE_SIZE)
+        plate.fill(COLOR_BACKGROUND)
+        pygame.draw.rect(plate, COLOR_BUTTON_FLASH if flashing else COLOR_BUTTON, (0, 0, 110, 110), border_radius=10)
+        plate.blit(render_text(TITLE_FONT, str(btn_num), COLOR_TEXT), (10, 5))
+        edit_rect = pygame.Rect(0, 115, 110, 25)
+        pygame.draw.rect(plate, COLOR_EDIT_BUTTON, edit_rect, border_radius=5)
+        edit_surf = render_text(SMALL_FONT, "Edit", COLOR_TEXT)
+        plate.blit(edit_surf, (edit_rect.centerx - edit_surf.get_width() // 2, edit_rect.centery - edit_surf.get_height() // 2))
+        return plate
+
+    def _render_tile(self, btn_num, flashing, profile):
+        plate = self._plates.get((btn_num, flashing))
+        if plate is None: plate = self._plates[(btn_num, flashing)] = self._render_plate(btn_num, flashing)
+        tile = plate.copy()
+        press_action, hold_action = profile.bindings[btn_num]
+        tile.blit(render_text(SMALL_FONT, f"Press: {press_action.label}", COLOR_TEXT), (10, 45))
+        tile.blit(render_text(SMALL_FONT, f"Hold: {hold_action.label}", COLOR_TEXT), (10, 75))
+        return tile
+
+    def _tile(self, btn_num, flashing, profile):
+        cached = self._tiles.get((btn_num, flashing))
+        if cached is None or cached[0] is not profile:
+            cached = (profile, self._render_tile(btn_num, flashing, profile))
+            self._tiles[(btn_num, flashing)] = cached
+        return cached[1]
+
+    def draw(self):
+        """Repaints dirty regions and pushes only those to the display."""
+        screen, rects = self.screen, []
+        if self._full_redraw:
+            screen.fill(COLOR_BACKGROUND); self._drawn.clear()
+        profile = ACTIVE_PROFILE
+        profile_name = header_sig = profile.name
+        if self._drawn.get("header") != header_sig:
+            header_rect = pygame.Rect(self.HEADER_RECT)
+            screen.fill(COLOR_BACKGROUND, header_rect)
+            profile_text = render_text(TITLE_FONT, f"Profile: {profile_name}", COLOR_TEXT)
+            screen.blit(profile_text, (screen.get_width() // 2 - profile_text.get_width() // 2, 5))
+            manage_text = render_text(SMALL_FONT, "(Manage Profiles)", COLOR_ACCENT)
+            screen.blit(manage_text, (screen.get_width() // 2 - manage_text.get_width() // 2, 35))
+            self._drawn["header"] = header_sig; rects.append(header_rect)
+        now = ticks_ms()
+        for i in range(9):
+            x, y, btn_num = 20 + (i % 3) * 140, 20 + (i // 3) * 160 + 60, i + 1
+            flashing = now < FLASH_ANIMATIONS.get(btn_num, 0)
+            tile_sig = (profile, flashing)
+            if self._drawn.get(btn_num) == tile_sig: continue
+            screen.blit(self._tile(btn_num, flashing, profile), (x, y))
+            self._drawn[btn_num] = tile_sig; rects.append(pygame.Rect((x, y), self.TILE_SIZE))
+        if self._drawn.get("port") != ARDUINO_PORT:
+            port_rect = pygame.Rect(0, screen.get_height() - 25, screen.get_width(), 25)
+            screen.fill(COLOR_BACKGROUND, port_rect)
+            screen.blit(render_text(SMALL_FONT, f"Port: {ARDUINO_PORT}", COLOR_ACCENT), (10, screen.get_height() - 20))
+            self._drawn["port"] = ARDUINO_PORT; rects.append(port_rect)
+        if self._full_redraw:
+            pygame.display.flip(); self._full_redraw = False
+        elif rects:
+            pygame.display.update(rects)
+        else:
+            return
+        self.frames_drawn += 1; self.rects_updated += len(rects)
+
+    def next_timeout(self):
+        """Milliseconds the main loop may sleep before a flash animation needs repainting."""
+        now = ticks_ms(); timeout = IDLE_WAIT_MS
+        for btn_num, expires in list(FLASH_ANIMATIONS.items()):
+            drawn = self._drawn.get(btn_num)
+            if expires > now: timeout = min(timeout, expires - now + 1)
+            elif drawn and drawn[1]: timeout = 0   # expired after the last draw; repaint now
+            else: FLASH_ANIMATIONS.pop(btn_num, None)
+        return max(timeout, 1)   # pygame.event.wait(0) would block until the next event
+
+    def stats(self):
+        """Returns frames drawn and the UI thread's CPU usage since startup."""
+        cpu = time.thread_time() - self._cpu_start
+        wall = max(time.monotonic() - self._wall_start, 1e-9)
+        return {"frames_drawn": self.frames_drawn, "rects_updated": self.rects_updated,
+                "ui_cpu_seconds": round(cpu, 3), "ui_cpu_percent": round(cpu / wall * 100, 2),
+                "text_cache": TEXT_CACHE.stats() if TEXT_CACHE else None}
+
+def ticks_ms():
+    """Monotonic milliseconds, used for flash animations so the serial thread never needs pygame."""
+    return int(time.monotonic() * 1000)
+
+def request_redraw():
+    """Wakes the UI loop from another thread so it can repaint changed state."""
+    if RENDERER is None: return
+    try: pygame.event.post(pygame.event.Event(UI_REFRESH_EVENT))
+    except pygame.error: pass
+
 def draw_ui():
-    """Draws the entire UI, including buttons and port info."""
-    global ACTIVE_PROFILE_NAME, ARDUINO_PORT
-    SCREEN.fill(COLOR_BACKGROUND)
-    profile_text = TITLE_FONT.render(f"Profile: {ACTIVE_PROFILE_NAME}", True, COLOR_TEXT)
-    SCREEN.blit(profile_text, (SCREEN.get_width() // 2 - profile_text.get_width() // 2, 5))
-    manage_text = SMALL_FONT.render("(Manage Profiles)", True, COLOR_ACCENT)
-    SCREEN.blit(manage_text, (SCREEN.get_width() // 2 - manage_text.get_width() // 2, 35))
-    active_profile_data = CONFIG["profiles"].get(ACTIVE_PROFILE_NAME, {})
-    for i in range(9):
-        x, y, btn_num = 20 + (i % 3) * 140, 20 + (i // 3) * 160 + 60, i + 1
-        color = COLOR_BUTTON_FLASH if btn_num in FLASH_ANIMATIONS and pygame.time.get_ticks() < FLASH_ANIMATIONS[btn_num] else COLOR_BUTTON
-        pygame.draw.rect(SCREEN, color, (x, y, 110, 110), border_radius=10)
-        num_text = TITLE_FONT.render(str(btn_num), True, COLOR_TEXT)
-        SCREEN.blit(num_text, (x + 10, y + 5))
-        p_text = get_button_text(active_profile_data.get(f"BUTTON_{btn_num}_PRESS", {}))
-        p_surf = SMALL_FONT.render(f"Press: {p_text}", True, COLOR_TEXT)
-        SCREEN.blit(p_surf, (x + 10, y + 45))
-        h_text = get_button_text(active_profile_data.get(f"BUTTON_{btn_num}_HOLD", {}))
-        h_surf = SMALL_FONT.render(f"Hold: {h_text}", True, COLOR_TEXT)
-        SCREEN.blit(h_surf, (x + 10, y + 75))
-        edit_rect = pygame.Rect(x, y + 115, 110, 25)
-        pygame.draw.rect(SCREEN, COLOR_EDIT_BUTTON, edit_rect, border_radius=5)
-        edit_surf = SMALL_FONT.render("Edit", True, COLOR_TEXT)
-        SCREEN.blit(edit_surf, (edit_rect.centerx - edit_surf.get_width() // 2, edit_rect.centery - edit_surf.get_height() // 2))
-    port_text_surf = SMALL_FONT.render(f"Port: {ARDUINO_PORT}", True, COLOR_ACCENT)
-    SCREEN.blit(port_text_surf, (10, SCREEN.get_height() - 20))
-    pygame.display.flip()
+    """Draws the UI, repainting only buttons and labels whose state changed."""
+    RENDERER.draw()
 
 def find_click_target(mx, my):
     """Determines what UI element was clicked."""
@@ -369,71 +1815,894 @@ def find_click_target(mx, my):
     if 10 <= mx <= 150 and SCREEN.get_height() - 25 <= my <= SCREEN.get_height() - 5: return "port", None
     return None, None
 
-def listen_to_serial():
-    """Listens for incoming data from the serial port and executes actions."""
-    global RUN_THREADS, CONFIG, LAST_ACTION_TIME
-    while RUN_THREADS:
+# --- Serial Protocol ---
+# Firmware v4 sends fixed-size binary frames (little-endian):
+#   [0]    FRAME_SYNC (0xA5)
+#   [1]    protocol version
+#   [2]    button number (1-9)
+#   [3]    event kind (0 = PRESS, 1 = HOLD)
+#   [4:6]  sequence number, wraps at 65536
+#   [6:10] device millis() when the event fired
+#   [10]   CRC-8 (poly 0x07) over bytes 1-9
+# Older firmware sends text lines like "BUTTON_3_HOLD"; the decoder accepts both.
+FRAME_SYNC = 0xA5
+FRAME_VERSION = 1
+FRAME_SIZE = 11
+MAX_TEXT_LINE = 64
+TEXT_BYTES = bytes(range(32, 127)) + b"\t\r\n"   # what a device at the right baud rate prints, e.g. the ESP32 boot log
+BAUD_CANDIDATES = [115200, 9600]
+USB_DEVICE_IDS = ["10C4:EA60", "1A86:7523", "1A86:55D4", "303A:1001", "0403:6001"]  # CP210x, CH340, CH9102, ESP32-S3 USB, FTDI
+SERIAL_READ_TIMEOUT = 0.25
+RECONNECT_MIN_DELAY = 0.05
+RECONNECT_MAX_DELAY = 2.0
+
+def _crc8_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8): crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+CRC8_TABLE = _crc8_table()
+
+def crc8(data):
+    crc = 0
+    for byte in data: crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+def encode_frame(button, kind, seq, device_ms):
+    """Builds a binary event frame, as the firmware would send it."""
+    body = bytes([FRAME_VERSION, button, kind]) + (seq & 0xFFFF).to_bytes(2, "little") + (device_ms & 0xFFFFFFFF).to_bytes(4, "little")
+    return bytes([FRAME_SYNC]) + body + bytes([crc8(body)])
+
+class EventDecoder:
+    """Streaming decoder for serial input.
+
+    feed() accepts arbitrary chunks and returns the complete events found so far as
+    (button, kind, seq, device_ms) tuples; seq and device_ms are None for text lines.
+    Corrupt input is skipped byte by byte until the stream resyncs, and sequence
+    numbers are used to count lost events and drop duplicates.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._last_seq = None
+        self.protocol = None        # "binary" or "text" once the first event is seen
+        self.events = 0
+        self.bad_frames = 0
+        self.discarded_bytes = 0
+        self.noise_bytes = 0        # discarded bytes that are not printable text, a sign of the wrong baud rate
+        self.lost = 0
+        self.duplicates = 0
+
+    def feed(self, data):
+        buf = self._buf; buf += data; events = []
+        while buf:
+            if buf[0] == FRAME_SYNC:
+                if len(buf) < FRAME_SIZE: break
+                event = self._decode_frame(buf)
+                if event is None:
+                    self.bad_frames += 1; self._discard(buf[:1]); del buf[0]; continue
+                del buf[:FRAME_SIZE]
+                if event is not False: events.append(event)
+                continue
+            sync = buf.find(FRAME_SYNC); newline = buf.find(b"\n")
+            if sync != -1 and (newline == -1 or sync < newline):
+                self._discard(buf[:sync]); del buf[:sync]; continue
+            if newline == -1:
+                if len(buf) > MAX_TEXT_LINE: self._discard(buf); buf.clear()
+                break
+            raw = bytes(buf[:newline + 1]); del buf[:newline + 1]
+            line = raw.strip().decode("ascii", errors="ignore")
+            event = SERIAL_EVENTS.get(line)
+            if event is None:
+                if line: self.bad_frames += 1; self._discard(raw)
+                continue
+            self.protocol = "text"; self.events += 1
+            events.append((event[0], event[1], None, None))
+        return events
+
+    def _discard(self, data):
+        self.discarded_bytes += len(data); self.noise_bytes += len(bytes(data).translate(None, TEXT_BYTES))
+
+    def _decode_frame(self, buf):
+        """Returns an event tuple, False for a duplicate, or None if the frame is invalid."""
+        if buf[1] != FRAME_VERSION or not 1 <= buf[2] <= 9 or buf[3] > HOLD: return None
+        if crc8(buf[1:FRAME_SIZE - 1]) != buf[FRAME_SIZE - 1]: return None
+        seq = buf[4] | (buf[5] << 8)
+        device_ms = int.from_bytes(buf[6:10], "little")
+        if self._last_seq is not None:
+            gap = (seq - self._last_seq) & 0xFFFF
+            if gap == 0: self.duplicates += 1; return False
+            if gap < 0x8000: self.lost += gap - 1
+            # A large backwards jump means the device restarted; just follow it.
+        self._last_seq = seq
+        self.protocol = "binary"; self.events += 1
+        return (buf[2], buf[3], seq, device_ms)
+
+    def stats(self):
+        return {"protocol": self.protocol, "events": self.events, "bad_frames": self.bad_frames,
+                "discarded_bytes": self.discarded_bytes, "lost": self.lost, "duplicates": self.duplicates}
+
+def handle_button_event(button_id, kind, trace=None, deck=None):
+    """Debounces a decoded button event, flashes its tile and queues its action.
+
+    `deck` is the extra Deck the event came from, or None for the primary deck,
+    which uses the global active profile and is the one shown in the UI.
+    """
+    current_time = time.time()
+    last_action = LAST_ACTION_TIME if deck is None else deck.last_action
+    if (current_time - last_action.get(button_id, 0)) <= ACTION_COOLDOWN: return
+    last_action[button_id] = current_time
+    if deck is None and RENDERER: FLASH_ANIMATIONS[button_id] = ticks_ms() + FLASH_DURATION_MS; request_redraw()
+    note_activity()
+    if deck is None:
+        action = ACTIVE_PROFILE.bindings[button_id][kind]; key = button_id
+    else:
+        action = deck.profile.bindings[button_id][kind]; key = (deck.name, button_id)
+        if action.type == "switch_profile": deck.switch_profile(); return
+    if action is NO_ACTION: return
+    if action.type == "macro" and EXECUTOR.cancel(key): LOG.info("Action: Macro on button %s stopped.", button_id); return
+    if trace: trace[T_DISPATCH] = time.perf_counter_ns()
+    EXECUTOR.submit(key, action, trace)
+
+class SerialRecorder:
+    """Appends raw serial chunks and their arrival times to a JSON-lines file for benchmarks/harness.py to replay."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a", buffering=1)
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def write(self, data):
+        record = json.dumps({"t": round(time.perf_counter() - self._start, 6), "hex": data.hex()})
+        with self._lock: self._file.write(record + "\n")
+
+    def close(self):
+        with self._lock: self._file.close()
+
+def find_serial_port(preferred, usb_ids=USB_DEVICE_IDS, exclude=()):
+    """Returns the port to open: `preferred` if it is present, otherwise the first port not in `exclude` whose USB VID:PID is in `usb_ids`."""
+    if "://" in preferred: return preferred
+    try: ports = list_ports.comports()
+    except Exception: return preferred
+    if any(port.device == preferred for port in ports): return preferred
+    wanted = {usb_id.upper() for usb_id in usb_ids}
+    for port in ports:
+        if port.device in exclude: continue
+        if port.vid is not None and f"{port.vid:04X}:{port.pid:04X}" in wanted: return port.device
+    return preferred
+
+class SerialReader:
+    """Reads button events from a serial port and passes each one to `on_event(button, kind, trace)`.
+
+    The reader runs as a task on an asyncio event loop, so one thread can serve
+    many decks. Ports with a file descriptor (real serial ports and ptys on
+    Linux/macOS) are watched with loop.add_reader() and cost no thread at all.
+    Ports the loop cannot watch (loop://, COM ports on Windows) are read on the
+    loop's default executor instead, draining everything waiting in one call.
+    When the port drops it reconnects with a fast exponential backoff,
+    re-enumerating ports by USB VID:PID so the device is found again even if its
+    COM name changed. `exclude()` returns ports held by other decks, so USB
+    discovery never steals another deck's port.
+    """
+
+    def __init__(self, port, baudrate, on_event, should_run, usb_ids=USB_DEVICE_IDS, recorder=None, exclude=frozenset):
+        self.port = port
+        self.bauds = [baudrate] + [b for b in BAUD_CANDIDATES if b != baudrate]
+        self.on_event = on_event
+        self.should_run = should_run
+        self.usb_ids = usb_ids
+        self.recorder = recorder
+        self.exclude = exclude
+        self.decoder = EventDecoder()
+        self._reported_loss = (0, 0)
+        self.connected_port = None
+        self.connects = 0
+        self.reads = 0
+        self.bytes_read = 0
+
+    async def run_async(self):
+        """Connects, reads until the port fails, and reconnects, until should_run() is False. Cancel the task to stop it."""
+        loop = asyncio.get_running_loop(); delay = RECONNECT_MIN_DELAY; reported = False
+        while self.should_run():
+            port = await loop.run_in_executor(None, find_serial_port, self.port, self.usb_ids, self.exclude())
+            try:
+                ser = await loop.run_in_executor(None, functools.partial(serial.serial_for_url, port, self.bauds[0], timeout=SERIAL_READ_TIMEOUT))
+                with ser:
+                    ser.reset_input_buffer(); self.connected_port = port; self.connects += 1
+                    LOG.info("Successfully connected to %s at %s baud", port, ser.baudrate)
+                    delay = RECONNECT_MIN_DELAY; reported = False
+                    await self.pump_async(ser)
+            except (serial.SerialException, OSError) as e:
+                if not reported: LOG.warning("Serial port %s unavailable (%s), retrying...", port, e); reported = True
+            finally:
+                self.connected_port = None
+            if self.should_run(): await asyncio.sleep(delay); delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def pump_async(self, ser):
+        """Reads and dispatches events from an open port until it fails, should_run() is False or the task is cancelled."""
+        loop = asyncio.get_running_loop()
+        self.decoder = EventDecoder(); self._reported_loss = (0, 0)
+        fd = getattr(ser, "fd", None)
+        if isinstance(fd, int):
+            failed = loop.create_future()
+            def on_readable():
+                try: data = ser.read(ser.in_waiting or 1)
+                except (serial.SerialException, OSError) as e:
+                    if not failed.done(): failed.set_exception(e)
+                    return
+                if data: self.feed(ser, data)
+            ser.timeout = 0   # only read what is already there; readable-but-empty means the device is gone
+            try: loop.add_reader(fd, on_readable)
+            except NotImplementedError: ser.timeout = SERIAL_READ_TIMEOUT
+            else:
+                try: await failed
+                finally: loop.remove_reader(fd)
+                return
+        while self.should_run():
+            read = loop.run_in_executor(None, ser.read, ser.in_waiting or 1)
+            try: data = await asyncio.shield(read)
+            except asyncio.CancelledError:
+                await asyncio.wait([read])   # never close the port under a read that is still running
+                raise
+            if data: self.feed(ser, data)
+
+    def feed(self, ser, data):
+        """Decodes one chunk read from `ser` and dispatches the events in it."""
+        received_ns = time.perf_counter_ns()
+        self.reads += 1; self.bytes_read += len(data)
+        if self.recorder: self.recorder.write(data)
+        decoder = self.decoder
+        events = decoder.feed(data); decoded_ns = time.perf_counter_ns()
+        for button_id, kind, seq, device_ms in events:
+            LOG.debug("Received: button %d %s (seq %s, device %s ms)", button_id, "HOLD" if kind == HOLD else "PRESS", seq, device_ms)
+            trace = new_trace(received_ns); trace[T_DECODE] = decoded_ns
+            self.on_event(button_id, kind, trace)
+        if (decoder.lost, decoder.duplicates) != self._reported_loss:
+            LOG.warning("Serial events lost on %s: %d, duplicates dropped: %d", self.port, decoder.lost, decoder.duplicates)
+            self._reported_loss = (decoder.lost, decoder.duplicates)
+        if not decoder.events and decoder.noise_bytes >= FRAME_SIZE and len(self.bauds) > 1:
+            # Nothing but noise so far: the device is probably at another baud rate. Readable
+            # text, such as the boot log an ESP32 prints when the port opens, does not count.
+            self.bauds.append(self.bauds.pop(0)); ser.baudrate = self.bauds[0]; self.decoder = EventDecoder()
+            LOG.warning("Unreadable serial data on %s, retrying at %s baud", self.port, self.bauds[0])
+
+    def stats(self):
+        stats = {"port": self.connected_port, "connects": self.connects, "reads": self.reads, "bytes_read": self.bytes_read}
+        stats.update(self.decoder.stats())
+        return stats
+
+class Deck:
+    """One connected deck: its reader task, debounce state and active profile.
+
+    The primary deck (`arduino_port`) follows the global ACTIVE_PROFILE, so the UI,
+    the automation watcher and switch_profile work as they always have. Extra decks
+    from settings["devices"] keep their own profile and debounce state.
+    """
+    __slots__ = ("name", "spec", "profile_name", "last_action", "reader", "task")
+
+    def __init__(self, spec):
+        self.name = spec["name"]
+        self.spec = spec
+        self.profile_name = spec["profile"]
+        self.last_action = LAST_ACTION_TIME if self.primary else {}
+        self.reader = None
+        self.task = None
+
+    @property
+    def primary(self):
+        return self.name == PRIMARY_DECK
+
+    @property
+    def profile(self):
+        return PROFILE_TABLE.get(self.profile_name) or ACTIVE_PROFILE
+
+    def on_event(self, button_id, kind, trace=None):
+        handle_button_event(button_id, kind, trace, None if self.primary else self)
+
+    def switch_profile(self):
+        """Cycles this (extra) deck to its next profile and remembers it in the config."""
+        self.profile_name = self.profile.next_name
+        for device in CONFIG["settings"].get("devices", []):
+            if isinstance(device, dict) and str(device.get("name") or device.get("port")) == self.name: device["profile"] = self.profile_name
+        save_config(); LOG.info("Action: Deck '%s' switched to profile '%s'", self.name, self.profile_name)
+
+class SerialHub:
+    """Reads every configured deck on one asyncio event loop in a background thread.
+
+    Each deck has its own reader task, decoder and reconnect backoff, so adding,
+    removing or losing one deck never interrupts the others. The public methods
+    are safe to call from any thread.
+    """
+
+    def __init__(self):
+        self.decks = {}   # name -> Deck; only changed on the loop thread
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(ThreadPoolExecutor(max_workers=HUB_IO_WORKERS, thread_name_prefix="SerialHubIO"))
+        self.thread = threading.Thread(target=self._loop.run_forever, name="SerialHub", daemon=True)
+        self.thread.start()
+
+    def _call(self, coro, timeout=5):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def add(self, spec):
+        """Starts reading a deck. Replaces any deck of the same name."""
+        self._call(self._sync_one(spec))
+
+    def remove(self, name):
+        """Stops reading a deck and closes its port."""
+        self._call(self._remove(name))
+
+    def sync(self, specs):
+        """Makes the running decks match `specs`. Decks whose connection settings did not change keep running."""
+        self._call(self._sync(specs))
+
+    def connected_ports(self, excluding=None):
+        return {deck.reader.connected_port for deck in list(self.decks.values())
+                if deck.name != excluding and deck.reader and deck.reader.connected_port}
+
+    def stats(self):
+        return {name: deck.reader.stats() for name, deck in list(self.decks.items()) if deck.reader}
+
+    def close(self):
+        try: self._call(self._sync([]))
+        except Exception as e: LOG.warning("Serial hub did not stop cleanly: %s", e)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self.thread.join(timeout=2)
+
+    async def _sync(self, specs):
+        wanted = {spec["name"]: spec for spec in specs}
+        for name in [name for name in self.decks if name not in wanted]: await self._remove(name)
+        for spec in wanted.values(): await self._sync_one(spec)
+
+    async def _sync_one(self, spec):
+        global SERIAL_READER
+        deck = self.decks.get(spec["name"])
+        if deck and deck.spec["connection"] == spec["connection"]:
+            deck.spec = spec; deck.profile_name = spec["profile"]   # a profile change needs no reconnect
+            return
+        if deck: await self._remove(deck.name)
+        deck = Deck(spec)
+        port, baudrate, usb_ids = spec["connection"]
+        deck.reader = SerialReader(port, baudrate, deck.on_event, lambda: RUN_THREADS, usb_ids,
+                                        SERIAL_RECORDER if deck.primary else None,
+                                        functools.partial(self.connected_ports, deck.name))
+        deck.task = self._loop.create_task(deck.reader.run_async(), name=f"deck-{deck.name}")
+        self.decks[deck.name] = deck
+        if deck.primary: SERIAL_READER = deck.reader
+        LOG.info("Deck '%s' added on %s.", deck.name, port)
+
+    async def _remove(self, name):
+        deck = self.decks.pop(name, None)
+        if deck is None: return
+        deck.task.cancel()
+        await asyncio.gather(deck.task, return_exceptions=True)
+        LOG.info("Deck '%s' removed.", name)
+
+def deck_specs():
+    """Returns the decks to read: the primary `arduino_port` deck plus any listed in settings["devices"].
+
+    Extra decks only use USB discovery if they list their own `usb_ids`, so a
+    missing deck never grabs another deck's port.
+    """
+    settings = CONFIG["settings"]
+    baudrate = settings.get("baudrate", BAUDRATE)
+    specs = [{"name": PRIMARY_DECK, "profile": None,
+              "connection": (ARDUINO_PORT, baudrate, tuple(settings.get("usb_ids", USB_DEVICE_IDS)))}]
+    names = {PRIMARY_DECK}
+    for device in settings.get("devices", []):
+        if not isinstance(device, dict) or not device.get("port"):
+            LOG.warning("Ignoring device entry without a port: %s", device); continue
+        name = str(device.get("name") or device["port"])
+        if name in names: LOG.warning("Ignoring duplicate device '%s'.", name); continue
+        names.add(name)
+        specs.append({"name": name, "profile": device.get("profile"),
+                      "connection": (device["port"], device.get("baudrate", baudrate), tuple(device.get("usb_ids", ())))})
+    return specs
+
+def start_serial_hub():
+    """Starts the serial hub if needed and brings its decks in line with the config."""
+    global SERIAL_HUB
+    if SERIAL_HUB is None: SERIAL_HUB = SerialHub()
+    SERIAL_HUB.sync(deck_specs())
+
+# --- Foreground Window Providers ---
+class WindowProviderError(Exception):
+    """Raised by providers when the foreground window or its process cannot be inspected."""
+
+class ForegroundWindowProvider:
+    """Reports which window has focus and which process owns it.
+
+    foreground() returns (window_handle, pid) or None. Providers that can be told
+    about focus changes set `supports_push` and call the `notify` callback given
+    to start() whenever the foreground window changes.
+    """
+    supports_push = False
+
+    def foreground(self):
+        raise NotImplementedError
+
+    def process_create_time(self, pid):
+        try: return psutil.Process(pid).create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied) as e: raise WindowProviderError(e)
+
+    def process_name(self, pid):
+        try: return psutil.Process(pid).name().lower()
+        except (psutil.NoSuchProcess, psutil.AccessDenied) as e: raise WindowProviderError(e)
+
+    def window_title(self, window):
+        """Returns the title of a window returned by foreground(), or "" if unknown."""
+        return ""
+
+    def activate(self, pid):
+        """Brings a window owned by `pid` to the front. Returns False if it has none or this provider cannot."""
+        return False
+
+    def start(self, notify):
+        pass
+
+    def close(self):
+        pass
+
+class Win32WindowProvider(ForegroundWindowProvider):
+    """Windows provider. Focus changes are pushed by an EVENT_SYSTEM_FOREGROUND WinEvent hook."""
+    supports_push = True
+
+    def __init__(self):
+        self._hook_thread_id = None
+        self._thread = None
+
+    def foreground(self):
+        try:
+            hwnd = win32gui.GetForegroundWindow()
+            if not hwnd: return None
+            _, pid = win32process.GetWindowThreadProcessId(hwnd)
+            return (hwnd, pid)
+        except (win32process.error, win32gui.error) as e: raise WindowProviderError(e)
+
+    def window_title(self, window):
+        try: return win32gui.GetWindowText(window[0])
+        except win32gui.error as e: raise WindowProviderError(e)
+
+    def activate(self, pid):
+        windows = []
+        def visit(hwnd, _):
+            if win32gui.IsWindowVisible(hwnd) and win32process.GetWindowThreadProcessId(hwnd)[1] == pid: windows.append(hwnd)
+            return True
+        try:
+            win32gui.EnumWindows(visit, None)
+            if not windows: return False
+            if win32gui.IsIconic(windows[0]): win32gui.ShowWindow(windows[0], 9)   # SW_RESTORE
+            win32gui.SetForegroundWindow(windows[0])
+            return True
+        except (win32process.error, win32gui.error) as e: raise WindowProviderError(e)
+
+    def start(self, notify):
+        self._thread = threading.Thread(target=self._hook_loop, args=(notify,), name="ForegroundHook", daemon=True)
+        self._thread.start()
+
+    def _hook_loop(self, notify):
+        import ctypes
+        from ctypes import wintypes
+        user32, kernel32 = ctypes.windll.user32, ctypes.windll.kernel32
+        EVENT_SYSTEM_FOREGROUND, WINEVENT_OUTOFCONTEXT = 0x0003, 0x0000
+        WinEventProc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND, wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        callback = WinEventProc(lambda *args: notify())
+        self._hook_thread_id = kernel32.GetCurrentThreadId()
+        hook = user32.SetWinEventHook(EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND, 0, callback, 0, 0, WINEVENT_OUTOFCONTEXT)
+        if not hook: LOG.warning("Could not hook foreground changes, falling back to polling."); return
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg)); user32.DispatchMessageW(ctypes.byref(msg))
+        user32.UnhookWinEvent(hook)
+
+    def close(self):
+        if self._hook_thread_id:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self._hook_thread_id, 0x0012, 0, 0)   # WM_QUIT
+        if self._thread: self._thread.join(timeout=1)
+
+class X11WindowProvider(ForegroundWindowProvider):
+    """X11 provider using EWMH _NET_ACTIVE_WINDOW / _NET_WM_PID. Focus changes are pushed via root-window PropertyNotify."""
+    supports_push = True
+
+    def __init__(self):
+        from Xlib import X, display, error
+        self._X, self._xerror = X, error
+        self._display = display.Display()
+        self._root = self._display.screen().root
+        self._active_atom = self._display.intern_atom("_NET_ACTIVE_WINDOW")
+        self._pid_atom = self._display.intern_atom("_NET_WM_PID")
+        self._clients_atom = self._display.intern_atom("_NET_CLIENT_LIST")
+        self._name_atom = self._display.intern_atom("_NET_WM_NAME")
+        self._utf8_atom = self._display.intern_atom("UTF8_STRING")
+        self._stopping = False
+        self._thread = None
+
+    def foreground(self):
         try:
-            with serial.Serial(ARDUINO_PORT, BAUDRATE, timeout=1) as ser:
-                ser.flushInput(); print(f"Successfully connected to {ARDUINO_PORT}", flush=True)
-                while RUN_THREADS:
-                    try:
-                        line = ser.readline().decode('utf-8', errors='ignore').strip()
-                        if line:
-                            print(f"Received: \"{line}\"", flush=True); current_time = time.time(); button_id = line.split('_')[1]
-                            if (current_time - LAST_ACTION_TIME.get(button_id, 0)) > ACTION_COOLDOWN:
-                                LAST_ACTION_TIME[button_id] = current_time; FLASH_ANIMATIONS[int(button_id)] = pygame.time.get_ticks() + 200
-                                action = CONFIG["profiles"][ACTIVE_PROFILE_NAME].get(line)
-                                if action: execute_action(action)
-                    except (serial.SerialException, IndexError): break
-        except serial.SerialException:
-            if RUN_THREADS: time.sleep(5)
+            active = self._root.get_full_property(self._active_atom, self._X.AnyPropertyType)
+            if not active or not active.value or not active.value[0]: return None
+            window = self._display.create_resource_object("window", active.value[0])
+            pid = window.get_full_property(self._pid_atom, self._X.AnyPropertyType)
+            return (active.value[0], pid.value[0]) if pid and pid.value else None
+        except self._xerror.XError as e: raise WindowProviderError(e)
+
+    def window_title(self, window):
+        try:
+            handle = self._display.create_resource_object("window", window[0])
+            name = handle.get_full_property(self._name_atom, self._utf8_atom)
+            if name and name.value: return name.value.decode("utf-8", "replace") if isinstance(name.value, bytes) else str(name.value)
+            return handle.get_wm_name() or ""
+        except self._xerror.XError as e: raise WindowProviderError(e)
+
+    def activate(self, pid):
+        from Xlib import protocol
+        try:
+            clients = self._root.get_full_property(self._clients_atom, self._X.AnyPropertyType)
+            for window_id in (clients.value if clients else []):
+                window = self._display.create_resource_object("window", window_id)
+                owner = window.get_full_property(self._pid_atom, self._X.AnyPropertyType)
+                if not owner or not owner.value or owner.value[0] != pid: continue
+                event = protocol.event.ClientMessage(window=window, client_type=self._active_atom, data=(32, [2, self._X.CurrentTime, 0, 0, 0]))
+                self._root.send_event(event, event_mask=self._X.SubstructureRedirectMask | self._X.SubstructureNotifyMask)
+                self._display.flush()
+                return True
+            return False
+        except self._xerror.XError as e: raise WindowProviderError(e)
+
+    def start(self, notify):
+        self._thread = threading.Thread(target=self._event_loop, args=(notify,), name="ForegroundEvents", daemon=True)
+        self._thread.start()
+
+    def _event_loop(self, notify):
+        # Xlib connections are not thread-safe, so events get their own connection.
+        from Xlib import display
+        events = display.Display(); root = events.screen().root
+        root.change_attributes(event_mask=self._X.PropertyChangeMask)
+        active_atom = events.intern_atom("_NET_ACTIVE_WINDOW")
+        while not self._stopping:
+            event = events.next_event()
+            if event.type == self._X.PropertyNotify and event.atom == active_atom: notify()
+        events.close()
+
+    def close(self):
+        self._stopping = True
+
+class ScriptedWindowProvider(ForegroundWindowProvider):
+    """Test and benchmark double: focus is changed by calling focus(pid, name). Counts every lookup it serves."""
+
+    def __init__(self, supports_push=True):
+        self.supports_push = supports_push
+        self._window = None
+        self._title = ""
+        self._processes = {}    # pid -> (name, create_time)
+        self._notify = None
+        self.foreground_calls = 0
+        self.name_lookups = 0
+
+    def focus(self, pid, name, create_time=None, title=""):
+        """Brings a window owned by (pid, name) to the front. Pass a new create_time to simulate pid reuse."""
+        self._processes[pid] = (name.lower(), create_time if create_time is not None else self._processes.get(pid, (None, time.time()))[1])
+        self._window = (hash((pid, name)), pid); self._title = title
+        if self.supports_push and self._notify: self._notify()
+
+    def set_title(self, title):
+        """Changes the focused window's title, as switching a browser tab would. Title changes are not pushed."""
+        self._title = title
+
+    def window_title(self, window):
+        return self._title
+
+    def foreground(self):
+        self.foreground_calls += 1
+        return self._window
+
+    def process_create_time(self, pid):
+        if pid not in self._processes: raise WindowProviderError(f"no such process {pid}")
+        return self._processes[pid][1]
+
+    def process_name(self, pid):
+        self.name_lookups += 1
+        if pid not in self._processes: raise WindowProviderError(f"no such process {pid}")
+        return self._processes[pid][0]
+
+    def activate(self, pid):
+        if pid not in self._processes: return False
+        self.focus(pid, self._processes[pid][0], title=self._title)
+        return True
+
+    def start(self, notify):
+        self._notify = notify
+
+def create_window_provider():
+    """Returns the foreground window provider for this platform, or None if automation is unavailable."""
+    if WINDOW_PROVIDER: return WINDOW_PROVIDER
+    if not AUTOMATION_ENABLED: return None
+    if HAVE_WIN32: return Win32WindowProvider()
+    try: return X11WindowProvider()
+    except Exception as e:
+        LOG.warning("X11 foreground window detection unavailable (%s). Automatic profile switching is disabled.", e)
+        return None
+
+# --- Automation Rules ---
+# CONFIG["automation"] maps exact process names to profiles. CONFIG["automation_rules"]
+# adds rules of the form {"profile": ..., "exe": ..., "title": ..., "match": "exact" |
+# "glob" | "regex", "priority": 0}; a rule needs "exe", "title" or both, and all of
+# them must match. Matching ignores case. The highest priority wins, and ties go to
+# the rule listed first (the plain "automation" entries count as listed first).
+RULE_KINDS = ["exact", "glob", "regex"]
+RULE_CACHE_SIZE = 512
+AUTOMATION_MATCHER = None
+_ANY_LINE = "[^\n]*"
+
+def rule_fragment(kind, pattern):
+    """Returns a regex fragment that matches a whole process name or title (no newlines) in the given way."""
+    if kind == "exact": return re.escape(pattern)
+    if kind == "glob": return "".join(_ANY_LINE if c == "*" else "[^\n]" if c == "?" else re.escape(c) for c in pattern)
+    re.compile(pattern)   # report errors in the user's own pattern first
+    return f"{_ANY_LINE}?(?:{pattern}){_ANY_LINE}"
+
+def joinable_regex(pattern):
+    """Returns `pattern` with every group made non-capturing, so that it can be joined into one
+    regex with other rules, or None if it cannot be: backreferences and conditionals need their
+    groups, and global flags such as (?i) are only allowed at the very start of a regex."""
+    out, i, in_class = [], 0, False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            if not in_class and pattern[i + 1:i + 2] not in ("", "0") and pattern[i + 1].isdigit(): return None   # backreference
+            out.append(pattern[i:i + 2]); i += 2; continue
+        if in_class:
+            in_class = c != "]"
+        elif c == "[":
+            in_class = True
+            start = i + 1 + (pattern[i + 1:i + 2] == "^")
+            if pattern[start:start + 1] == "]": out.append(pattern[i:start + 1]); i = start + 1; continue
+        elif c == "(" and pattern[i + 1:i + 2] != "?":
+            out.append("(?:"); i += 1; continue
+        elif pattern.startswith("(?P<", i):
+            end = pattern.find(">", i)
+            if end < 0: return None
+            out.append("(?:"); i = end + 1; continue
+        elif pattern.startswith(("(?P=", "(?("), i):
+            return None
+        out.append(c); i += 1
+    joined = "".join(out)
+    try: re.compile(f"x|(?:{joined})")
+    except re.error: return None
+    return joined
+
+class AutomationMatcher:
+    """Maps a (process name, window title) pair to the profile of the best matching rule.
+
+    Rules are compiled once. Exact process-name rules go into a dict. Rules with a
+    literal process name and a title pattern are grouped per process into one regex
+    over the title. All other rules are joined into a single regex over "exe\ntitle".
+    In each regex the alternatives are ordered by priority, so the first match is the
+    best one. Regex rules that cannot be joined (see joinable_regex) are compiled on
+    their own and tried one by one. Results are cached per (exe, title). Editing the
+    rules builds a new matcher, which starts with an empty cache.
+    """
+    _MISSING = object()
+
+    def __init__(self, rules, cache_size=RULE_CACHE_SIZE):
+        """`rules` are (priority, order, profile, kind, exe, title) tuples, with exe/title None when unused."""
+        ranked = sorted(rules, key=lambda rule: (-rule[0], rule[1]))
+        self.rank = {}
+        self._exact = {}
+        by_exe, generic, single = {}, [], []
+        for position, (priority, order, profile, kind, exe, title) in enumerate(ranked):
+            self.rank[f"r{position}"] = (position, profile)
+            literal_exe = exe is not None and (kind == "exact" or kind == "glob" and not any(c in exe for c in "*?"))
+            if literal_exe and title is None:
+                self._exact.setdefault(exe.lower(), (position, profile))
+            elif literal_exe:
+                by_exe.setdefault(exe.lower(), []).append(f"(?:{rule_fragment(kind, title)})(?P<r{position}>)")
+            else:
+                parts = [part if kind != "regex" or part is None else joinable_regex(part) for part in (exe, title)]
+                if any(joined is None and part is not None for joined, part in zip(parts, (exe, title))): parts, target = (exe, title), single
+                else: target = generic
+                exe_part, title_part = (_ANY_LINE if part is None else rule_fragment(kind, part) for part in parts)
+                target.append((position, f"(?:{exe_part}\n{title_part})"))
+        flags = re.IGNORECASE | re.MULTILINE
+        self._by_exe = {exe: re.compile("|".join(parts), flags) for exe, parts in by_exe.items()}
+        self._generic = None
+        if generic:
+            try: self._generic = re.compile("|".join(f"{fragment}(?P<r{position}>)" for position, fragment in generic), flags)
+            except re.error as e:   # should not happen, but a rule set that cannot be joined must still load
+                LOG.warning("Automation rules could not be combined (%s); matching them one by one.", e)
+                single, generic = sorted(single + generic), []
+        self._generic_best = generic[0][0] if generic else len(ranked)
+        self._single = [(position, re.compile(fragment, flags)) for position, fragment in single]
+        self.uses_title = bool(by_exe) or any(rule[5] is not None for rule in rules)
+        self.rules = len(rules)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def match(self, exe, title=""):
+        """Returns the profile name for the foreground window, or None if no rule matches."""
+        exe = exe.lower()
+        key = (exe, title)
+        profile = self._cache.get(key, self._MISSING)
+        if profile is not self._MISSING:
+            self._cache.move_to_end(key); self.hits += 1
+            return profile
+        self.misses += 1
+        best = self._exact.get(exe)
+        title_rules = self._by_exe.get(exe)
+        if title_rules:
+            found = title_rules.fullmatch(title)
+            if found: best = min(best or (len(self.rank), None), self.rank[found.lastgroup])
+        if self._generic and (best is None or best[0] > self._generic_best):   # no pattern rule can beat a better match
+            found = self._generic.fullmatch(f"{exe}\n{title}")
+            if found: best = min(best or (len(self.rank), None), self.rank[found.lastgroup])
+        for position, pattern in self._single:
+            if best is not None and position > best[0]: break
+            if pattern.fullmatch(f"{exe}\n{title}"): best = self.rank[f"r{position}"]; break
+        profile = self._cache[key] = best[1] if best else None
+        if len(self._cache) > self.cache_size: self._cache.popitem(last=False)
+        return profile
+
+    def stats(self):
+        return {"rules": self.rules, "cache_hits": self.hits, "cache_misses": self.misses, "uses_title": self.uses_title}
+
+def automation_rules(config):
+    """Collects the rules in `config` as AutomationMatcher tuples, skipping and logging invalid ones."""
+    rules = [(0, order, profile, "exact", exe, None) for order, (exe, profile) in enumerate(config.get("automation", {}).items())]
+    for order, rule in enumerate(config.get("automation_rules", []), len(rules)):
+        if not isinstance(rule, dict) or not rule.get("profile") or not (rule.get("exe") or rule.get("title")):
+            LOG.warning("Ignoring automation rule without a profile, exe or title: %s", rule); continue
+        kind = rule.get("match", "exact")
+        if kind not in RULE_KINDS: LOG.warning("Ignoring automation rule with unknown match '%s': %s", kind, rule); continue
+        exe, title = rule.get("exe") or None, rule.get("title") or None
+        try:
+            for part in (exe, title):
+                if part is not None: re.compile(rule_fragment(kind, part))
+            priority = int(rule.get("priority", 0))
+        except (re.error, ValueError, TypeError) as e:
+            LOG.warning("Ignoring automation rule %s: %s", rule, e); continue
+        rules.append((priority, order, rule["profile"], kind, exe, title))
+    return rules
+
+def compile_automation():
+    """Rebuilds the automation matcher from CONFIG. Called by compile_config()."""
+    global AUTOMATION_MATCHER
+    AUTOMATION_MATCHER = AutomationMatcher(automation_rules(CONFIG))
+
+class ProcessNameCache:
+    """LRU cache of process names keyed by (pid, create time), so a reused pid never returns a stale name."""
+
+    def __init__(self, provider, size=PROCESS_CACHE_SIZE):
+        self.provider = provider
+        self.size = size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def name(self, pid):
+        key = (pid, self.provider.process_create_time(pid))
+        name = self._entries.get(key)
+        if name is not None:
+            self._entries.move_to_end(key); self.hits += 1
+            return name
+        self.misses += 1
+        name = self._entries[key] = self.provider.process_name(pid)
+        if len(self._entries) > self.size: self._entries.popitem(last=False)
+        return name
+
+def note_activity():
+    """Switches the profile watcher to fast polling for a while, e.g. after a button press."""
+    global WATCHER_FAST_UNTIL
+    WATCHER_FAST_UNTIL = time.monotonic() + WATCHER_FAST_PERIOD
 
 def profile_watcher():
     """Background thread to watch for active window and switch profiles if enabled."""
-    global ACTIVE_PROFILE_NAME, RUN_THREADS
-    if not AUTOMATION_ENABLED: return
-    last_exe = None
-    while RUN_THREADS:
-        if not CONFIG["settings"].get("automation_enabled", True):
-            time.sleep(2); continue
-        try:
-            hwnd = win32gui.GetForegroundWindow()
-            if hwnd:
-                _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                process = psutil.Process(pid); current_exe = process.name().lower()
-                if current_exe != last_exe:
-                    print(f"Active window changed to: {current_exe}", flush=True); last_exe = current_exe
-                    target_profile = CONFIG["automation"].get(current_exe)
-                    if target_profile and target_profile != ACTIVE_PROFILE_NAME and target_profile in CONFIG["profiles"]:
-                        print(f"Automation: Switching to profile '{target_profile}'", flush=True); ACTIVE_PROFILE_NAME = target_profile
-                        CONFIG["settings"]["active_profile"] = target_profile
-        except (psutil.NoSuchProcess, psutil.AccessDenied, win32process.error, win32gui.error):
-            last_exe = None
-        time.sleep(2)
+    global RUN_THREADS
+    provider = create_window_provider()
+    if provider is None: return
+    cache = ProcessNameCache(provider)
+    stats = {"polls": 0, "focus_changes": 0, "switches": 0}
+    WATCHER_STATS.clear(); WATCHER_STATS.update(stats)
+    last_window = last_title = last_key = last_matcher = None
+    cpu_start = time.thread_time()
+    provider.start(WATCHER_WAKE.set)
+    try:
+        while RUN_THREADS:
+            if not CONFIG["settings"].get("automation_enabled", True):
+                WATCHER_WAKE.wait(WATCHER_SLOW_INTERVAL); WATCHER_WAKE.clear(); continue
+            stats["polls"] += 1
+            matcher = AUTOMATION_MATCHER
+            if matcher is not last_matcher: last_matcher = matcher; last_key = None   # rules changed: look again
+            try:
+                window = provider.foreground()
+                title = provider.window_title(window) if window and matcher.uses_title else ""
+                if window and (window != last_window or title != last_title or last_key is None):
+                    if window != last_window: stats["focus_changes"] += 1; note_activity()
+                    last_window, last_title = window, title
+                    key = (cache.name(window[1]), title)
+                    if key != last_key:
+                        LOG.debug("Active window changed to: %s %r", *key); last_key = key
+                        target_profile = matcher.match(*key)
+                        if target_profile and target_profile != ACTIVE_PROFILE.name and set_active_profile(target_profile):
+                            stats["switches"] += 1
+                            LOG.info("Automation: Switching to profile '%s'", target_profile)
+            except WindowProviderError:
+                last_window = last_title = last_key = None
+            WATCHER_STATS.update(stats, cache_hits=cache.hits, cache_misses=cache.misses, rule_cache_hits=matcher.hits,
+                                 rule_cache_misses=matcher.misses, cpu_seconds=round(time.thread_time() - cpu_start, 4))
+            # Push providers wake us on every focus change, so they only need a slow safety-net poll.
+            # Title changes are never pushed, so title rules keep the adaptive polling.
+            if provider.supports_push and not matcher.uses_title: interval = WATCHER_PUSH_INTERVAL
+            else: interval = WATCHER_FAST_INTERVAL if time.monotonic() < WATCHER_FAST_UNTIL else WATCHER_SLOW_INTERVAL
+            WATCHER_WAKE.wait(interval); WATCHER_WAKE.clear()
+    finally:
+        provider.close()
 
 def restart_threads():
-    """Stops and restarts all background threads."""
-    global SERIAL_THREAD, WATCHER_THREAD, RUN_THREADS, ARDUINO_PORT
-    if (SERIAL_THREAD and SERIAL_THREAD.is_alive()) or (WATCHER_THREAD and WATCHER_THREAD.is_alive()):
-        RUN_THREADS = False; 
-        if SERIAL_THREAD: SERIAL_THREAD.join(timeout=2)
-        if WATCHER_THREAD: WATCHER_THREAD.join(timeout=2)
+    """Applies the configured decks to the serial hub and makes sure the profile watcher is running.
+
+    Only decks whose port settings changed are reconnected; the others keep running.
+    """
+    global WATCHER_THREAD, RUN_THREADS, ARDUINO_PORT
     ARDUINO_PORT = CONFIG["settings"].get("arduino_port", "COM4")
-    print(f"Starting threads for port {ARDUINO_PORT}...", flush=True)
+    LOG.info("Starting threads for port %s...", ARDUINO_PORT)
     RUN_THREADS = True
-    SERIAL_THREAD = threading.Thread(target=listen_to_serial, daemon=True); SERIAL_THREAD.start()
-    WATCHER_THREAD = threading.Thread(target=profile_watcher, daemon=True); WATCHER_THREAD.start()
+    start_serial_hub()
+    if not (WATCHER_THREAD and WATCHER_THREAD.is_alive()):
+        WATCHER_THREAD = threading.Thread(target=profile_watcher, daemon=True); WATCHER_THREAD.start()
 
-def main():
-    """Main application loop."""
-    global CONFIG
-    load_config(); init_pygame(); restart_threads()
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="ConsoleDeck host application.")
+    parser.add_argument("--headless", action="store_true", help="run without the UI: only config, the serial reader, the profile watcher and the action executor")
+    parser.add_argument("--config", metavar="FILE", help="use FILE instead of config.json next to the script")
+    parser.add_argument("--record", metavar="FILE", help="append the raw serial stream with timings to FILE for replay by benchmarks/harness.py")
+    return parser.parse_args(argv)
+
+def start_services(args):
+    """Starts everything needed to handle button presses. Nothing here imports the UI toolkits."""
+    global CONFIG_FILE, SERIAL_RECORDER
+    if args.config: CONFIG_FILE = os.path.abspath(args.config)
+    if args.record: SERIAL_RECORDER = SerialRecorder(args.record)
+    setup_logging(); load_config(); start_config_writer(); start_config_watcher(); start_executor(); start_launcher(); start_stats_exporter(); restart_threads()
+
+def stop_services():
+    """Stops the background threads and flushes config, stats and logs."""
+    global RUN_THREADS
+    RUN_THREADS = False; WATCHER_WAKE.set()
+    if SERIAL_HUB: SERIAL_HUB.close()
+    if WATCHER_THREAD: WATCHER_THREAD.join(timeout=2)
+    LOG.debug("Executor stats: %s", EXECUTOR.stats())
+    if RENDERER: LOG.debug("Renderer stats: %s", RENDERER.stats())
+    STATS_EXPORTER.close()
+    EXECUTOR.shutdown()
+    LAUNCHER.close()
+    CONFIG_WATCHER.close()
+    CONFIG_WRITER.close()
+    if SERIAL_RECORDER: SERIAL_RECORDER.close()
+    LOG_LISTENER.stop()
+
+def run_headless():
+    """Handles button presses without any UI until Ctrl+C or SIGTERM."""
+    for signum in (signal.SIGINT, signal.SIGTERM): signal.signal(signum, lambda signum, frame: STOP_EVENT.set())
+    LOG.info("Running headless. Press Ctrl+C to stop.")
+    while not STOP_EVENT.wait(1): pass   # a timed wait so Ctrl+C is noticed on Windows too
+
+def run_gui():
+    """Runs the pygame window until it is closed."""
+    init_pygame()
     running = True
     while running:
         draw_ui()
-        for event in pygame.event.get():
+        events = [pygame.event.wait(RENDERER.next_timeout())] + pygame.event.get()
+        for event in events:
             if event.type == pygame.QUIT: running = False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED): RENDERER.invalidate()
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 target, value = find_click_target(*event.pos)
                 if target == "edit": configure_button(value)
@@ -443,11 +2712,16 @@ def main():
                     new_port = simpledialog.askstring("COM Port", "Enter new COM Port:", initialvalue=ARDUINO_PORT)
                     if new_port: CONFIG["settings"]["arduino_port"] = new_port.upper(); save_config(); restart_threads()
                     root.destroy()
-    global RUN_THREADS
-    RUN_THREADS = False; 
-    if SERIAL_THREAD: SERIAL_THREAD.join(timeout=2)
-    if WATCHER_THREAD: WATCHER_THREAD.join(timeout=2)
-    pygame.quit(); sys.exit()
+
+def main():
+    """Main application entry point."""
+    args = parse_args()
+    start_services(args)
+    if args.headless: run_headless()
+    else: run_gui()
+    stop_services()
+    if not args.headless: pygame.quit()
+    sys.exit()
 
 if __name__ == "__main__":
     main()
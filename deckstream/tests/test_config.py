@@ -0,0 +1,62 @@
+import copy
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+BASE_CONFIG = {
+    "settings": {"active_profile": "Child", "log_level": "WARNING"},
+    "profiles": {
+        "Base": {"BUTTON_1_PRESS": {"type": "typetext", "value": "from base"}},
+        "Child": {"inherits": "Base", "BUTTON_2_PRESS": {"type": "typetext", "value": "own"}},
+        "Other": {"BUTTON_1_PRESS": {"type": "typetext", "value": "from other"}},
+    },
+}
+
+@pytest.fixture
+def config():
+    streamdeck.CONFIG = streamdeck.normalize_config(copy.deepcopy(BASE_CONFIG))
+    streamdeck.compile_config()
+    yield copy.deepcopy(BASE_CONFIG)
+    streamdeck.CONFIG = {}; streamdeck.PROFILE_TABLE = {}; streamdeck.ACTIVE_PROFILE = None
+
+def label(profile, button=1):
+    return streamdeck.PROFILE_TABLE[profile].lookup(button, streamdeck.PRESS).label
+
+def fresh_labels(config):
+    streamdeck.CONFIG = streamdeck.normalize_config(copy.deepcopy(config))
+    streamdeck.compile_profiles()
+    return {name: [label(name, button) for button in range(1, 10)] for name in streamdeck.PROFILE_TABLE}
+
+def applied_labels(config):
+    streamdeck.apply_config(copy.deepcopy(config))
+    return {name: [label(name, button) for button in range(1, 10)] for name in streamdeck.PROFILE_TABLE}
+
+def test_edit_base_reaches_children(config):
+    config["profiles"]["Base"]["BUTTON_1_PRESS"]["value"] = "edited"
+    assert applied_labels(config) == fresh_labels(config)
+    assert label("Child") == "typetext: edited"
+
+def test_removed_base_is_no_longer_inherited(config):
+    del config["profiles"]["Base"]
+    applied = applied_labels(config)
+    assert applied == fresh_labels(config)
+    assert applied["Child"][0] == "none: "
+
+def test_renamed_base(config):
+    config["profiles"]["Renamed"] = config["profiles"].pop("Base")
+    assert applied_labels(config) == fresh_labels(config)
+
+def test_base_added_later(config):
+    config["profiles"]["Other"]["inherits"] = "Missing"
+    streamdeck.apply_config(copy.deepcopy(config))
+    config["profiles"]["Missing"] = {"BUTTON_3_PRESS": {"type": "typetext", "value": "late"}}
+    assert applied_labels(config) == fresh_labels(config)
+
+def test_active_profile_is_kept(config):
+    config["settings"]["active_profile"] = "Other"
+    streamdeck.apply_config(config)
+    assert streamdeck.ACTIVE_PROFILE.name == "Child"
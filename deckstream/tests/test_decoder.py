@@ -0,0 +1,99 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import serial
+import streamdeck
+from streamdeck import HOLD, PRESS, EventDecoder, encode_frame
+
+def test_crc8():
+    assert streamdeck.crc8(b"123456789") == 0xF4   # the CRC-8 (poly 0x07) check value
+    assert streamdeck.crc8(b"") == 0
+
+def test_frame_layout():
+    frame = encode_frame(3, HOLD, 0x1234, 0xDEADBEEF)
+    assert len(frame) == streamdeck.FRAME_SIZE
+    assert frame[0] == streamdeck.FRAME_SYNC and frame[-1] == streamdeck.crc8(frame[1:-1])
+    assert EventDecoder().feed(frame) == [(3, HOLD, 0x1234, 0xDEADBEEF)]
+
+def test_split_across_chunks():
+    decoder = EventDecoder(); data = encode_frame(1, PRESS, 1, 10) + encode_frame(2, PRESS, 2, 20)
+    events = [event for byte in data for event in decoder.feed(bytes([byte]))]
+    assert events == [(1, PRESS, 1, 10), (2, PRESS, 2, 20)]
+    assert decoder.protocol == "binary"
+
+def test_resync_after_corruption():
+    decoder = EventDecoder()
+    bad = bytearray(encode_frame(4, PRESS, 2, 0)); bad[5] ^= 0xFF   # CRC no longer matches
+    data = b"\x00\xa5\x17noise" + encode_frame(1, PRESS, 1, 0) + bytes(bad) + encode_frame(5, HOLD, 3, 0)
+    assert decoder.feed(data) == [(1, PRESS, 1, 0), (5, HOLD, 3, 0)]
+    assert decoder.bad_frames >= 2 and decoder.discarded_bytes > 0
+    assert decoder.lost == 1   # seq 2 was the corrupt frame
+
+def test_lost_and_duplicate_counting():
+    decoder = EventDecoder()
+    data = b"".join(encode_frame(1, PRESS, seq, 0) for seq in (10, 11, 11, 15, 15, 16))
+    assert [event[2] for event in decoder.feed(data)] == [10, 11, 15, 16]
+    assert (decoder.lost, decoder.duplicates) == (3, 2)
+
+def test_sequence_wraps_and_device_restart():
+    decoder = EventDecoder()
+    data = b"".join(encode_frame(1, PRESS, seq, 0) for seq in (65534, 65535, 0, 1, 3))
+    assert len(decoder.feed(data)) == 5
+    assert (decoder.lost, decoder.duplicates) == (1, 0)
+    assert len(decoder.feed(encode_frame(1, PRESS, 0, 0))) == 1   # a jump back is a device restart, not a loss
+    assert decoder.lost == 1
+
+def test_text_lines():
+    decoder = EventDecoder()
+    assert decoder.feed(b"BUTTON_3_HOLD\r\nBUTTON_1_PR") == [(3, HOLD, None, None)]
+    assert decoder.feed(b"ESS\nhello\n") == [(1, PRESS, None, None)]
+    assert decoder.protocol == "text" and decoder.bad_frames == 1
+
+def test_text_and_binary_mixed():
+    decoder = EventDecoder()
+    assert decoder.feed(b"BUTTON_2_PRESS\n" + encode_frame(7, PRESS, 1, 0)) == [(2, PRESS, None, None), (7, PRESS, 1, 0)]
+
+def test_overlong_text_is_dropped():
+    decoder = EventDecoder()
+    assert decoder.feed(b"x" * (streamdeck.MAX_TEXT_LINE + 1)) == []
+    assert decoder.feed(b"BUTTON_9_PRESS\n") == [(9, PRESS, None, None)]
+
+BOOT_LOG = (b"ets Jun  8 2016 00:22:57\r\n\r\nrst:0x1 (POWERON_RESET),boot:0x13 (SPI_FAST_FLASH_BOOT)\r\n"
+            b"configsip: 0, SPIWP:0xee\r\nclk_drv:0x00,q_drv:0x00,d_drv:0x00,cs0_drv:0x00,hd_drv:0x00,wp_drv:0x00\r\n"
+            b"mode:DIO, clock div:1\r\nload:0x3fff0030,len:1344\r\nentry 0x400805f0\r\n")
+
+NOISE = bytes(range(0x80, 0xD0))   # what frames look like at the wrong baud rate
+
+def test_boot_log_is_not_noise():
+    decoder = EventDecoder()
+    assert decoder.feed(BOOT_LOG) == []
+    assert decoder.discarded_bytes > streamdeck.FRAME_SIZE and decoder.noise_bytes == 0
+    decoder.feed(NOISE)
+    assert decoder.noise_bytes >= streamdeck.FRAME_SIZE
+
+def test_reader_keeps_its_baud_rate_through_the_boot_log():
+    ser = serial.serial_for_url("loop://", timeout=streamdeck.SERIAL_READ_TIMEOUT)
+    received = []
+    reader = streamdeck.SerialReader("loop://", 115200, lambda button, kind, trace: received.append(button), lambda: True)
+    reader.feed(ser, BOOT_LOG)
+    reader.feed(ser, encode_frame(4, PRESS, 1, 0))
+    assert reader.bauds[0] == 115200 and received == [4]
+    reader.feed(ser, NOISE)   # noise before any event would have switched, but an event has decoded
+    assert reader.bauds[0] == 115200
+
+def test_reader_switches_baud_rate_on_noise():
+    ser = serial.serial_for_url("loop://", timeout=streamdeck.SERIAL_READ_TIMEOUT)
+    reader = streamdeck.SerialReader("loop://", 115200, lambda button, kind, trace: None, lambda: True)
+    reader.feed(ser, NOISE)
+    assert reader.bauds[0] == 9600
+
+def test_reader_over_loop_port():
+    ser = serial.serial_for_url("loop://", timeout=streamdeck.SERIAL_READ_TIMEOUT)
+    received = []
+    reader = streamdeck.SerialReader("loop://", streamdeck.BAUDRATE, lambda button, kind, trace: received.append((button, kind)), lambda: len(received) < 3)
+    ser.write(encode_frame(1, PRESS, 1, 0) + b"\xff\xfe" + encode_frame(2, HOLD, 2, 0) + b"BUTTON_3_PRESS\n")
+    asyncio.run(asyncio.wait_for(reader.pump_async(ser), 5))
+    assert received == [(1, PRESS), (2, HOLD), (3, PRESS)]
+    assert reader.stats()["bad_frames"] == 0 and reader.stats()["discarded_bytes"] == 2
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+SLOW = {"type": "delay", "value": "2000"}
+QUICK = {"type": "delay", "value": "1"}
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+def busy_executor(policy):
+    """One worker running button 1's slow job, and a queue of one already full with button 2's job."""
+    executor = streamdeck.ActionExecutor(workers=1, max_queue=1, policy=policy)
+    assert executor.submit(1, SLOW)
+    wait_for(lambda: executor.stats()["running"] == 1)
+    assert executor.submit(2, QUICK)
+    assert executor.stats()["depth"] == 1
+    return executor
+
+def test_runs_jobs():
+    executor = streamdeck.ActionExecutor(workers=2)
+    for key in (1, 1, 2): assert executor.submit(key, QUICK)
+    wait_for(lambda: executor.stats()["executed"] == 3)
+    executor.shutdown()
+
+def test_drop():
+    executor = busy_executor("drop")
+    assert not executor.submit(2, QUICK)
+    assert not executor.submit(3, QUICK)
+    assert executor.stats()["dropped"] == 2
+    executor.shutdown()
+
+def test_coalesce():
+    executor = busy_executor("coalesce")
+    assert executor.submit(2, QUICK)       # replaces button 2's pending job
+    assert not executor.submit(3, QUICK)   # button 3 has nothing pending to give up
+    stats = executor.stats()
+    assert (stats["coalesced"], stats["dropped"], stats["depth"]) == (1, 1, 1)
+    executor.shutdown()
+
+def test_replace_with_pending_jobs():
+    executor = busy_executor("replace")
+    assert executor.submit(2, QUICK)
+    stats = executor.stats()
+    assert (stats["replaced"], stats["dropped"], stats["depth"]) == (1, 0, 1)
+    executor.shutdown()
+
+def test_replace_cancels_the_running_job():
+    executor = streamdeck.ActionExecutor(workers=1, max_queue=1, policy="replace")
+    assert executor.submit(1, SLOW)
+    wait_for(lambda: executor.stats()["running"] == 1)
+    assert executor.submit(1, SLOW)
+    start = time.monotonic()
+    assert executor.submit(1, QUICK)   # cancels the running job and the pending one
+    wait_for(lambda: executor.stats()["executed"] == 2)
+    assert time.monotonic() - start < 1.0
+    assert executor.stats()["replaced"] == 2
+    executor.shutdown()
+
+def test_replace_without_room_cancels_nothing():
+    executor = busy_executor("replace")
+    assert not executor.submit(1, QUICK)   # the queue stays full either way, so button 1 keeps running
+    stats = executor.stats()
+    assert (stats["replaced"], stats["dropped"], stats["running"], stats["executed"]) == (0, 1, 1, 0)
+    executor.shutdown()
@@ -0,0 +1,21 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+def test_program_name_is_resolved():
+    assert streamdeck.split_command("python3") == (streamdeck.shutil.which("python3"),)
+
+def test_arguments_are_split_off():
+    assert streamdeck.split_command("python3 -c 'print(1)'") == (streamdeck.shutil.which("python3"), "-c", "print(1)")
+
+def test_path_with_spaces_stays_whole(tmp_path):
+    program = tmp_path / "My Tools" / "run tool"
+    program.parent.mkdir(); program.write_text("")
+    assert streamdeck.split_command(str(program)) == (str(program),)
+    assert streamdeck.split_command(f'"{program}" --fast') == (str(program), "--fast")
+
+def test_exe_action_gets_argv():
+    action = streamdeck.compile_action({"type": "exe", "value": " python3 --version "})
+    assert action.argv == (streamdeck.shutil.which("python3"), "--version")
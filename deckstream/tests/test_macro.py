@@ -0,0 +1,80 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+from streamdeck import LOOP, RUN, WAIT
+
+KEY = {"type": "keystroke", "value": "a"}
+
+def steps(*lines):
+    return [{"type": kind, "value": value} if kind != "keystroke" else KEY for kind, value in (line.split(":") for line in lines)]
+
+def shape(plan):
+    return [(op[0],) + tuple(round(x, 3) if isinstance(x, float) else x for x in op[1:] if not isinstance(x, streamdeck.CompiledAction)) for op in plan]
+
+def test_adjacent_delays_merge():
+    assert shape(streamdeck.compile_macro(steps("delay:100", "delay:50", "keystroke:"))) == [(WAIT, 0.15), (RUN,)]
+
+def test_delays_do_not_merge_into_a_repeat_block():
+    plan = streamdeck.compile_macro(steps("delay:100", "repeat:3", "delay:50", "keystroke:", "end:"))
+    assert shape(plan) == [(WAIT, 0.1), (WAIT, 0.05), (RUN,), (LOOP, 1, 3)]
+
+def test_delays_do_not_merge_into_a_nested_macro_in_a_repeat_block():
+    plan = streamdeck.compile_macro([{"type": "delay", "value": "100"}, {"type": "repeat", "value": "2"},
+                                     {"type": "macro", "value": steps("delay:50", "keystroke:")}, {"type": "end"}])
+    assert shape(plan) == [(WAIT, 0.1), (WAIT, 0.05), (RUN,), (LOOP, 1, 2)]
+
+def test_repeat_blocks():
+    assert shape(streamdeck.compile_macro(steps("repeat:1", "keystroke:", "end:"))) == [(RUN,)]
+    assert shape(streamdeck.compile_macro(steps("keystroke:", "repeat:0", "keystroke:"))) == [(RUN,), (RUN,), (LOOP, 1, 0)]
+
+@pytest.mark.parametrize("lines", [("repeat:0", "delay:100", "end:"), ("repeat:0", "end:"), ("repeat:3", "delay:5")])
+def test_repeat_without_steps_is_rejected(lines):
+    with pytest.raises(ValueError):
+        streamdeck.compile_macro(steps(*lines))
+    assert isinstance(streamdeck.compile_action({"type": "macro", "value": steps(*lines)}), streamdeck.InvalidAction)
+
+@pytest.mark.parametrize("lines", [("end:",), ("repeat:-1", "keystroke:")])
+def test_malformed_repeat_is_rejected(lines):
+    with pytest.raises(ValueError):
+        streamdeck.compile_macro(steps(*lines))
+
+def test_nesting_limit():
+    macro = steps("keystroke:")
+    for _ in range(streamdeck.MACRO_MAX_DEPTH + 1): macro = [{"type": "macro", "value": macro}]
+    with pytest.raises(ValueError):
+        streamdeck.compile_macro(macro)
+
+class Recorder(streamdeck.InjectionBackend):
+    name = "recorder"
+
+    def __init__(self):
+        self.times = []
+
+    def hotkey(self, keys):
+        self.times.append(time.monotonic())
+
+@pytest.fixture
+def recorder():
+    streamdeck.TEXT_BACKEND_OVERRIDE = backend = Recorder()
+    yield backend
+    streamdeck.TEXT_BACKEND_OVERRIDE = None
+
+def test_repeat_runs_delay_every_time(recorder):
+    action = streamdeck.compile_action({"type": "macro", "gap": 0, "value": steps("repeat:3", "delay:20", "keystroke:", "end:")})
+    start = time.monotonic(); action.run()
+    assert len(recorder.times) == 3
+    assert recorder.times[-1] - start >= 0.06
+
+def test_endless_repeat_stops_on_cancel(recorder):
+    action = streamdeck.compile_action({"type": "macro", "gap": 1, "value": steps("repeat:0", "keystroke:", "end:")})
+    cancel = threading.Event()
+    thread = threading.Thread(target=action.run, args=(cancel,)); thread.start()
+    time.sleep(0.05); cancel.set(); thread.join(1)
+    assert not thread.is_alive()
+    assert recorder.times
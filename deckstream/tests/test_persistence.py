@@ -0,0 +1,23 @@
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+def test_previous_file_becomes_the_backup(tmp_path):
+    path = str(tmp_path / "config.json")
+    streamdeck.write_file_atomic(path, json.dumps({"version": 1}))
+    streamdeck.write_file_atomic(path, json.dumps({"version": 2}))
+    assert streamdeck.read_config_file(path) == {"version": 2}
+    assert streamdeck.read_config_file(streamdeck.backup_path(path)) == {"version": 1}
+    assert not os.path.exists(path + ".tmp")
+
+def test_damaged_file_does_not_replace_the_backup(tmp_path):
+    path = str(tmp_path / "config.json")
+    streamdeck.write_file_atomic(path, json.dumps({"version": 1}))
+    streamdeck.write_file_atomic(path, json.dumps({"version": 2}))
+    with open(path, "w") as f: f.write('{"version": ')   # damaged, e.g. by a crash in another editor
+    streamdeck.write_file_atomic(path, json.dumps({"version": 3}))
+    assert streamdeck.read_config_file(path) == {"version": 3}
+    assert streamdeck.read_config_file(streamdeck.backup_path(path)) == {"version": 1}
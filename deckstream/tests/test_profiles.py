@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+PROFILES = {
+    "Base": {"BUTTON_1_PRESS": {"type": "typetext", "value": "from base"}},
+    "Child": {"inherits": "Base", "BUTTON_2_PRESS": {"type": "typetext", "value": "own"}},
+    "Other": {"BUTTON_1_PRESS": {"type": "typetext", "value": "from other"}, "BUTTON_2_PRESS": {"type": "none", "value": ""}},
+}
+
+@pytest.fixture
+def profiles():
+    pool = {}
+    streamdeck.CONFIG = {"settings": {"active_profile": "Child"}, "profiles": {name: streamdeck.load_profile(data, pool) for name, data in PROFILES.items()}}
+    yield streamdeck.CONFIG["profiles"]
+    streamdeck.CONFIG = {}
+
+def test_placeholders_are_dropped(profiles):
+    assert "BUTTON_2_PRESS" not in profiles["Other"]
+    assert streamdeck.resolve_binding("Child", "BUTTON_1_PRESS") == streamdeck.Binding("typetext", "from base")
+
+def test_set_binding_keeps_extra_keys(profiles):
+    streamdeck.set_binding("Other", "BUTTON_2_PRESS", {"type": "exe", "value": "a.exe", "instance": "skip"})
+    streamdeck.set_binding("Other", "BUTTON_2_PRESS", {"type": "exe", "value": "b.exe"})
+    assert streamdeck.resolve_binding("Other", "BUTTON_2_PRESS") == streamdeck.Binding("exe", "b.exe", (("instance", "skip"),))
+    streamdeck.set_binding("Other", "BUTTON_2_PRESS", {"type": "link", "value": "https://example.com"})
+    assert streamdeck.resolve_binding("Other", "BUTTON_2_PRESS") == streamdeck.Binding("link", "https://example.com")
+
+def test_set_binding_leaves_out_inherited(profiles):
+    streamdeck.set_binding("Child", "BUTTON_1_PRESS", {"type": "typetext", "value": "from base"})
+    assert "BUTTON_1_PRESS" not in profiles["Child"]
+    streamdeck.set_binding("Child", "BUTTON_1_PRESS", {"type": "typetext", "value": "mine"})
+    assert profiles["Child"]["BUTTON_1_PRESS"].value == "mine"
@@ -0,0 +1,69 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamdeck
+
+def matcher(automation=None, rules=()):
+    return streamdeck.AutomationMatcher(streamdeck.automation_rules({"automation": automation or {}, "automation_rules": list(rules)}))
+
+def test_exact_glob_and_regex():
+    m = matcher({"code.exe": "Code"}, [
+        {"exe": "steam*", "match": "glob", "profile": "Games"},
+        {"title": "Zoom Meeting|Microsoft Teams", "match": "regex", "profile": "Meeting"},
+        {"exe": "chrome.exe", "title": "* - YouTube - *", "match": "glob", "profile": "Video"}])
+    assert m.match("CODE.EXE", "main.py") == "Code"
+    assert m.match("steamwebhelper.exe") == "Games"
+    assert m.match("zoom.exe", "Zoom Meeting 40-Minutes") == "Meeting"
+    assert m.match("chrome.exe", "Song - YouTube - Google Chrome") == "Video"
+    assert m.match("chrome.exe", "Inbox - Google Chrome") is None
+    assert m.match("notepad.exe", "x") is None
+
+def test_priority_then_order():
+    m = matcher({"chrome.exe": "Browser"}, [
+        {"title": "*YouTube*", "match": "glob", "profile": "Low"},
+        {"title": "*YouTube*", "match": "glob", "priority": 5, "profile": "High"},
+        {"title": "*YouTube*", "match": "glob", "priority": 5, "profile": "Later"}])
+    assert m.match("chrome.exe", "YouTube") == "High"
+    assert m.match("chrome.exe", "Docs") == "Browser"
+
+def test_regex_rules_with_groups_can_be_combined():
+    # Both rules name a group "proj"; joining them as they are would be a re.error.
+    m = matcher(rules=[
+        {"title": r"(?P<proj>\w+) - Editor$", "match": "regex", "profile": "Edit"},
+        {"title": r"(?P<proj>\w+) - Viewer$", "match": "regex", "profile": "View"},
+        {"title": "(x)(y)", "match": "regex", "profile": "XY"}])
+    assert m.match("app.exe", "deck - Editor") == "Edit"
+    assert m.match("app.exe", "deck - Viewer") == "View"
+    assert m.match("app.exe", "xy") == "XY"
+
+def test_backreferences_keep_their_groups():
+    m = matcher(rules=[
+        {"title": "(x)(y)", "match": "regex", "priority": 1, "profile": "XY"},
+        {"title": r"(\w+) \1", "match": "regex", "profile": "Twice"}])
+    assert m.match("app.exe", "ab ab") == "Twice"
+    assert m.match("app.exe", "xy xy") == "XY"
+    assert m.match("app.exe", "ab cd") is None
+
+def test_joinable_regex():
+    assert streamdeck.joinable_regex("(a)(?P<b>c)[(]") == "(?:a)(?:c)[(]"
+    assert streamdeck.joinable_regex(r"\(a\)") == r"\(a\)"
+    assert streamdeck.joinable_regex(r"(a)\1") is None
+    assert streamdeck.joinable_regex("(?P<a>x)(?P=a)") is None
+
+def test_invalid_rules_are_skipped():
+    m = matcher(rules=[{"title": "(", "match": "regex", "profile": "Bad"}, {"title": "ok", "match": "nope", "profile": "Bad"},
+                       {"title": "fine", "profile": "Good"}])
+    assert m.rules == 1
+    assert m.match("app.exe", "fine") == "Good"
+
+def test_cache():
+    m = streamdeck.AutomationMatcher(streamdeck.automation_rules({"automation": {"a.exe": "A"}}), cache_size=2)
+    for exe in ("a.exe", "a.exe", "b.exe", "c.exe", "a.exe"): m.match(exe)
+    assert (m.hits, m.misses) == (1, 4)
+
+def test_glob_rule_with_a_literal_exe_and_no_title():
+    m = matcher({"chrome.exe": "Browser"}, [{"exe": "Chrome.exe", "match": "glob", "priority": 1, "profile": "X"},
+                                            {"exe": "code.exe", "match": "glob", "profile": "Code"}])
+    assert m.match("chrome.exe", "Inbox") == "X"
+    assert m.match("code.exe") == "Code"
@@ -0,0 +1,42 @@
+import os
+import sys
+import threading
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pygame
+import streamdeck
+
+class Font:
+    """Renders every character as an 8x10 block, like a monospace font."""
+    def render(self, text, antialias, color):
+        return pygame.Surface((8 * len(text), 10), pygame.SRCALPHA)
+
+def test_hits_and_eviction():
+    font = Font(); size = pygame.Surface((8, 10), pygame.SRCALPHA).get_pitch() * 10
+    cache = streamdeck.TextCache(size * 3)
+    first = cache.render(font, "a", (0, 0, 0))
+    assert cache.render(font, "a", (0, 0, 0)) is first
+    for text in "bcd": cache.render(font, text, (0, 0, 0))
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"], stats["evictions"]) == (3, 1, 4, 1)
+    assert cache.render(font, "a", (0, 0, 0)) is not first   # "a" was the oldest, so it went first
+
+def test_too_big_is_not_cached():
+    cache = streamdeck.TextCache(16)
+    cache.render(Font(), "wide label", (0, 0, 0))
+    assert cache.stats()["entries"] == 0
+
+def test_resize_from_another_thread():
+    font = Font(); cache = streamdeck.TextCache(64 * 1024); stop = threading.Event(); errors = []
+    def resize():
+        sizes = [0, 1024, 64 * 1024]
+        while not stop.is_set(): cache.resize(sizes[len(errors) % 3]); sizes.append(sizes.pop(0))
+    interval = sys.getswitchinterval(); sys.setswitchinterval(1e-6)   # switch threads as often as possible
+    thread = threading.Thread(target=resize); thread.start()
+    try:
+        for i in range(20000): cache.render(font, f"label {i % 300}", (0, 0, 0))
+    except Exception as e: errors.append(e)
+    finally: stop.set(); thread.join(); sys.setswitchinterval(interval)
+    assert not errors
+    assert cache.bytes == sum(size for _, size in cache._entries.values()) <= cache.max_bytes